@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Modo batch (sin GUI) para las operaciones de Contadores / STC.
+
+Lee un manifiesto JSON con muchos trabajos (clientes) y los ejecuta en un pool
+de procesos, informando tiempo por trabajo y un resumen final. Pensado para
+programar el cierre de mes (Programador de tareas) sin diálogos.
+
+Uso:
+    python Batch_contadores.py manifiesto.json [--workers N] [--resumen resumen.json] [--instrumentar]
+
+Con --instrumentar (o HDM_INSTRUMENTAR=1) cada trabajo deja junto a su salida
+un informe de tiempos por etapa (<salida>.tiempos.txt / .json, ver Instrumentacion).
+
+Manifiesto (rutas relativas = relativas a la carpeta del manifiesto; admite comodines):
+{
+  "workers": 4,
+  "trabajos": [
+    {"tipo": "autocsv", "nombre": "Cliente A", "archivos": ["A/*.db3"],
+     "fecha_maxima": "31/10/2026", "nombre_base": "ClienteA", "carpeta_salida": "salida/A",
+     "reducir_en_sql": true, "incremental": false, "snapshot": false, "preparar": false},
+    {"tipo": "csven0", "archivo": "B/contadores.csv", "fecha": "31/10/2026",
+     "cliente": "ClienteB", "carpeta_salida": "salida/B", "delimiter": ","},
+    {"tipo": "suma_fija", "archivo": "C/siges.xls", "fecha": "31/10/2026",
+     "hojas": 150, "salida": "salida/C/suma_fija.csv"},
+    {"tipo": "ips", "archivos": ["D/PrinterMonitorClient.db3*"], "salida": "salida/D/ips.txt"}
+  ]
+}
+
+"incremental": true supone que counters sólo crece (filas agregadas al final, como
+hace PrinterMonitorClient): un UPDATE o DELETE de lecturas ya procesadas en una
+corrida anterior no se refleja. Para DB que se editan en el lugar, dejarlo en false.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
+from typing import List, Optional
+
+TIPOS = ("autocsv", "csven0", "suma_fija", "ips")
+# Claves obligatorias por tipo (el resto tiene valor por defecto)
+CLAVES_REQUERIDAS = {
+    "autocsv": ("archivos", "nombre_base"),
+    "csven0": ("archivo", "fecha", "cliente"),
+    "suma_fija": ("archivo", "fecha", "salida"),
+    "ips": ("archivos", "salida"),
+}
+
+
+# ---------------------- Manifiesto ----------------------
+
+def _ruta(base: str, p: str) -> str:
+    p = os.path.expandvars(os.path.expanduser(p))
+    return p if os.path.isabs(p) else os.path.normpath(os.path.join(base, p))
+
+
+def _expandir(base: str, patrones: List[str]) -> List[str]:
+    """Expande comodines (como ask_paths_stdin); un patrón sin coincidencias queda tal cual."""
+    salida: List[str] = []
+    for pat in patrones:
+        pat = _ruta(base, pat)
+        coincidencias = sorted(glob.glob(pat))
+        salida.extend(coincidencias if coincidencias else [pat])
+    return salida
+
+
+def cargar_manifiesto(path: str) -> dict:
+    """
+    Lee y normaliza el manifiesto: rutas absolutas, comodines expandidos, tipos y
+    claves obligatorias validados (ValueError con el número de trabajo).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        manifiesto = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+
+    trabajos = manifiesto.get("trabajos")
+    if not isinstance(trabajos, list) or not trabajos:
+        raise ValueError("El manifiesto debe tener una lista 'trabajos' no vacía.")
+
+    for i, t in enumerate(trabajos, start=1):
+        if not isinstance(t, dict):
+            raise ValueError(f"Trabajo #{i}: debe ser un objeto JSON.")
+        tipo = t.get("tipo")
+        if tipo not in TIPOS:
+            raise ValueError(f"Trabajo #{i}: tipo inválido {tipo!r} (use {', '.join(TIPOS)}).")
+        for clave in CLAVES_REQUERIDAS[tipo]:
+            if not t.get(clave):
+                raise ValueError(f"Trabajo #{i} ({tipo}): falta la clave {clave!r}.")
+        t.setdefault("nombre", f"{tipo}#{i}")
+        if "archivos" in t:
+            t["archivos"] = _expandir(base, t["archivos"])
+        for clave in ("archivo", "carpeta_salida", "salida"):
+            if t.get(clave):
+                t[clave] = _ruta(base, t[clave])
+    return manifiesto
+
+
+# ---------------------- Ejecución de un trabajo ----------------------
+
+def ejecutar_trabajo(t: dict) -> str:
+    """Corre un trabajo del manifiesto; devuelve la ruta de salida. Lanza excepción si falla."""
+    tipo = t["tipo"]
+    if tipo == "autocsv":
+        from Db3ToCsv import procesar_db_a_csv
+        return procesar_db_a_csv(
+            archivos_db=t["archivos"],
+            fecha_maxima=t.get("fecha_maxima") or None,
+            nombre_base_salida=t["nombre_base"],
+            carpeta_salida=t.get("carpeta_salida"),
+            workers=t.get("workers_lectura", 1),
+            reducir_en_sql=t.get("reducir_en_sql", True),
+            preparar=t.get("preparar", False),
+            incremental=t.get("incremental", False),
+            snapshot=t.get("snapshot", False),
+        )
+    if tipo == "csven0":
+        from CsvEn0 import filtrar_falta_contador_csv
+        if t.get("carpeta_salida"):
+            os.makedirs(t["carpeta_salida"], exist_ok=True)
+        return filtrar_falta_contador_csv(
+            archivo_csv_entrada=t["archivo"],
+            fecha_nueva=t["fecha"],
+            nombre_cliente=t["cliente"],
+            carpeta_salida=t.get("carpeta_salida"),
+            delimiter_entrada=t.get("delimiter", ","),
+        )
+    if tipo == "suma_fija":
+        from Clientes_suma import convertir_xls_a_csv_arcos_archivo
+        salida = t["salida"]
+        os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+        return convertir_xls_a_csv_arcos_archivo(t["archivo"], t["fecha"], int(t.get("hojas", 0)), salida)
+    if tipo == "ips":
+        from Extraer_ips import generate_ip_ranges
+        out_path, _ = generate_ip_ranges(t["archivos"], t["salida"], gui_only=True)
+        if not out_path:
+            raise RuntimeError("Ningún archivo SQLite válido entre los indicados.")
+        return out_path
+    raise ValueError(f"Tipo de trabajo desconocido: {tipo!r}")
+
+
+def _correr(indice: int, t: dict) -> dict:
+    """Envoltorio para el pool: nunca lanza; devuelve resultado + tiempos."""
+    t0 = time.perf_counter()
+    try:
+        salida = ejecutar_trabajo(t)
+        ok, error = True, ""
+    except Exception as e:
+        salida, ok = "", False
+        error = f"{type(e).__name__}: {e}"
+        if os.environ.get("HDM_BATCH_TRACEBACK"):
+            error += "\n" + traceback.format_exc()
+    return {
+        "indice": indice,
+        "nombre": t["nombre"],
+        "tipo": t["tipo"],
+        "ok": ok,
+        "segundos": round(time.perf_counter() - t0, 3),
+        "salida": salida,
+        "error": error,
+    }
+
+
+# ---------------------- Pool + resumen ----------------------
+
+def ejecutar_manifiesto(manifiesto: dict, workers: Optional[int] = None) -> List[dict]:
+    """Ejecuta todos los trabajos con un pool de procesos; imprime cada uno al terminar."""
+    trabajos = manifiesto["trabajos"]
+    workers = workers or manifiesto.get("workers") or min(4, os.cpu_count() or 1)
+    workers = max(1, min(int(workers), len(trabajos)))
+
+    resultados: List[dict] = []
+
+    def _informar(r: dict):
+        estado = "OK   " if r["ok"] else "ERROR"
+        detalle = r["salida"] if r["ok"] else r["error"]
+        print(f"[{estado}] {r['nombre']} ({r['tipo']}) {r['segundos']:.2f} s -> {detalle}", flush=True)
+        resultados.append(r)
+
+    if workers == 1:
+        for i, t in enumerate(trabajos):
+            _informar(_correr(i, t))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [pool.submit(_correr, i, t) for i, t in enumerate(trabajos)]
+            for fut in as_completed(futuros):
+                _informar(fut.result())
+
+    return sorted(resultados, key=lambda r: r["indice"])
+
+
+def imprimir_resumen(resultados: List[dict], total_seg: float):
+    ok = sum(r["ok"] for r in resultados)
+    print()
+    print(f"Resumen: {ok}/{len(resultados)} trabajos OK en {total_seg:.2f} s (pared)")
+    for r in resultados:
+        marca = "✔" if r["ok"] else "✖"
+        print(f"  {marca} {r['segundos']:8.2f} s  {r['tipo']:<9} {r['nombre']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Ejecuta en lote operaciones de Contadores/STC desde un manifiesto JSON.")
+    ap.add_argument("manifiesto", help="Ruta al manifiesto JSON")
+    ap.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto: manifiesto o min(4, CPUs))")
+    ap.add_argument("--resumen", help="Guardar el resultado por trabajo en este JSON")
+    ap.add_argument("--instrumentar", choices=("tiempos", "mem"), nargs="?", const="tiempos",
+                    help="Informe de tiempos por etapa junto a cada salida ('mem' suma tracemalloc)")
+    args = ap.parse_args(argv)
+
+    if args.instrumentar:
+        # por entorno: los procesos del pool lo heredan
+        from Instrumentacion import activar
+        activar(memoria=args.instrumentar == "mem")
+
+    try:
+        manifiesto = cargar_manifiesto(args.manifiesto)
+    except Exception as e:
+        print(f"[ERROR] Manifiesto inválido: {e}")
+        return 2
+
+    t0 = time.perf_counter()
+    resultados = ejecutar_manifiesto(manifiesto, workers=args.workers)
+    total = time.perf_counter() - t0
+    imprimir_resumen(resultados, total)
+
+    if args.resumen:
+        with open(args.resumen, "w", encoding="utf-8") as f:
+            json.dump({"segundos": round(total, 3), "trabajos": resultados}, f, ensure_ascii=False, indent=2)
+
+    return 0 if all(r["ok"] for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
@@ -3,41 +3,28 @@ import pandas as pd
 from tkinter import filedialog, simpledialog, messagebox
 from datetime import datetime
 
-def convertir_xls_a_csv_arcos():
-    archivo_xls = filedialog.askopenfilename(title="Selecciona un archivo XLS", filetypes=[("Archivos XLS", "*.xls *.xlsx")])
-    if not archivo_xls:
-        return
+from Instrumentacion import en_corrida, medir, instrumentado
+
+COLUMNAS_A_ELIMINAR = ['Empresa', 'Centro Costo', 'CMeses', 'Conts', 'Bonif', 'Renta', 
+                       'Diferencia', 'Clase', 'Modelo', 'Sector', 'Direccion IP', 
+                       'Toma Anterior', 'Toma Actual', 'Cdor Anterior', 'Tipo', 'Tipo.1']
+
 
+@instrumentado("lectura_xls")
+def leer_xls(archivo_xls):
     datos = pd.read_excel(archivo_xls)
     datos.rename(columns={'Nro Serie': 'SERIE'}, inplace=True)
+    datos.drop(columns=COLUMNAS_A_ELIMINAR, errors='ignore', inplace=True)
+    return datos
 
-    columnas_a_eliminar = ['Empresa', 'Centro Costo', 'CMeses', 'Conts', 'Bonif', 'Renta', 
-                           'Diferencia', 'Clase', 'Modelo', 'Sector', 'Direccion IP', 
-                           'Toma Anterior', 'Toma Actual', 'Cdor Anterior', 'Tipo', 'Tipo.1']
-    datos.drop(columns=columnas_a_eliminar, errors='ignore', inplace=True)
 
-    fecha_usuario = simpledialog.askstring("Entrada de Fecha", "Ingrese la fecha (DD/MM/AAAA):")
-    if not fecha_usuario:
-        messagebox.showwarning("Advertencia", "No se ingresó ninguna fecha.")
-        return
-    
-    try:
-        fecha_actual = datetime.strptime(fecha_usuario, '%d/%m/%Y').strftime('%d/%m/%Y')
-        messagebox.showinfo("Fecha ingresada", "La fecha se ha ingresado correctamente.")
-    except ValueError:
-        messagebox.showerror("Error", "La fecha ingresada no tiene el formato correcto (DD/MM/AAAA).")
-        return
-    
+@instrumentado("suma_fija")
+def aplicar_suma_fija(datos, fecha_actual, hojas_a_sumar):
+    """Completa FECHA/TIPO/CLASE/CONTADOR (suma hojas_a_sumar a los equipos a estimar) y reordena."""
     datos['FECHA'] = fecha_actual
     datos['TIPO'] = "14"
     datos['CLASE'] = "10"
     datos['CONTADOR'] = ""
-    
-    hojas_a_sumar = simpledialog.askinteger("Copias a sumar", "Ingrese la cantidad de hojas que desea sumar a los equipos a estimar:")
-    if hojas_a_sumar is None:
-        messagebox.showwarning("Advertencia", "No se ingresó ninguna cantidad. Los equipos a estimar no serán modificados.")
-        hojas_a_sumar = 0
-    
 
     datos['CONTADOR'] = np.where((datos['Estado'] == 'Desaparecida') | (datos['Estado'] == 'Backup Fijo'), datos['Cdor Actual'],
                                  np.where(datos['Cdor Actual'] == 1, datos['Cdor Actual'],
@@ -56,8 +43,57 @@ def convertir_xls_a_csv_arcos():
         columnas.insert(indice_serie + 3, 'CLASE')
         columnas.insert(indice_serie + 4, 'CONTADOR')
         datos = datos[columnas]
-    
-    archivo_csv = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("Archivos CSV", "*.csv")])
-    if archivo_csv:
+    return datos
+
+
+@en_corrida("SumaFija")
+def convertir_xls_a_csv_arcos_archivo(archivo_xls, fecha, hojas_a_sumar, archivo_csv):
+    """Versión sin diálogos (modo batch). fecha en DD/MM/AAAA; devuelve la ruta del CSV."""
+    try:
+        fecha_actual = datetime.strptime(fecha, '%d/%m/%Y').strftime('%d/%m/%Y')
+    except ValueError:
+        raise ValueError("La fecha ingresada no tiene el formato correcto (DD/MM/AAAA).")
+    datos = aplicar_suma_fija(leer_xls(archivo_xls), fecha_actual, hojas_a_sumar or 0)
+    with medir("escritura"):
         datos.to_csv(archivo_csv, index=False, sep=';')
-        messagebox.showinfo("Éxito", f"Archivo CSV guardado exitosamente en: {archivo_csv}")
+    return archivo_csv
+
+
+def pedir_parametros_suma_fija(parent=None):
+    """
+    Diálogos de la estimación con suma fija, todos antes de procesar.
+    Devuelve (archivo_xls, fecha DD/MM/AAAA, hojas_a_sumar, archivo_csv) o None si se cancela.
+    """
+    archivo_xls = filedialog.askopenfilename(title="Selecciona un archivo XLS", filetypes=[("Archivos XLS", "*.xls *.xlsx")], parent=parent)
+    if not archivo_xls:
+        return None
+
+    fecha_usuario = simpledialog.askstring("Entrada de Fecha", "Ingrese la fecha (DD/MM/AAAA):", parent=parent)
+    if not fecha_usuario:
+        messagebox.showwarning("Advertencia", "No se ingresó ninguna fecha.", parent=parent)
+        return None
+    
+    try:
+        fecha_actual = datetime.strptime(fecha_usuario, '%d/%m/%Y').strftime('%d/%m/%Y')
+        messagebox.showinfo("Fecha ingresada", "La fecha se ha ingresado correctamente.", parent=parent)
+    except ValueError:
+        messagebox.showerror("Error", "La fecha ingresada no tiene el formato correcto (DD/MM/AAAA).", parent=parent)
+        return None
+    
+    hojas_a_sumar = simpledialog.askinteger("Copias a sumar", "Ingrese la cantidad de hojas que desea sumar a los equipos a estimar:", parent=parent)
+    if hojas_a_sumar is None:
+        messagebox.showwarning("Advertencia", "No se ingresó ninguna cantidad. Los equipos a estimar no serán modificados.", parent=parent)
+        hojas_a_sumar = 0
+    
+    archivo_csv = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("Archivos CSV", "*.csv")], parent=parent)
+    if not archivo_csv:
+        return None
+    return archivo_xls, fecha_actual, hojas_a_sumar, archivo_csv
+
+
+def convertir_xls_a_csv_arcos():
+    parametros = pedir_parametros_suma_fija()
+    if parametros is None:
+        return
+    archivo_csv = convertir_xls_a_csv_arcos_archivo(*parametros)
+    messagebox.showinfo("Éxito", f"Archivo CSV guardado exitosamente en: {archivo_csv}")
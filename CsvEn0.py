@@ -5,6 +5,9 @@ from typing import Optional
 
 import pandas as pd
 
+from Csv_stream import escribir_csv_por_bloques, FIN_LINEA_CSVEN0
+from Instrumentacion import en_corrida, medir
+
 
 def _validar_fecha_dmy(fecha: str) -> None:
     """Valida formato DD/MM/YYYY; lanza ValueError si no cumple."""
@@ -14,6 +17,7 @@ def _validar_fecha_dmy(fecha: str) -> None:
         raise ValueError("fecha_nueva debe tener formato DD/MM/YYYY")
 
 
+@en_corrida("CSVen0")
 def filtrar_falta_contador_csv(
     archivo_csv_entrada: str,
     fecha_nueva: str,
@@ -40,7 +44,8 @@ def filtrar_falta_contador_csv(
     _validar_fecha_dmy(fecha_nueva)
 
     # Leer
-    datos = pd.read_csv(archivo_csv_entrada, delimiter=delimiter_entrada)
+    with medir("lectura_csv"):
+        datos = pd.read_csv(archivo_csv_entrada, delimiter=delimiter_entrada)
 
     # Chequeo de columna clave
     if "Tipo" not in datos.columns:
@@ -104,5 +109,7 @@ def filtrar_falta_contador_csv(
     nombre_archivo = f"{nombre_cliente}_{nombre_carpeta}_CSVen0.csv"
     ruta_salida = os.path.join(carpeta_base, nombre_archivo)
 
-    datos.to_csv(ruta_salida, sep=";", index=False, encoding="utf-8", lineterminator="\n")
+    # Exportación por bloques (UTF-8, LF como siempre; ver Csv_stream.FIN_LINEA_CSVEN0)
+    with medir("escritura"):
+        escribir_csv_por_bloques(datos, ruta_salida, sep=";", encoding="utf-8", lineterminator=FIN_LINEA_CSVEN0)
     return ruta_salida
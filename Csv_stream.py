@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de DataFrames a CSV por bloques de filas a través de un único
+archivo con buffer grande. Evita formatear la salida completa de una vez:
+cada bloque se convierte a texto, se escribe y se libera.
+
+El resultado es byte a byte igual a df.to_csv(path, sep=..., index=False,
+encoding=..., lineterminator=...).
+"""
+
+from typing import Callable, Optional
+
+import pandas as pd
+
+FILAS_POR_BLOQUE = 50_000
+BUFFER_ESCRITURA = 1024 * 1024  # 1 MiB
+
+# Fin de línea de cada reporte, a propósito distintos: son los que ya escribían
+# las versiones originales (Db3ToCsv con CRLF, CsvEn0 con lineterminator="\n")
+# y los que reciben hoy los importadores. Cambiarlos es cambiar el formato.
+FIN_LINEA_AUTOCSV = "\r\n"
+FIN_LINEA_CSVEN0 = "\n"
+
+
+def escribir_csv_por_bloques(
+    df: pd.DataFrame,
+    path: str,
+    *,
+    sep: str,
+    encoding: str,
+    lineterminator: str,
+    filas_por_bloque: int = FILAS_POR_BLOQUE,
+    transformar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    al_escribir_bloque: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """
+    Escribe df en path por bloques de filas_por_bloque.
+    - transformar: se aplica a cada bloque antes de escribirlo (p. ej. formatear fechas),
+      así la columna formateada (y la copia del DataFrame que arma assign) nunca
+      existe completa en memoria. to_csv ya escribe por bloques internamente: sin
+      transformar, partir en bloques sólo ahorra su buffer de texto.
+    - al_escribir_bloque(filas_escritas, filas_totales): se llama tras cada bloque
+      (progreso); si lanza una excepción, la escritura se corta y se propaga.
+    Devuelve path.
+    """
+    filas_por_bloque = max(1, int(filas_por_bloque))
+    # newline="" => el lineterminator llega tal cual (sin traducción \n -> \r\n en Windows)
+    with open(path, "w", encoding=encoding, newline="", buffering=BUFFER_ESCRITURA) as f:
+        # range(…, max(len, 1)) => un DataFrame vacío igual escribe la cabecera
+        for inicio in range(0, max(len(df), 1), filas_por_bloque):
+            bloque = df.iloc[inicio:inicio + filas_por_bloque]
+            if transformar is not None:
+                bloque = transformar(bloque)
+            bloque.to_csv(f, sep=sep, index=False, header=(inicio == 0), lineterminator=lineterminator)
+            if al_escribir_bloque is not None:
+                al_escribir_bloque(min(inicio + filas_por_bloque, len(df)), len(df))
+    return path
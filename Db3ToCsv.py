@@ -1,11 +1,25 @@
 import os
+import json
+import hashlib
 import sqlite3
+import tempfile
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Optional, List
 
 import numpy as np
 import pandas as pd
 
+from Sqlite_lectura import conectar_solo_lectura, es_archivo_estatico, firma_wal
+from Csv_stream import escribir_csv_por_bloques, FIN_LINEA_AUTOCSV
+from Snapshot_counters import huella_archivo, construir_snapshot, leer_snapshot, fechas_iso_estrictas
+from Instrumentacion import en_corrida, medir
+from Progreso import (
+    Progreso, TokenCancelacion, ProcesoCancelado, avisar,
+    ETAPA_LECTURA, ETAPA_CONTEO, ETAPA_DEDUP, ETAPA_PIVOT, ETAPA_ESCRITURA,
+)
+
 # Modelos especiales que fuerzan CLASE=20 cuando counterclass_id=40
 MODELOS_ESPECIALES = {
     "C4010ND", "CLX_6260_Series", "CLX_9201", "HP_PageWide_Color_MFP_E58650", "X4300LX", "CLP_680_Series",
@@ -21,6 +35,17 @@ MODELOS_ESPECIALES = {
     "HP_PageWide_MFP_P57750", "HP_Color_LaserJet_MFP_M577"
 }
 
+# Tope de hilos para la lectura paralela de DBs (workers=None)
+MAX_WORKERS_LECTURA = min(8, os.cpu_count() or 1)
+
+# Cache local (%LOCALAPPDATA%\HelpDeskManagerApp\cache): copias indexadas y estado incremental
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "HelpDeskManagerApp", "cache")
+CACHE_DB_DIR = os.path.join(CACHE_DIR, "db3")
+ESTADO_DIR = os.path.join(CACHE_DIR, "incremental")
+ESTADO_VERSION = 1
+INDICE_CUBRIENTE = "ix_hdm_counters_clase_serie_fecha"
+PAGINAS_COPIA = 2048  # páginas por paso del backup al copiar (entre pasos se consulta cancelar)
+
 # -------------------- utilidades base --------------------
 
 def validar_fecha_ddmmyyyy(fecha: str) -> bool:
@@ -36,9 +61,12 @@ def _fecha_param(fecha_maxima_str: str) -> str:
     dt = datetime.strptime(fecha_maxima_str, "%d/%m/%Y") + timedelta(days=1)
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
-def conectar_db(filename: str) -> sqlite3.Connection:
-    """Devuelve una conexión sqlite3; el caller maneja excepciones."""
-    return sqlite3.connect(filename)
+def conectar_db(filename: str, inmutable: bool = False) -> sqlite3.Connection:
+    """
+    Devuelve una conexión sqlite3 de solo lectura (ver Sqlite_lectura); el caller maneja excepciones.
+    inmutable=True sólo para archivos que nadie escribe (copias preparadas, rotados .db3.N).
+    """
+    return conectar_solo_lectura(filename, inmutable=inmutable)
 
 def verificar_estructura(conn: sqlite3.Connection) -> bool:
     """Chequea columnas esperadas en tabla 'counters'."""
@@ -48,90 +76,472 @@ def verificar_estructura(conn: sqlite3.Connection) -> bool:
     requeridas = {"serialnumber", "readdate", "readvalue", "model", "counterclass_id"}
     return requeridas.issubset(cols)
 
-def ejecutar_consulta(conn: sqlite3.Connection, fecha_maxima: Optional[str]) -> pd.DataFrame:
+def _sql_reducida(con_fecha: bool, desde_rowid: bool = False, con_rid: bool = False) -> str:
     """
-    Lee counters (clases 40/10/20). Si fecha_maxima (DD/MM/YYYY) se provee, aplica readdate < fecha+1d.
+    Consulta que deja solo la lectura más reciente por serialnumber + CLASE derivada
+    (misma regla que en pandas: 40 + modelo especial -> 20; 40 -> 10; resto mantiene).
+    Conserva los empates en la fecha máxima y respeta el orden por rowid, así el sort
+    estable + drop_duplicates de pandas elige exactamente la misma fila que sin reducir.
+    Supone readdate en texto ISO ('YYYY-MM-DD HH:MM:SS'): MAX(readdate) compara texto;
+    los callers lo verifican con fechas_iso_estrictas y si no, leen todo.
+    Parámetros en orden: modelos especiales, [fecha límite], [rowid desde (exclusivo)].
     """
-    base_query = (
-        "SELECT serialnumber, readdate, readvalue, model, counterclass_id "
-        "FROM counters WHERE counterclass_id IN (40,10,20)"
+    marcadores = ",".join("?" * len(MODELOS_ESPECIALES))
+    filtro = " AND readdate < ?" if con_fecha else ""
+    if desde_rowid:
+        filtro += " AND rowid > ?"
+    rid = "b.rid, " if con_rid else ""
+    return (
+        "WITH base AS ("
+        " SELECT rowid AS rid, serialnumber, readdate, readvalue, model, counterclass_id,"
+        f" CASE WHEN counterclass_id = 40 AND model IN ({marcadores}) THEN 20"
+        " WHEN counterclass_id = 40 THEN 10 ELSE counterclass_id END AS clase"
+        f" FROM counters WHERE counterclass_id IN (40,10,20){filtro}"
+        "), ultimas AS ("
+        " SELECT serialnumber, clase, MAX(readdate) AS maxfecha FROM base GROUP BY serialnumber, clase"
+        ") "
+        f"SELECT {rid}b.serialnumber, b.readdate, b.readvalue, b.model, b.counterclass_id "
+        "FROM base b JOIN ultimas u"
+        " ON b.serialnumber IS u.serialnumber AND b.clase = u.clase AND b.readdate IS u.maxfecha "
+        "ORDER BY b.rid"
     )
-    if fecha_maxima:
-        if not validar_fecha_ddmmyyyy(fecha_maxima):
-            raise ValueError("fecha_maxima debe tener formato DD/MM/YYYY")
-        query = base_query + " AND readdate < ?"
-        # parse_dates convierte 'readdate' a datetime ya desde SQL
-        return pd.read_sql(query, conn, params=(_fecha_param(fecha_maxima),), parse_dates=["readdate"])
-    return pd.read_sql(base_query, conn, parse_dates=["readdate"])
 
-# -------------------- flujo principal DB -> CSV --------------------
-
-def procesar_db_a_csv(
-    archivos_db: List[str],
+def ejecutar_consulta(
+    conn: sqlite3.Connection,
     fecha_maxima: Optional[str],
-    nombre_base_salida: str,
-    carpeta_salida: Optional[str] = None,
-) -> str:
+    reducir_en_sql: bool = False,
+) -> pd.DataFrame:
     """
-    Une lecturas desde múltiples DB SQLite, aplica reglas TIPO/CLASE y exporta
-    CSV en formato ANCHO (columnas para 10 y 20): 
-      SERIE, FECHA, TIPO, CLASE_10, CONTADOR_10, CLASE_20, CONTADOR_20
-    (UTF-8 sin BOM, CRLF).
+    Lee counters (clases 40/10/20). Si fecha_maxima (DD/MM/YYYY) se provee, aplica readdate < fecha+1d.
+    - reducir_en_sql: SQLite devuelve solo la última lectura por SERIE+CLASE (ver _sql_reducida)
+      en lugar de todo el histórico; el resultado final de procesar_db_a_csv es el mismo.
+      Si alguna readdate no es 'YYYY-MM-DD HH:MM:SS', se lee todo (el MAX de texto no
+      elegiría la misma fila que las fechas parseadas en pandas).
     """
-    if not archivos_db:
-        raise ValueError("Se requiere al menos un archivo de base de datos.")
     if fecha_maxima and not validar_fecha_ddmmyyyy(fecha_maxima):
-        raise ValueError("fecha_maxima inválida; use DD/MM/YYYY.")
-    if not nombre_base_salida:
-        raise ValueError("nombre_base_salida no puede ser vacío.")
+        raise ValueError("fecha_maxima debe tener formato DD/MM/YYYY")
+    if reducir_en_sql and not fechas_iso_estrictas(conn):
+        reducir_en_sql = False
 
-    # Leer y unir
-    dfs: List[pd.DataFrame] = []
-    for path in archivos_db:
-        with conectar_db(path) as conn:
-            if not verificar_estructura(conn):
-                raise RuntimeError(f"Estructura inesperada en DB: {path}")
-            df = ejecutar_consulta(conn, fecha_maxima)
-            if df is None or df.empty:
-                continue
-            dfs.append(df)
+    if reducir_en_sql:
+        query = _sql_reducida(bool(fecha_maxima))
+        params: tuple = tuple(sorted(MODELOS_ESPECIALES))
+    else:
+        query = (
+            "SELECT serialnumber, readdate, readvalue, model, counterclass_id "
+            "FROM counters WHERE counterclass_id IN (40,10,20)"
+        )
+        if fecha_maxima:
+            query += " AND readdate < ?"
+        # orden por rowid explícito: define el desempate del sort estable aunque haya índices
+        query += " ORDER BY rowid"
+        params = ()
+    if fecha_maxima:
+        params += (_fecha_param(fecha_maxima),)
+    with medir("lectura.sqlite"):
+        df = pd.read_sql(query, conn, params=params)
+    # mismo parseo que read_sql(parse_dates=["readdate"]), medido aparte
+    with medir("lectura.fechas"):
+        df["readdate"] = pd.to_datetime(df["readdate"], errors="coerce")
+    return df
 
-    if not dfs:
-        raise RuntimeError("No se obtuvieron datos de las bases proporcionadas.")
+# -------------------- copias locales indexadas ("preparar") --------------------
 
-    df = pd.concat(dfs, ignore_index=True)
+def _firma_origen(path: str) -> dict:
+    # el -wal entra en la firma: en modo WAL los commits no tocan el archivo principal
+    st = os.stat(path)
+    return {"origen": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "wal": firma_wal(path)}
 
-    # ----- Transformaciones base -----
-    # TIPO: 40 -> 15; otros -> 7
-    df.insert(df.columns.get_loc("readvalue"), "TIPO", np.where(df["counterclass_id"].eq(40), 15, 7))
+def _clave_cache(path: str) -> str:
+    return hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()[:20]
+
+def _rutas_cache(path: str):
+    """(copia .db3, metadatos .json) para path dentro de CACHE_DB_DIR."""
+    base = os.path.join(CACHE_DB_DIR, _clave_cache(path))
+    return base + ".db3", base + ".json"
+
+def _tmp_en_cache(destino: str) -> str:
+    """Archivo temporal único junto a destino (dos corridas a la vez no se pisan)."""
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(destino) + ".", suffix=".tmp", dir=CACHE_DB_DIR)
+    os.close(fd)
+    return tmp
+
+def _copiar(origen: str, conn: sqlite3.Connection, cancelar: Optional[TokenCancelacion]) -> None:
+    """
+    Copia origen en conn con el backup de SQLite, no byte a byte: incluye lo
+    confirmado que sigue en el -wal y es consistente aunque se escriba mientras.
+    """
+    progreso = None if cancelar is None else (lambda *_: cancelar.verificar())
+    with closing(conectar_solo_lectura(origen, inmutable=es_archivo_estatico(origen))) as src:
+        src.backup(conn, pages=PAGINAS_COPIA, progress=progreso)
+
+def preparar_db(path: str, cancelar: Optional[TokenCancelacion] = None) -> str:
+    """
+    Copia path al cache local y crea un índice cubriente sobre counters
+    (counterclass_id, serialnumber, readdate, readvalue, model). Devuelve la ruta de la copia.
+    La copia queda asociada a ruta+tamaño+mtime del origen y de su -wal (la firma se
+    toma antes de copiar: un commit a mitad de la copia la deja vencida, no al revés).
+    - cancelar: se consulta entre pasos del backup y durante el CREATE INDEX;
+      al cancelar no queda ningún temporal.
+    """
+    firma = _firma_origen(path)
+    copia, meta = _rutas_cache(path)
+    os.makedirs(CACHE_DB_DIR, exist_ok=True)
 
-    # CLASE (40 + modelo especial -> 20; 40 -> 10; resto mantiene)
-    df["CLASE"] = np.where(
+    tmp = _tmp_en_cache(copia)
+    try:
+        with closing(sqlite3.connect(tmp)) as conn:
+            if cancelar is not None:
+                cancelar.instalar_en_sqlite(conn)
+            try:
+                _copiar(path, conn, cancelar)
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {INDICE_CUBRIENTE} "
+                    "ON counters(counterclass_id, serialnumber, readdate, readvalue, model)"
+                )
+                conn.execute("ANALYZE")
+                conn.commit()
+            except Exception as e:
+                if cancelar is None:
+                    raise
+                err = cancelar.convertir_error(e)
+                if err is e:
+                    raise
+                raise err from e
+        os.replace(tmp, copia)
+
+        tmp = _tmp_en_cache(meta)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(firma, f)
+        os.replace(tmp, meta)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return copia
+
+def fue_preparada(path: str) -> bool:
+    """True si path se preparó alguna vez (aunque la copia ya no esté vigente)."""
+    return os.path.isfile(_rutas_cache(path)[1])
+
+def ruta_preparada(path: str) -> Optional[str]:
+    """
+    Devuelve la copia indexada de path si existe y sigue vigente (mismo tamaño y mtime
+    del origen y de su -wal); si no, None. No copia nada: reconstruir es un paso aparte (preparar_db).
+    """
+    copia, meta = _rutas_cache(path)
+    try:
+        with open(meta, "r", encoding="utf-8") as f:
+            guardada = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if guardada == _firma_origen(path) and os.path.isfile(copia):
+        return copia
+    return None
+
+# -------------------- modo incremental (high-water mark por DB) --------------------
+
+_COLS_CRUDAS = ["rid", "serialnumber", "readdate", "readvalue", "model", "counterclass_id"]
+
+def _ruta_estado(path: str) -> str:
+    return os.path.join(ESTADO_DIR, _clave_cache(path) + ".json")
+
+def _cargar_estado(path: str) -> Optional[dict]:
+    try:
+        with open(_ruta_estado(path), "r", encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if estado.get("version") != ESTADO_VERSION or estado.get("origen") != os.path.abspath(path):
+        return None
+    return estado
+
+def _guardar_estado(path: str, estado: dict) -> None:
+    os.makedirs(ESTADO_DIR, exist_ok=True)
+    destino = _ruta_estado(path)
+    with open(destino + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(destino + ".tmp", destino)
+
+def _huella_fila(conn: sqlite3.Connection, rowid: int) -> Optional[list]:
+    fila = conn.execute("SELECT serialnumber, readdate FROM counters WHERE rowid = ?", (rowid,)).fetchone()
+    return list(fila) if fila else None
+
+def _estado_reutilizable(conn: sqlite3.Connection, estado: Optional[dict], limite: Optional[str], ultimo: int) -> bool:
+    """
+    El estado sirve si la DB solo creció (misma fila en el high-water mark) y si el
+    filtro de fecha guardado deja pasar lo mismo que el nuevo sobre las filas ya vistas.
+    """
+    if not estado or ultimo < estado["rowid"]:
+        return False
+    if estado["rowid"] and _huella_fila(conn, estado["rowid"]) != estado["huella"]:
+        return False
+    if estado["limite"] == limite:
+        return True
+    # Con límites distintos: válido solo si ningún límite recortó filas ya vistas.
+    max_fecha = estado["max_fecha"]
+    return (
+        estado["limite"] is not None and limite is not None
+        and (max_fecha is None or (max_fecha < estado["limite"] and max_fecha < limite))
+    )
+
+def _reducir_crudas(df: pd.DataFrame) -> pd.DataFrame:
+    """Equivalente pandas de _sql_reducida sobre filas crudas (readdate como texto)."""
+    df = df.sort_values("rid", kind="stable")
+    clase = np.where(
         df["counterclass_id"].eq(40) & df["model"].isin(MODELOS_ESPECIALES),
-        "20",
-        np.where(df["counterclass_id"].eq(40), "10", df["counterclass_id"].astype(str)),
+        20,
+        np.where(df["counterclass_id"].eq(40), 10, df["counterclass_id"]),
     )
+    fecha = df["readdate"].fillna("")  # MAX de SQLite ignora NULL; "" queda por debajo de toda fecha
+    maxima = fecha.groupby([df["serialnumber"], clase], dropna=False).transform("max")
+    return df[fecha.eq(maxima)]
 
-    # Renombrar a finales
-    df = df.rename(columns={
-        "serialnumber": "SERIE",
-        "readdate":     "FECHA",
-        "model":        "MODELO",
-        "readvalue":    "CONTADOR",
+def _leer_incremental(conn: sqlite3.Connection, path: str, fecha_maxima: Optional[str]) -> pd.DataFrame:
+    """
+    Devuelve la última lectura por SERIE+CLASE (como reducir_en_sql) leyendo de SQLite
+    solo las filas con rowid mayor al guardado en la corrida anterior para path.
+    Si las filas a leer tienen readdate fuera de 'YYYY-MM-DD HH:MM:SS', lee todo sin
+    reducir ni guardar estado (ver ejecutar_consulta).
+    Supone counters de solo agregado (PrinterMonitorClient sólo inserta): el estado
+    detecta una tabla recreada o truncada (cambia la fila del high-water mark), pero
+    un UPDATE o DELETE de filas ya vistas no se vuelve a leer. Si una DB puede
+    editarse en el lugar, no usar incremental con ella.
+    """
+    limite = _fecha_param(fecha_maxima) if fecha_maxima else None
+    ultimo = conn.execute("SELECT MAX(rowid) FROM counters").fetchone()[0] or 0
+    estado = _cargar_estado(path)
+    clases = " AND counterclass_id IN (40,10,20)"
+    reutilizable = _estado_reutilizable(conn, estado, limite, ultimo)
+    if not fechas_iso_estrictas(conn, estado["rowid"] if reutilizable else 0):
+        return ejecutar_consulta(conn, fecha_maxima)
+
+    params: tuple = tuple(sorted(MODELOS_ESPECIALES)) + ((limite,) if limite else ())
+    if reutilizable:
+        desde = estado["rowid"]
+        query = _sql_reducida(bool(limite), desde_rowid=True, con_rid=True)
+        nuevas = pd.read_sql(query, conn, params=params + (desde,))
+        previas = pd.DataFrame(estado["filas"], columns=_COLS_CRUDAS)
+        crudas = _reducir_crudas(pd.concat([previas, nuevas], ignore_index=True)) if len(nuevas) else previas
+        (max_nueva,) = conn.execute(
+            f"SELECT MAX(readdate) FROM counters WHERE rowid > ?{clases}", (desde,)
+        ).fetchone()
+        max_fecha = max((f for f in (estado["max_fecha"], max_nueva) if f is not None), default=None)
+    else:
+        crudas = pd.read_sql(_sql_reducida(bool(limite), con_rid=True), conn, params=params)
+        (max_fecha,) = conn.execute(f"SELECT MAX(readdate) FROM counters WHERE 1{clases}").fetchone()
+
+    _guardar_estado(path, {
+        "version": ESTADO_VERSION,
+        "origen": os.path.abspath(path),
+        "rowid": ultimo,
+        "huella": _huella_fila(conn, ultimo) if ultimo else None,
+        "limite": limite,
+        "max_fecha": max_fecha,
+        "filas": crudas[_COLS_CRUDAS].astype(object).where(crudas[_COLS_CRUDAS].notna(), None).values.tolist(),
     })
 
-    # Ordenar por fecha (más reciente primero) y formatear
-    df["FECHA"] = pd.to_datetime(df["FECHA"], errors="coerce")
-    df = df.sort_values("FECHA", ascending=False)
-    df["FECHA"] = df["FECHA"].dt.strftime("%d/%m/%Y")
+    df = crudas.drop(columns="rid").reset_index(drop=True)
+    df["readdate"] = pd.to_datetime(df["readdate"], errors="coerce")
+    return df
+
+# -------------------- lectura de múltiples DB --------------------
 
-    # Quedarnos con columnas de trabajo
-    df = df[["SERIE", "FECHA", "TIPO", "CLASE", "CONTADOR"]]
+def _leer_db(
+    path: str,
+    fecha_maxima: Optional[str],
+    reducir_en_sql: bool = False,
+    incremental: bool = False,
+    snapshot: bool = False,
+    cancelar: Optional[TokenCancelacion] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Lee una DB completa (o su copia indexada, si existe); devuelve None si no trae filas.
+    - cancelar: interrumpe la consulta SQLite en curso (set_progress_handler).
+    """
+    if cancelar is not None:
+        cancelar.verificar()
+    usar_snapshot = snapshot and not (incremental or reducir_en_sql)
+    if usar_snapshot:
+        huella = huella_archivo(path)
+        limite = _fecha_param(fecha_maxima) if fecha_maxima else None
+        with medir("lectura.snapshot"):
+            df = leer_snapshot(path, huella, limite)
+        if df is not None:
+            return None if df.empty else df
 
-    # Deduplicar por SERIE+CLASE (conserva la más reciente por el sort previo)
-    df = df.drop_duplicates(subset=["SERIE", "CLASE"], keep="first")
+    copia = ruta_preparada(path)
+    with closing(conectar_db(copia or path, inmutable=bool(copia) or es_archivo_estatico(path))) as conn:
+        if not verificar_estructura(conn):
+            raise RuntimeError(f"Estructura inesperada en DB: {path}")
+        if cancelar is not None:
+            cancelar.instalar_en_sqlite(conn)
+        try:
+            if incremental:
+                with medir("lectura.incremental"):
+                    df = _leer_incremental(conn, path, fecha_maxima)
+            elif usar_snapshot and construir_snapshot(conn, path, huella):
+                with medir("lectura.snapshot"):
+                    df = leer_snapshot(path, huella, limite)
+            else:
+                df = ejecutar_consulta(conn, fecha_maxima, reducir_en_sql=reducir_en_sql)
+        except Exception as e:
+            if cancelar is None:
+                raise
+            err = cancelar.convertir_error(e)
+            if err is e:
+                raise
+            raise err from e
+    if df is None or df.empty:
+        return None
+    return df
+
+def leer_dbs(
+    archivos_db: List[str],
+    fecha_maxima: Optional[str],
+    workers: Optional[int] = 1,
+    reducir_en_sql: bool = False,
+    incremental: bool = False,
+    snapshot: bool = False,
+    progreso: Optional[Progreso] = None,
+    cancelar: Optional[TokenCancelacion] = None,
+) -> List[pd.DataFrame]:
+    """
+    Lee todas las DB y devuelve sus DataFrames en el MISMO orden que archivos_db.
+    - workers=1: lectura secuencial (comportamiento original).
+    - workers>1 / None: pool de hilos acotado (None -> MAX_WORKERS_LECTURA).
+      sqlite3 libera el GIL durante la consulta, así que los hilos solapan I/O.
+    Cada resultado se ubica en su posición apenas termina; el orden final no
+    depende de cuál termine primero, por lo que el CSV es idéntico al secuencial.
+    Si una DB falla, se cortan las lecturas en curso de las otras (token derivado,
+    el de la UI no se toca) y se relanza el error original.
+    - incremental: ver _leer_incremental (implica la reducción por SERIE+CLASE).
+    - snapshot: lee del cache columnar (Snapshot_counters) si el archivo no cambió;
+      solo aplica a la lectura completa (sin reducir_en_sql ni incremental).
+    - progreso(ETAPA_LECTURA, archivos_leidos, total) tras cada DB; cancelar corta
+      la lectura en curso y descarta las pendientes (ProcesoCancelado).
+    """
+    if workers is None:
+        workers = MAX_WORKERS_LECTURA
+    workers = max(1, min(workers, len(archivos_db)))
+    total = len(archivos_db)
+    avisar(progreso, ETAPA_LECTURA, 0, total, cancelar)
+
+    if workers == 1:
+        resultados = []
+        for i, path in enumerate(archivos_db, start=1):
+            resultados.append(_leer_db(path, fecha_maxima, reducir_en_sql, incremental, snapshot, cancelar))
+            avisar(progreso, ETAPA_LECTURA, i, total, cancelar)
+        return [df for df in resultados if df is not None]
+
+    slots: List[Optional[pd.DataFrame]] = [None] * len(archivos_db)
+    hermanos = cancelar.derivado() if cancelar is not None else TokenCancelacion()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db3") as pool:
+        futuros = {
+            pool.submit(_leer_db, path, fecha_maxima, reducir_en_sql, incremental, snapshot, hermanos): i
+            for i, path in enumerate(archivos_db)
+        }
+        try:
+            for hechos, fut in enumerate(as_completed(futuros), start=1):
+                slots[futuros[fut]] = fut.result()
+                avisar(progreso, ETAPA_LECTURA, hechos, total, cancelar)
+        except BaseException:
+            hermanos.cancelar()  # interrumpe las consultas de los otros hilos, no al token de la UI
+            for fut in futuros:
+                fut.cancel()
+            raise
+    return [df for df in slots if df is not None]
+
+# -------------------- fechas como día int64 --------------------
+
+# Día nulo (NaT): mismo valor que NaT visto como int64
+DIA_NULO = np.iinfo(np.int64).min
+
+def a_dias(fechas: pd.Series) -> np.ndarray:
+    """datetime64 -> días desde 1970-01-01 (int64); NaT -> DIA_NULO."""
+    return fechas.to_numpy().astype("datetime64[D]").view(np.int64)
+
+def clave_orden_texto(dias: np.ndarray) -> np.ndarray:
+    """
+    Clave int64 que ordena igual que el texto 'DD/MM/YYYY' (día, luego mes, luego año),
+    con los nulos al final como NaN en sort_values. Días iguales <=> claves iguales.
+    """
+    d = dias.view("datetime64[D]")
+    meses = d.astype("datetime64[M]")
+    dia = (d - meses).astype(np.int64) + 1
+    mes = meses.astype(np.int64) % 12 + 1
+    anio = d.astype("datetime64[Y]").astype(np.int64) + 1970
+    return np.where(dias == DIA_NULO, np.iinfo(np.int64).max, dia * 10**6 + mes * 10**4 + anio)
+
+def formatear_dias(dias: np.ndarray) -> pd.Categorical:
+    """
+    Formatea días int64 a 'DD/MM/YYYY' una sola vez por valor distinto (categórica;
+    nulo -> vacío en el CSV). Pocas fechas distintas => costo casi nulo por fila.
+    """
+    unicos, codigos = np.unique(dias, return_inverse=True)
+    validos = unicos != DIA_NULO
+    iso = np.datetime_as_string(unicos[validos].view("datetime64[D]"), unit="D")
+    textos = [f"{t[8:10]}/{t[5:7]}/{t[:4]}" for t in iso]
+    # los nulos (si hay) son el menor valor => primer único; se remapean a -1
+    if not validos.all():
+        codigos = codigos.astype(np.int64) - 1
+    return pd.Categorical.from_codes(codigos.reshape(-1), categories=textos)
+
+# -------------------- reglas TIPO/CLASE + última lectura --------------------
+
+def deduplicar_lecturas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica reglas TIPO/CLASE sobre las lecturas crudas y deja la más reciente por
+    SERIE+CLASE. Devuelve columnas: SERIE, FECHA, TIPO, CLASE, CONTADOR.
+    FECHA queda como día int64 (ver a_dias); el texto DD/MM/YYYY se arma al exportar.
+    """
+    # ----- Transformaciones base -----
+    with medir("deduplicacion.reglas"):
+        # TIPO: 40 -> 15; otros -> 7
+        df.insert(df.columns.get_loc("readvalue"), "TIPO", np.where(df["counterclass_id"].eq(40), 15, 7))
+
+        # CLASE (40 + modelo especial -> 20; 40 -> 10; resto mantiene)
+        df["CLASE"] = np.where(
+            df["counterclass_id"].eq(40) & df["model"].isin(MODELOS_ESPECIALES),
+            "20",
+            np.where(df["counterclass_id"].eq(40), "10", df["counterclass_id"].astype(str)),
+        )
+
+        # Renombrar a finales
+        df = df.rename(columns={
+            "serialnumber": "SERIE",
+            "readdate":     "FECHA",
+            "model":        "MODELO",
+            "readvalue":    "CONTADOR",
+        })
+
+    # Ordenar por fecha (más reciente primero); read_sql/snapshot ya entregan datetime64
+    with medir("deduplicacion.sort"):
+        if not pd.api.types.is_datetime64_any_dtype(df["FECHA"]):
+            df["FECHA"] = pd.to_datetime(df["FECHA"], errors="coerce")
+        df = df.sort_values("FECHA", ascending=False, kind="stable")
+        df["FECHA"] = a_dias(df["FECHA"])
+
+        # Quedarnos con columnas de trabajo
+        df = df[["SERIE", "FECHA", "TIPO", "CLASE", "CONTADOR"]]
+
+    # Deduplicar por SERIE+CLASE (conserva la más reciente por el sort previo;
+    # el sort es estable: ante empates de fecha gana la primera fila leída)
+    with medir("deduplicacion.drop_duplicates"):
+        return df.drop_duplicates(subset=["SERIE", "CLASE"], keep="first")
+
+# -------------------- formato ANCHO (CONTADOR_10 / CONTADOR_20) --------------------
+
+def formato_ancho_merge(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versión original (dos copias filtradas + merge outer). Se conserva como
+    referencia de formato_ancho y para el benchmark. Trabaja con FECHA como texto,
+    igual que antes: claves del merge y orden final sobre 'DD/MM/YYYY'.
+    """
+    df = df.assign(FECHA=np.asarray(formatear_dias(df["FECHA"].to_numpy()), dtype=object))
 
-    # ---------- Formato ANCHO (dos columnas para 10 y 20) ----------
     # Lado "10": incluye CLASE 10 y también CLASE 20 con TIPO 15 (herencia de total=40→20)
     df10 = df[(df["CLASE"] == "10") | ((df["CLASE"] == "20") & (df["TIPO"] == 15))].copy()
     df10 = df10.rename(columns={"CLASE": "CLASE_10", "CONTADOR": "CONTADOR_10"})
@@ -152,14 +562,189 @@ def procesar_db_a_csv(
     merged["CONTADOR_10"] = merged["CONTADOR_10"].fillna(0).astype(int)
     merged["CONTADOR_20"] = merged["CONTADOR_20"].fillna(0).astype(int)
 
+    return merged.sort_values(["SERIE", "FECHA", "TIPO"])
+
+def formato_ancho(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pivot en una pasada sobre las lecturas deduplicadas (una fila por SERIE+CLASE).
+    Mismo resultado que formato_ancho_merge sin copias intermedias ni hash join:
+    por SERIE se ubican su fila CLASE 10 (a) y CLASE 20 (b) y se arman las filas
+    que generaría el merge por SERIE + FECHA + TIPO:
+      - a: CONTADOR_10 = a; si b coincide en FECHA y TIPO, CONTADOR_20 = b.
+      - b: se emite si es TIPO 15 (herencia 40→20: CLASE_10 = "20", CONTADOR_10 = b)
+           o si no coincidió con a (CLASE_10 vacío, CONTADOR_10 = 0).
+    """
+    n = len(df)
+    pos = np.arange(n)
+    # Códigos ordenados (NaN al final): sirven de claves del sort final sin comparar strings
+    serie, _ = pd.factorize(df["SERIE"], sort=True, use_na_sentinel=False)
+    fecha = clave_orden_texto(df["FECHA"].to_numpy())  # orden de texto DD/MM/YYYY; nulo == nulo
+    tipo = df["TIPO"].to_numpy()
+    valor = df["CONTADOR"].to_numpy()
+    es10 = (df["CLASE"] == "10").to_numpy()
+
+    n_series = serie.max() + 1 if n else 0
+    ia = np.full(n_series, -1)
+    ib = np.full(n_series, -1)
+    ia[serie[es10]] = pos[es10]
+    ib[serie[~es10]] = pos[~es10]
+
+    coincide = np.zeros(n_series, dtype=bool)
+    ambos = (ia >= 0) & (ib >= 0)
+    a, b = ia[ambos], ib[ambos]
+    coincide[ambos] = (fecha[a] == fecha[b]) & (tipo[a] == tipo[b])
+
+    # Filas originadas en a (CLASE 10)
+    s_a = np.flatnonzero(ia >= 0)
+    src_a = ia[s_a]
+    m_a = coincide[s_a]
+    c20_a = np.where(m_a, valor[np.maximum(ib[s_a], 0)], np.nan)
+
+    # Filas originadas en b (CLASE 20)
+    s_b = np.flatnonzero(ib >= 0)
+    src_b = ib[s_b]
+    t15 = tipo[src_b] == 15
+    emitir = t15 | ~coincide[s_b]
+    src_b, t15 = src_b[emitir], t15[emitir]
+
+    # Orden final = sort_values(["SERIE", "FECHA", "TIPO"]) estable; los empates quedan
+    # en el orden de df, igual que en el merge.
+    src = np.concatenate([src_a, src_b])
+    orden = np.lexsort((src, tipo[src], fecha[src], serie[src]))
+    src = src[orden]
+
+    # CLASE_* como categóricas ("10"/"20"/vacío): evita materializar strings por fila
+    clase_10 = np.concatenate([np.zeros(len(src_a), dtype=np.int8), np.where(t15, 1, -1).astype(np.int8)])[orden]
+    clase_20 = np.concatenate([np.where(m_a, 1, -1).astype(np.int8), np.ones(len(src_b), dtype=np.int8)])[orden]
+    cont_10 = np.concatenate([valor[src_a], np.where(t15, valor[src_b], np.nan)])[orden]
+    cont_20 = np.concatenate([c20_a, valor[src_b]])[orden]
+
+    out = df[["SERIE", "FECHA", "TIPO"]].take(src).reset_index(drop=True)
+    out["CLASE_10"] = pd.Categorical.from_codes(clase_10, categories=["10", "20"])
+    out["CONTADOR_10"] = pd.Series(cont_10).fillna(0).astype(int)
+    out["CLASE_20"] = pd.Categorical.from_codes(clase_20, categories=["10", "20"])
+    out["CONTADOR_20"] = pd.Series(cont_20).fillna(0).astype(int)
+    return out
+
+def comparar_reduccion_sql(archivos_db: List[str], fecha_maxima: Optional[str]) -> bool:
+    """
+    Chequeo de equivalencia: True si la reducción en SQLite produce las mismas
+    lecturas deduplicadas que el camino pandas completo sobre las mismas DB.
+    """
+    completos = leer_dbs(archivos_db, fecha_maxima)
+    reducidos = leer_dbs(archivos_db, fecha_maxima, reducir_en_sql=True)
+    if not completos or not reducidos:
+        return not completos and not reducidos
+    a = deduplicar_lecturas(pd.concat(completos, ignore_index=True)).reset_index(drop=True)
+    b = deduplicar_lecturas(pd.concat(reducidos, ignore_index=True)).reset_index(drop=True)
+    return a.equals(b)
+
+# -------------------- flujo principal DB -> CSV --------------------
+
+@en_corrida("AutoCSV")
+def procesar_db_a_csv(
+    archivos_db: List[str],
+    fecha_maxima: Optional[str],
+    nombre_base_salida: str,
+    carpeta_salida: Optional[str] = None,
+    workers: Optional[int] = 1,
+    reducir_en_sql: bool = False,
+    preparar: bool = False,
+    incremental: bool = False,
+    snapshot: bool = False,
+    progreso: Optional[Progreso] = None,
+    cancelar: Optional[TokenCancelacion] = None,
+) -> str:
+    """
+    Une lecturas desde múltiples DB SQLite, aplica reglas TIPO/CLASE y exporta
+    CSV en formato ANCHO (columnas para 10 y 20): 
+      SERIE, FECHA, TIPO, CLASE_10, CONTADOR_10, CLASE_20, CONTADOR_20
+    (UTF-8 sin BOM, CRLF).
+    - workers: hilos de lectura (1 = secuencial; None = automático). Ver leer_dbs.
+    - reducir_en_sql: SQLite entrega solo la última lectura por SERIE+CLASE.
+    - preparar: antes de leer, crea/actualiza copias locales indexadas (preparar_db).
+      Las DB preparadas en corridas anteriores se usan (y, si el origen cambió, se
+      reconstruyen en ese mismo paso previo) aunque preparar=False.
+    - incremental: guarda por DB el último rowid leído y su reducción SERIE+CLASE;
+      las corridas siguientes solo leen filas nuevas y las combinan con ese estado.
+      Sólo para DB de solo agregado: ediciones de filas ya leídas no se ven (ver
+      _leer_incremental).
+    - snapshot: reutiliza el cache columnar memory-mapped de cada DB (Snapshot_counters).
+    - progreso(etapa, hecho, total): etapas de Progreso.ETAPAS (lectura por DB, conteo,
+      deduplicación, pivot y escritura por bloque). Se llama desde el hilo que procesa.
+    - cancelar: TokenCancelacion; al cancelar se lanza ProcesoCancelado lo antes posible
+      (también a mitad de una consulta SQLite) y no queda un CSV a medio escribir.
+    """
+    if not archivos_db:
+        raise ValueError("Se requiere al menos un archivo de base de datos.")
+    if fecha_maxima and not validar_fecha_ddmmyyyy(fecha_maxima):
+        raise ValueError("fecha_maxima inválida; use DD/MM/YYYY.")
+    if not nombre_base_salida:
+        raise ValueError("nombre_base_salida no puede ser vacío.")
+
+    pendientes = [p for p in archivos_db if ruta_preparada(p) is None and (preparar or fue_preparada(p))]
+    if pendientes:
+        with medir("preparar"):
+            for path in pendientes:
+                preparar_db(path, cancelar)
+
+    # Leer y unir
+    with medir("lectura"):
+        dfs = leer_dbs(
+            archivos_db, fecha_maxima, workers=workers,
+            reducir_en_sql=reducir_en_sql, incremental=incremental, snapshot=snapshot,
+            progreso=progreso, cancelar=cancelar,
+        )
+
+    if not dfs:
+        raise RuntimeError("No se obtuvieron datos de las bases proporcionadas.")
+
+    filas = sum(len(d) for d in dfs)
+    avisar(progreso, ETAPA_CONTEO, 0, filas, cancelar)
+    with medir("concat"):
+        df = pd.concat(dfs, ignore_index=True)
+    del dfs
+    avisar(progreso, ETAPA_CONTEO, filas, filas, cancelar)
+
+    avisar(progreso, ETAPA_DEDUP, 0, filas, cancelar)
+    with medir("deduplicacion"):
+        df = deduplicar_lecturas(df)
+    avisar(progreso, ETAPA_DEDUP, filas, filas, cancelar)
+
+    # ---------- Formato ANCHO (dos columnas para 10 y 20) ----------
+    avisar(progreso, ETAPA_PIVOT, 0, len(df), cancelar)
+    with medir("pivot"):
+        out = formato_ancho(df)
+    del df
+    avisar(progreso, ETAPA_PIVOT, len(out), len(out), cancelar)
+
     # ----- Exportación -----
     base_folder = carpeta_salida or os.path.dirname(archivos_db[0]) or os.getcwd()
     os.makedirs(base_folder, exist_ok=True)
     nombre_archivo = f"{nombre_base_salida}_{os.path.basename(base_folder) or 'root'}_AutoCSV.csv"
     file_path = os.path.join(base_folder, nombre_archivo)
 
-    # Ordenar por SERIE y exportar (UTF-8 sin BOM, CRLF)
-    out = merged.sort_values(["SERIE", "FECHA", "TIPO"])
-    out.to_csv(file_path, sep=";", index=False, encoding="utf-8", lineterminator="\r\n")
+    # Exportar por bloques (UTF-8 sin BOM, CRLF); formato_ancho ya ordena por SERIE, FECHA, TIPO.
+    # FECHA se formatea bloque a bloque: la columna de texto nunca está completa en memoria.
+    def _fechas_texto(bloque: pd.DataFrame) -> pd.DataFrame:
+        with medir("escritura.fechas"):
+            return bloque.assign(FECHA=formatear_dias(bloque["FECHA"].to_numpy()))
+
+    def _bloque_escrito(hechas: int, total: int) -> None:
+        avisar(progreso, ETAPA_ESCRITURA, hechas, total, cancelar)
+
+    avisar(progreso, ETAPA_ESCRITURA, 0, len(out), cancelar)
+    try:
+        with medir("escritura"):
+            escribir_csv_por_bloques(
+                out, file_path, sep=";", encoding="utf-8", lineterminator=FIN_LINEA_AUTOCSV,
+                transformar=_fechas_texto, al_escribir_bloque=_bloque_escrito,
+            )
+    except ProcesoCancelado:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        raise
 
     return file_path
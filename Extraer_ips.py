@@ -7,18 +7,74 @@ extrae IPv4 de counters.ip (o similares), deduplica por /24 (primeros 3 octetos)
 y guarda los rangos A.B.C.1-A.B.C.254 en UNA sola línea separada por comas.
 
 Ahora pregunta dónde guardar el archivo de salida (GUI y fallback por consola).
+Modo carpeta / patrones (scan_ip_ranges, o por consola con argumentos): saltea
+copias idénticas y reutiliza los /24 de archivos ya vistos (cache por huella).
+Texto / logs (generate_ip_ranges_from_text, o --txt): busca IPv4 en archivos de
+cualquier tamaño leyéndolos por bloques, con memoria constante.
 """
 
 import sys
 import os
+import re
+import codecs
 import glob
+import json
+import hashlib
 import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import closing
-from typing import Iterable, List, Set, Optional, Tuple
+from typing import Callable, Iterable, List, Set, Optional, Tuple
 import ipaddress
 
+from Sqlite_lectura import conectar_solo_lectura, es_archivo_estatico, firma_wal
+from Instrumentacion import corrida, medir
+
 DEFAULT_OUTPUT_FILENAME = "direcciones de ip.txt"
 CANDIDATE_IP_COLUMNS = {"ip", "ip_address", "direccion_ip", "ip_addr"}
+# Filas por fetchmany al leer la columna IP: la memoria queda acotada a un lote
+FETCH_BATCH = 20_000
+# Tope de hilos para detectar/extraer varios archivos a la vez (workers=None)
+MAX_WORKERS_IPS = min(8, os.cpu_count() or 1)
+
+# Huella barata de contenido: tamaño + primeros/últimos HUELLA_BYTES. En una DB
+# SQLite en modo rollback la cabecera incluye el contador de cambios, que sube en
+# cada transacción, así que una copia modificada cambia de huella aunque no de
+# tamaño. En modo WAL los commits quedan en '<db>-wal' hasta el checkpoint sin
+# tocar el archivo principal: por eso la huella suma tamaño y mtime del -wal.
+HUELLA_BYTES = 64 * 1024
+# Cache de /24 por huella (%LOCALAPPDATA%\HelpDeskManagerApp\cache\ips)
+IPS_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(),
+                             "HelpDeskManagerApp", "cache", "ips")
+IPS_CACHE_FILE = os.path.join(IPS_CACHE_DIR, "prefijos24.json")
+IPS_CACHE_MAX = 5000      # entradas; se descartan las usadas hace más tiempo
+IPS_CACHE_VERSION = 2     # subir si cambian las reglas de parse_prefix24 o la huella
+
+# Formatos de salida de generate_ip_ranges (todos en una línea separada por comas):
+#   "ranges"        A.B.C.1-A.B.C.254 por cada /24 (el de siempre)
+#   "merged_ranges" /24 contiguas unidas: 10.0.0.1-10.0.3.254
+#   "cidr"          mínimo conjunto de bloques CIDR alineados: 10.0.0.0/22
+OUTPUT_FORMATS = ("ranges", "merged_ranges", "cidr")
+
+# Octeto decimal 0..255 sin ceros a la izquierda y sólo dígitos ASCII: las mismas
+# reglas que ipaddress.IPv4Address (Python >= 3.9.5) aplica a cada octeto.
+_OCTETO = r"(25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+_IPV4_RE = re.compile(r"\.".join([_OCTETO] * 4))
+
+# Texto / logs: bloques de lectura y regex sobre bytes. Una IP en texto es una
+# corrida máxima de [0-9.] que es A.B.C.D (mismas reglas de octeto que
+# parse_prefix24) rodeada a lo sumo de puntos ("Connecting...10.0.0.1."): así
+# "10.0.0.1:9100" o "ip=10.0.0.1," cuentan y "1.2.3.4.5" (versiones, OIDs) no.
+# Tampoco cuenta una IP pegada a una letra ("v1.2.3.4", "build10.0.0.1").
+TEXT_CHUNK = 1024 * 1024
+_OCTETO_B = _OCTETO.encode("ascii")
+# corridas máximas que podrían ser una IP ("0.0.0.0"), con la letra que las precede
+_CORRIDA_RE = re.compile(rb"[A-Za-z]?[0-9.]{7,}")
+_CORRIDA_Q_PUNTOS_RE = re.compile(rb"\.".join([_OCTETO_B] * 4) + rb"\.*")
+_VISTAS_MAX = 200_000  # corridas ya validadas que se recuerdan entre bloques (luego se vacía)
+_CORRIDA_MAX = 32                   # una corrida pendiente más larga se resume (memoria constante)
+_CORRIDA_INVALIDA = b"0.0.0.0.0"    # sigue inválida se le agregue lo que se le agregue
 
 
 def select_files_gui(parent=None) -> List[str]:
@@ -47,6 +103,31 @@ def select_files_gui(parent=None) -> List[str]:
         return []
 
 
+def select_text_files_gui(parent=None) -> List[str]:
+    """Como select_files_gui, para archivos de texto / logs."""
+    try:
+        import tkinter as tk
+        from tkinter import filedialog
+        tmp_root = None
+        if parent is None:
+            tmp_root = tk.Tk()
+            tmp_root.withdraw()
+            parent = tmp_root
+        paths = filedialog.askopenfilenames(
+            parent=parent,
+            title="Selecciona uno o más archivos de texto / logs",
+            filetypes=[
+                ("Texto y logs", ("*.txt", "*.log", "*.csv", "*.log.*")),
+                ("Todos los archivos", "*"),
+            ]
+        )
+        if tmp_root is not None:
+            tmp_root.destroy()
+        return list(paths)
+    except Exception:
+        return []
+
+
 def ask_paths_stdin() -> List[str]:
     """Permite ingresar rutas o patrones (wildcards). Soporta ; , o espacio como separadores."""
     print("Ingresá rutas o patrones (wildcards) separados por ';' o ',' y presioná Enter:")
@@ -54,11 +135,44 @@ def ask_paths_stdin() -> List[str]:
     raw = input("> ").strip()
     sep = ';' if ';' in raw else (',' if ',' in raw else ' ')
     tokens = [p.strip().strip('"') for p in raw.split(sep) if p.strip()]
-    # Expandir comodines (glob)
+    # Expandir comodines (glob) y carpetas
+    return expand_paths(tokens)
+
+
+def expand_paths(patterns: Iterable[str], recursive: bool = True) -> List[str]:
+    """
+    Expande una lista de rutas / carpetas / patrones glob a archivos:
+    - carpeta -> todos sus archivos (con recursive, también subcarpetas);
+    - patrón (* ? [..], y ** con recursive) -> sus coincidencias, ordenadas;
+    - cualquier otra cosa se deja tal cual (si no existe, se descarta después).
+    Sin repetir rutas (comparando abspath/normcase) y en el orden de entrada.
+    """
     expanded: List[str] = []
-    for t in tokens:
-        matches = glob.glob(t)
-        expanded.extend(matches if matches else [t])
+    vistos = set()
+
+    def _agregar(p: str):
+        clave = os.path.normcase(os.path.abspath(p))
+        if clave not in vistos:
+            vistos.add(clave)
+            expanded.append(p)
+
+    for t in patterns:
+        if os.path.isdir(t):
+            if recursive:
+                for raiz, dirs, archivos in os.walk(t):
+                    dirs.sort()
+                    for a in sorted(archivos):
+                        _agregar(os.path.join(raiz, a))
+            else:
+                for a in sorted(os.listdir(t)):
+                    if os.path.isfile(os.path.join(t, a)):
+                        _agregar(os.path.join(t, a))
+            continue
+        matches = sorted(glob.glob(t, recursive=recursive))
+        for m in (matches if matches else [t]):
+            if os.path.isdir(m):
+                continue
+            _agregar(m)
     return expanded
 
 
@@ -87,9 +201,8 @@ def is_sqlite_file(path: str) -> bool:
     if looks_like_sqlite_by_header(path):
         return True
     # Fallback: intentar abrir
-    uri = f"file:{os.path.abspath(path)}?mode=ro"
     try:
-        with sqlite3.connect(uri, uri=True, timeout=2) as conn:
+        with closing(conectar_solo_lectura(path, timeout=2)) as conn:
             with closing(conn.cursor()) as cur:
                 cur.execute("PRAGMA schema_version")
                 _ = cur.fetchone()
@@ -117,29 +230,58 @@ def find_ip_column(conn: sqlite3.Connection) -> Optional[str]:
     return None
 
 
-def extract_ips_from_db(db_path: str) -> Iterable[str]:
-    uri = f"file:{os.path.abspath(db_path)}?mode=ro"
-    try:
-        with sqlite3.connect(uri, uri=True) as conn:
-            ip_col = find_ip_column(conn)
-            if not ip_col:
-                print(f"[AVISO] No se encontró columna 'ip' (o similar) en 'counters' en: {db_path}")
-                return []
-            with closing(conn.cursor()) as cur:
+class SinColumnaIP(Exception):
+    """La tabla counters no existe o no tiene una columna de IP reconocible."""
+
+
+def _iter_ips(db_path: str, batch_size: int, distinct: bool) -> Iterable[str]:
+    """Núcleo de extract_ips_from_db: deja pasar los errores (sqlite3.Error / SinColumnaIP)."""
+    with closing(conectar_solo_lectura(db_path, inmutable=es_archivo_estatico(db_path))) as conn:
+        ip_col = find_ip_column(conn)
+        if not ip_col:
+            raise SinColumnaIP(f"No se encontró columna 'ip' (o similar) en 'counters' en: {db_path}")
+        with closing(conn.cursor()) as cur:
+            cur.arraysize = batch_size
+            if distinct:
+                cur.execute(f'SELECT DISTINCT "{ip_col}" FROM counters WHERE "{ip_col}" IS NOT NULL')
+            else:
                 cur.execute(f'SELECT "{ip_col}" FROM counters')
-                for (val,) in cur.fetchall():
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (val,) in rows:
                     if val is not None:
                         yield str(val).strip()
+
+
+def extract_ips_from_db(db_path: str, batch_size: int = FETCH_BATCH,
+                        distinct: bool = False) -> Iterable[str]:
+    """
+    Devuelve (generador) las IPs crudas de counters, leídas de a batch_size filas
+    con fetchmany: nunca se materializa la columna completa.
+    - distinct=True: SELECT DISTINCT dentro de SQLite; a Python llega cada valor
+      distinto una sola vez (una impresora repite su IP en cada lectura). Como la
+      validación sigue siendo parse_ipv4 sobre esos valores, el conjunto de /24
+      resultante es el mismo que recorriendo todas las filas.
+    Los errores se informan por consola y cortan sólo este archivo.
+    """
+    try:
+        yield from _iter_ips(db_path, batch_size, distinct)
+    except SinColumnaIP as e:
+        print(f"[AVISO] {e}")
     except sqlite3.OperationalError as e:
         print(f"[ERROR] No se pudo abrir o consultar {db_path}: {e}")
     except sqlite3.Error as e:
         print(f"[ERROR] SQLite en {db_path}: {e}")
-    return []
 
 
 def parse_ipv4(s: str) -> Optional[ipaddress.IPv4Address]:
     # Acepta valores con “ruido” mínimo (ej. "192.168.1.10 puerto 80" -> toma 192.168.1.10)
-    cand = s.split()[0]
+    partes = s.split(None, 1)
+    if not partes:  # vacío o sólo espacios
+        return None
+    cand = partes[0]
     try:
         ip = ipaddress.ip_address(cand)
         return ip if isinstance(ip, ipaddress.IPv4Address) else None
@@ -147,6 +289,298 @@ def parse_ipv4(s: str) -> Optional[ipaddress.IPv4Address]:
         return None
 
 
+def parse_prefix24(s: str) -> Optional[int]:
+    """
+    Versión rápida de parse_ipv4 que devuelve directamente el /24 como entero de
+    24 bits (A<<16 | B<<8 | C), o None. Acepta y rechaza exactamente lo mismo que
+    parse_ipv4 (ver benchmarks/bench_ipv4.py), sin crear objetos IPv4Address.
+    """
+    m = _IPV4_RE.fullmatch(s)  # caso común: ya viene limpio (sin espacios, split no cambia nada)
+    if m is None:
+        partes = s.split(None, 1)
+        if not partes:
+            return None
+        m = _IPV4_RE.fullmatch(partes[0])
+        if m is None:
+            return None
+    a, b, c, _ = m.groups()
+    return (int(a) << 16) | (int(b) << 8) | int(c)
+
+
+def prefix24_to_str(p: int) -> str:
+    """Entero de 24 bits -> "A.B.C"."""
+    return f"{p >> 16}.{(p >> 8) & 0xFF}.{p & 0xFF}"
+
+
+def merge_prefixes(ordered: Iterable[int]) -> List[Tuple[int, int]]:
+    """/24 (enteros) ya ordenadas -> tramos contiguos [(primera, última)]."""
+    tramos: List[Tuple[int, int]] = []
+    for p in ordered:
+        if tramos and p == tramos[-1][1] + 1:
+            tramos[-1] = (tramos[-1][0], p)
+        else:
+            tramos.append((p, p))
+    return tramos
+
+
+def prefixes_to_cidrs(tramos: Iterable[Tuple[int, int]]) -> List[str]:
+    """
+    Cubre cada tramo de /24 con la menor cantidad de bloques CIDR alineados
+    (lo mismo que ipaddress.collapse_addresses, pero sobre los enteros de 24 bits).
+    """
+    cidrs = []
+    for inicio, fin in tramos:
+        while inicio <= fin:
+            # bloque más grande alineado en inicio que no se pase de fin
+            tam = (inicio & -inicio) if inicio else 1 << 24
+            while tam > fin - inicio + 1:
+                tam >>= 1
+            cidrs.append(f"{prefix24_to_str(inicio)}.0/{24 - (tam.bit_length() - 1)}")
+            inicio += tam
+    return cidrs
+
+
+def format_prefixes(prefixes_24: Iterable[int], output_format: str = "ranges") -> str:
+    """Arma la línea de salida (ver OUTPUT_FORMATS) a partir de las /24 en cualquier orden."""
+    ordered = sorted(prefixes_24)
+    if output_format == "ranges":
+        return ",".join(f"{p}.1-{p}.254" for p in map(prefix24_to_str, ordered))
+    tramos = merge_prefixes(ordered)
+    if output_format == "merged_ranges":
+        return ",".join(f"{prefix24_to_str(a)}.1-{prefix24_to_str(b)}.254" for a, b in tramos)
+    if output_format == "cidr":
+        return ",".join(prefixes_to_cidrs(tramos))
+    raise ValueError(f"Formato de salida desconocido: {output_format!r} (opciones: {', '.join(OUTPUT_FORMATS)})")
+
+
+def add_prefixes_24(raw_ips: Iterable[str], prefixes_24: Set[int]) -> Set[int]:
+    """Agrega a prefixes_24 el /24 (entero, ver parse_prefix24) de cada IPv4 válida de raw_ips."""
+    for raw in raw_ips:
+        p = parse_prefix24(raw)
+        if p is not None:
+            prefixes_24.add(p)
+    return prefixes_24
+
+
+def prefixes_from_file(path: str, batch_size: int = FETCH_BATCH,
+                       distinct: bool = True) -> Tuple[bool, Set[int], Optional[str]]:
+    """
+    Detecta y extrae UN archivo: devuelve (es_sqlite, prefijos /24, error).
+    No lanza: cualquier falla de este archivo vuelve como texto en error, para que
+    un archivo dañado no corte el lote (ver generate_ip_ranges con workers).
+    """
+    with medir("deteccion_sqlite"):
+        if not (is_file(path) and is_sqlite_file(path)):
+            return False, set(), None
+    prefixes_24: Set[int] = set()
+    try:
+        with medir("extraccion"):
+            add_prefixes_24(_iter_ips(path, batch_size, distinct), prefixes_24)
+    except SinColumnaIP as e:
+        return True, prefixes_24, str(e)
+    except sqlite3.Error as e:
+        return True, prefixes_24, f"SQLite en {path}: {e}"
+    except Exception as e:
+        return True, prefixes_24, f"{path}: {e}"
+    return True, prefixes_24, None
+
+
+def _avisar_error_archivo(path: str, error: str) -> None:
+    print(f"[ERROR] {error}")
+
+
+# ---------------------- Texto / logs ----------------------
+
+def _bloques_texto(path: str, chunk_size: int) -> Iterable[bytes]:
+    """
+    Bloques de bytes del archivo. UTF-8 / ANSI pasan tal cual (las IPs son ASCII);
+    con BOM UTF-16 (p. ej. salida redirigida de PowerShell) se decodifica de a
+    bloques con un decoder incremental y se re-codifica a UTF-8.
+    """
+    with open(path, "rb") as f:
+        inicio = f.read(2)
+        if inicio in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            dec = codecs.getincrementaldecoder("utf-16")(errors="replace")
+            bloque = inicio
+            while True:
+                mas = f.read(chunk_size)
+                yield dec.decode(bloque + mas if bloque else mas, final=not mas).encode("utf-8")
+                bloque = b""
+                if not mas:
+                    return
+        yield inicio
+        for bloque in iter(lambda: f.read(chunk_size), b""):
+            yield bloque
+
+
+def _ip_de_corrida(corrida_: bytes) -> Optional[re.Match]:
+    """Match de A.B.C.D en una corrida de _CORRIDA_RE (sin los puntos de los costados), o None."""
+    if corrida_[:1].isalpha():
+        corrida_ = corrida_[1:]
+        if not corrida_.startswith(b"."):
+            return None  # "v1.2.3.4": número de versión, no una IP
+    return _CORRIDA_Q_PUNTOS_RE.fullmatch(corrida_.lstrip(b"."))
+
+
+def _resumir_corrida(pendiente: bytes) -> bytes:
+    """Corrida pendiente equivalente (se le agregue lo que se le agregue) de a lo sumo _CORRIDA_MAX + 2 bytes."""
+    letra = pendiente[:1] if pendiente[:1].isalpha() else b""
+    corrida_ = pendiente[len(letra):]
+    cuerpo = corrida_.lstrip(b".")
+    puntos = b"." if len(cuerpo) < len(corrida_) else b""
+    if _CORRIDA_Q_PUNTOS_RE.fullmatch(cuerpo):
+        # IP + puntos: sigue válida (o inválida) igual con un solo punto al final
+        cuerpo = cuerpo.rstrip(b".") + (b"." if cuerpo.endswith(b".") else b"")
+    elif len(cuerpo) > _CORRIDA_MAX:
+        return _CORRIDA_INVALIDA
+    return letra + puntos + cuerpo
+
+
+def _agregar_prefijos_texto(datos: bytes, prefixes_24: Set[int], vistas: dict) -> None:
+    # En un log la misma IP se repite mucho: se validan sólo las corridas distintas
+    # del bloque que no se vieron en bloques anteriores. findall de [A-Za-z]?[0-9.]{7,}
+    # devuelve corridas máximas (la búsqueda empieza siempre al principio de una
+    # corrida, o en la letra que la precede, y es codiciosa).
+    nuevas = set(_CORRIDA_RE.findall(datos)).difference(vistas)
+    if len(vistas) + len(nuevas) > _VISTAS_MAX:
+        vistas.clear()
+    for corrida_ in nuevas:
+        m = _ip_de_corrida(corrida_)
+        if m is not None:
+            a, b, c, _ = m.groups()
+            p = (int(a) << 16) | (int(b) << 8) | int(c)
+            prefixes_24.add(p)
+            vistas[corrida_] = p
+        else:
+            vistas[corrida_] = None
+
+
+def extract_prefixes_from_text(path: str, prefixes_24: Set[int],
+                               chunk_size: int = TEXT_CHUNK) -> Set[int]:
+    """
+    Agrega a prefixes_24 las /24 de las IPv4 que aparecen en un archivo de texto
+    de cualquier tamaño, leyéndolo de a chunk_size bytes (memoria constante).
+    Para no cortar una IP entre dos bloques, la corrida de [0-9.] del final de
+    cada bloque (con la letra que la precede) se deja pendiente y se antepone al
+    siguiente; si se hace muy larga se resume a algo equivalente (ver
+    _resumir_corrida). Lanza OSError.
+    """
+    pendiente = b""
+    vistas = {}
+    for bloque in _bloques_texto(path, chunk_size):
+        datos = pendiente + bloque
+        corte = len(datos.rstrip(b"0123456789."))
+        if datos[corte - 1:corte].isalpha():
+            corte -= 1
+        _agregar_prefijos_texto(datos[:corte], prefixes_24, vistas)
+        pendiente = datos[corte:]
+        if len(pendiente) > _CORRIDA_MAX:
+            pendiente = _resumir_corrida(pendiente)
+    _agregar_prefijos_texto(pendiente, prefixes_24, vistas)
+    return prefixes_24
+
+
+# ---------------------- Huellas, copias repetidas y cache ----------------------
+
+def file_fingerprint(path: str) -> str:
+    """
+    Huella barata: tamaño + blake2b de los primeros y últimos HUELLA_BYTES, más
+    tamaño y mtime del '-wal' si hay uno no vacío (ver HUELLA_BYTES). Lanza OSError.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f.read(HUELLA_BYTES))
+        if size > HUELLA_BYTES:
+            f.seek(max(HUELLA_BYTES, size - HUELLA_BYTES))
+            h.update(f.read(HUELLA_BYTES))
+    wal = firma_wal(path)
+    if wal is not None:
+        return f"{size}-{h.hexdigest()}-wal{wal[0]}-{wal[1]}"
+    return f"{size}-{h.hexdigest()}"
+
+
+def file_full_hash(path: str, chunk: int = 1024 * 1024) -> str:
+    """blake2b del archivo completo (sólo para desempatar huellas iguales)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(chunk), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def dedup_files(paths: List[str]) -> Tuple[List[Tuple[str, Optional[str]]], List[Tuple[str, str]]]:
+    """
+    Agrupa paths por contenido. Devuelve (únicos, repetidos):
+    - únicos: [(path, clave)], en el orden de entrada. clave es la huella, o
+      huella + hash completo si la huella coincide con la de otro archivo (así dos
+      archivos distintos con la misma huella no comparten entrada de cache); None
+      si el archivo no se pudo leer (se procesa igual, sin cache).
+    - repetidos: [(path, path_igual)] copias byte a byte idénticas que se saltean.
+    El hash completo se calcula sólo para archivos cuya huella coincide con otra,
+    esté o no en cache: las copias se informan igual en todas las corridas.
+    """
+    huellas = {}
+    for p in paths:
+        try:
+            huellas[p] = file_fingerprint(p)
+        except OSError:
+            huellas[p] = None
+
+    por_huella = {}
+    for p in paths:
+        if huellas[p] is not None:
+            por_huella.setdefault(huellas[p], []).append(p)
+
+    contenido = {}  # path -> identidad de contenido confirmada (huella + hash completo)
+    for huella, grupo in por_huella.items():
+        if len(grupo) < 2:
+            continue
+        for p in grupo:
+            try:
+                contenido[p] = f"{huella}-{file_full_hash(p)}"
+            except OSError:
+                pass
+
+    unicos: List[Tuple[str, Optional[str]]] = []
+    repetidos: List[Tuple[str, str]] = []
+    primero = {}
+    for p in paths:
+        c = contenido.get(p)
+        if c is not None and c in primero:
+            repetidos.append((p, primero[c]))
+            continue
+        if c is not None:
+            primero[c] = p
+        unicos.append((p, c if c is not None else huellas[p]))
+    return unicos, repetidos
+
+
+def _cargar_cache_ips() -> dict:
+    try:
+        with open(IPS_CACHE_FILE, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos.get("version") == IPS_CACHE_VERSION:
+            return datos.get("archivos", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _guardar_cache_ips(entradas: dict) -> None:
+    if len(entradas) > IPS_CACHE_MAX:
+        recientes = sorted(entradas.items(), key=lambda kv: kv[1].get("t", 0), reverse=True)
+        entradas = dict(recientes[:IPS_CACHE_MAX])
+    try:
+        os.makedirs(IPS_CACHE_DIR, exist_ok=True)
+        tmp = IPS_CACHE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": IPS_CACHE_VERSION, "archivos": entradas}, f, separators=(",", ":"))
+        os.replace(tmp, IPS_CACHE_FILE)
+    except OSError:
+        pass
+
+
 # ---------------------- Selección de ruta de guardado ----------------------
 
 def ask_save_path_gui(default_filename: str, parent=None) -> str:
@@ -204,11 +638,31 @@ def generate_ip_ranges(paths: Optional[List[str]] = None,
                        save_path: Optional[str] = None,
                        *,
                        parent=None,
-                       gui_only: bool = True) -> Tuple[str, int]:
+                       gui_only: bool = True,
+                       batch_size: int = FETCH_BATCH,
+                       distinct: bool = True,
+                       workers: Optional[int] = None,
+                       on_file_error: Optional[Callable[[str, str], None]] = None,
+                       dedup: bool = False,
+                       use_cache: bool = False,
+                       on_file_skipped: Optional[Callable[[str, str], None]] = None,
+                       output_format: str = "ranges") -> Tuple[str, int]:
     """
     Extrae IPv4 desde DBs SQLite, agrupa por /24 y guarda 'A.B.C.1-A.B.C.254' en una sola línea.
     - parent: widget Tk para que los diálogos sean modales a tu ventana.
     - gui_only=True: no usa input() como fallback; si el usuario cancela, retorna ("", 0).
+    - batch_size: filas por fetchmany al leer cada DB (memoria constante).
+    - distinct=True: deduplica las IPs en SQL antes de validarlas (mismo resultado;
+      False recorre fila por fila, sólo útil para comparar).
+    - workers: hilos que detectan y extraen archivos a la vez (1 = secuencial;
+      None -> MAX_WORKERS_IPS). sqlite3 libera el GIL durante la consulta.
+    - on_file_error(path, mensaje): se llama (en el hilo que llamó a esta función)
+      por cada archivo que falló; el lote sigue con los demás. Por defecto, print.
+    - dedup: saltea copias idénticas (huella barata + hash completo si coincide);
+      on_file_skipped(path, path_igual) por cada una.
+    - use_cache: reutiliza los /24 ya extraídos de un archivo con la misma huella
+      (IPS_CACHE_FILE) y guarda los nuevos.
+    - output_format: "ranges" (por defecto), "merged_ranges" o "cidr"; ver OUTPUT_FORMATS.
     Retorna (out_path, cantidad_de_redes). out_path="" => cancelado.
     """
     # 1) Selección de archivos
@@ -217,51 +671,201 @@ def generate_ip_ranges(paths: Optional[List[str]] = None,
         if not paths:
             return "", 0  # cancelado en GUI
 
-    files = [p for p in paths if is_file(p)]
-    if not files:
-        return "", 0
-
-    sqlite_files = [p for p in files if is_sqlite_file(p)]
-    if not sqlite_files:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida desconocido: {output_format!r} (opciones: {', '.join(OUTPUT_FORMATS)})")
+    if on_file_error is None:
+        on_file_error = _avisar_error_archivo
+
+    with corrida("DireccionesIP") as run:
+        # 2) Huellas: copias repetidas y cache (opcional)
+        cache = _cargar_cache_ips() if use_cache else {}
+        pendientes: List[Tuple[str, Optional[str]]] = [(p, None) for p in paths]
+        if dedup:
+            with medir("huellas"):
+                pendientes, repetidos = dedup_files([p for p in paths if is_file(p)])
+            for p, igual in repetidos:
+                if on_file_skipped is not None:
+                    on_file_skipped(p, igual)
+        elif use_cache:
+            # sin saltear copias, pero con las mismas claves (desempate incluido)
+            with medir("huellas"):
+                unicos, repetidos = dedup_files(paths)
+            claves = dict(unicos)
+            claves.update((p, claves[igual]) for p, igual in repetidos)
+            pendientes = [(p, claves[p]) for p in paths]
+        cache_modificado = False
+
+        # 3) Detectar SQLite y extraer /24 por archivo; se unen los conjuntos
+        prefixes_24: Set[int] = set()
+        sqlite_count = 0
+
+        def _unir(path, clave, resultado):
+            nonlocal sqlite_count, cache_modificado
+            es_sqlite, prefijos, error = resultado
+            sqlite_count += es_sqlite
+            prefixes_24.update(prefijos)
+            if error:
+                on_file_error(path, error)
+            elif use_cache and clave is not None:
+                cache[clave] = {"s": es_sqlite, "p": sorted(prefijos), "t": int(time.time())}
+                cache_modificado = True
+
+        a_extraer = []
+        for p, clave in pendientes:
+            previo = cache.get(clave) if clave is not None else None
+            if previo is not None:
+                previo["t"] = int(time.time())
+                cache_modificado = True
+                sqlite_count += previo["s"]
+                prefixes_24.update(previo["p"])
+            else:
+                a_extraer.append((p, clave))
+
+        if workers is None:
+            workers = MAX_WORKERS_IPS
+        workers = max(1, min(workers, len(a_extraer)))
+        if workers == 1:
+            for p, clave in a_extraer:
+                _unir(p, clave, prefixes_from_file(p, batch_size, distinct))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ips") as pool:
+                futuros = {pool.submit(prefixes_from_file, p, batch_size, distinct): (p, clave)
+                           for p, clave in a_extraer}
+                for fut in as_completed(futuros):
+                    _unir(*futuros[fut], fut.result())
+        if cache_modificado:
+            _guardar_cache_ips(cache)
+        if not sqlite_count:
+            return "", 0
+
+        with medir("ordenar"):
+            ranges_line = format_prefixes(prefixes_24, output_format)
+            count = len(prefixes_24)
+
+        # 4) Guardar
+        out_path = save_path or ask_save_path_gui(DEFAULT_OUTPUT_FILENAME, parent=parent)
+        if not out_path:
+            return "", 0  # canceló el guardado
+        out_dir = os.path.dirname(out_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with medir("escritura"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(ranges_line)
+
+        run.salida = out_path
+        return out_path, count
+
+
+def scan_ip_ranges(patterns: List[str],
+                   save_path: Optional[str] = None,
+                   *,
+                   recursive: bool = True,
+                   **kwargs) -> Tuple[str, int]:
+    """
+    Modo carpeta / patrones: expande patterns (ver expand_paths) y corre
+    generate_ip_ranges salteando copias idénticas y con cache por huella, así
+    que volver a escanear una carpeta sin cambios casi no lee nada.
+    kwargs se pasan a generate_ip_ranges (parent, workers, on_file_error, ...).
+    """
+    paths = expand_paths(patterns, recursive=recursive)
+    if not paths:
         return "", 0
-
-    # 2) Extraer /24
-    prefixes_24: Set[str] = set()
-    for p in sqlite_files:
-        for raw in extract_ips_from_db(p):
-            ip4 = parse_ipv4(raw)
-            if ip4 is None:
-                continue
-            a, b, c, _ = str(ip4).split(".")
-            prefixes_24.add(f"{a}.{b}.{c}")
-
-    if prefixes_24:
-        ordered = sorted(prefixes_24, key=lambda pfx: ipaddress.IPv4Address(pfx + ".0"))
-        ranges_line = ",".join(f"{p}.1-{p}.254" for p in ordered)
-        count = len(ordered)
-    else:
-        ranges_line = ""
-        count = 0
-
-    # 3) Guardar
-    out_path = save_path or ask_save_path_gui(DEFAULT_OUTPUT_FILENAME, parent=parent)
-    if not out_path:
-        return "", 0  # canceló el guardado
-    out_dir = os.path.dirname(out_path)
-    if out_dir:
-        os.makedirs(out_dir, exist_ok=True)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(ranges_line)
-
-    return out_path, count
-
+    kwargs.setdefault("dedup", True)
+    kwargs.setdefault("use_cache", True)
+    return generate_ip_ranges(paths, save_path, **kwargs)
+
+
+def generate_ip_ranges_from_text(paths: Optional[List[str]] = None,
+                                 save_path: Optional[str] = None,
+                                 *,
+                                 parent=None,
+                                 chunk_size: int = TEXT_CHUNK,
+                                 on_file_error: Optional[Callable[[str, str], None]] = None,
+                                 output_format: str = "ranges") -> Tuple[str, int]:
+    """
+    Como generate_ip_ranges, pero buscando IPv4 dentro de archivos de texto / logs
+    (.txt, .log, .csv, ...) de cualquier tamaño, en memoria constante.
+    Retorna (out_path, cantidad_de_redes); out_path="" si se canceló o no se
+    pudo leer ningún archivo.
+    """
+    if paths is None:
+        paths = select_text_files_gui(parent=parent)
+        if not paths:
+            return "", 0
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida desconocido: {output_format!r} (opciones: {', '.join(OUTPUT_FORMATS)})")
+    if on_file_error is None:
+        on_file_error = _avisar_error_archivo
+
+    with corrida("DireccionesIP_txt") as run:
+        prefixes_24: Set[int] = set()
+        leidos = 0
+        for p in paths:
+            try:
+                with medir("extraccion_texto"):
+                    extract_prefixes_from_text(p, prefixes_24, chunk_size)
+                leidos += 1
+            except OSError as e:
+                on_file_error(p, f"No se pudo leer {p}: {e}")
+        if not leidos:
+            return "", 0
+
+        with medir("ordenar"):
+            ranges_line = format_prefixes(prefixes_24, output_format)
+
+        out_path = save_path or ask_save_path_gui(DEFAULT_OUTPUT_FILENAME, parent=parent)
+        if not out_path:
+            return "", 0
+        out_dir = os.path.dirname(out_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with medir("escritura"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(ranges_line)
+
+        run.salida = out_path
+        return out_path, len(prefixes_24)
 
 
 # ---------------------- Modo script (consola) ----------------------
 
 def main():
+    """
+    Sin argumentos: elegir archivos en un diálogo. Con argumentos:
+        python Extraer_ips.py RUTA|CARPETA|PATRÓN [...] [-o salida.txt] [--unir | --cidr] [--txt]
+    escanea en modo carpeta (scan_ip_ranges); con --txt busca IPs en archivos de
+    texto / logs (generate_ip_ranges_from_text).
+    """
+    args = sys.argv[1:]
+    texto = "--txt" in args
+    if texto:
+        args.remove("--txt")
+    output_format = "ranges"
+    for flag, formato in (("--unir", "merged_ranges"), ("--cidr", "cidr")):
+        if flag in args:
+            args.remove(flag)
+            output_format = formato
+    save_path = None
+    if "-o" in args:
+        i = args.index("-o")
+        save_path = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
     try:
-        out_path, count = generate_ip_ranges()
+        if texto:
+            out_path, count = generate_ip_ranges_from_text(
+                expand_paths(args) if args else None,
+                save_path or (get_save_path(DEFAULT_OUTPUT_FILENAME, gui_only=False) if args else None),
+                output_format=output_format,
+            )
+        elif args:
+            out_path, count = scan_ip_ranges(
+                args, save_path or get_save_path(DEFAULT_OUTPUT_FILENAME, gui_only=False),
+                on_file_skipped=lambda p, igual: print(f"[AVISO] {p} es idéntico a {igual}; se saltea"),
+                output_format=output_format,
+            )
+        else:
+            out_path, count = generate_ip_ranges(output_format=output_format)
         if count:
             print(f"[OK] Se guardaron {count} rango(s) /24 en: {out_path}")
         else:
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('ico.ico', '.')],
-    hiddenimports=[],
+    hiddenimports=['Db3ToCsv', 'CsvEn0', 'Clientes_suma', 'Perfilado'],  # importados con importlib en Main
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentación liviana por etapas (tiempo + memoria) para los pipelines.
+
+Apagada por defecto: medir() devuelve un contexto nulo compartido y los
+decoradores llaman directo a la función. Se enciende con:
+  - HDM_INSTRUMENTAR=1    -> tiempos (reloj monótono) + RSS muestreado
+  - HDM_INSTRUMENTAR=mem  -> además, pico de memoria Python con tracemalloc (más lento)
+  - activar() desde código / flag de CLI (Batch_contadores --instrumentar)
+  - activada() para una sola acción (Perfilado, "Perfilar próxima acción")
+
+Uso:
+    @en_corrida("AutoCSV")                 # una por ejecución de un pipeline;
+    def procesar(...):                     # la ruta que devuelve es la salida
+        with medir("lectura.sqlite"):      # secciones; se agregan por nombre
+            ...
+        return ruta_csv
+
+    with corrida("AutoCSV") as c:          # lo mismo, como contexto
+        ...
+        c.salida = ruta_csv                # informe junto al archivo generado
+
+    @instrumentado("lectura_xls")
+    def leer_xls(...): ...
+
+Al cerrar la corrida más externa se escribe <salida>.tiempos.txt (tabla) y
+<salida>.tiempos.json. Las secciones pueden anidarse y correr en varios hilos;
+el pico de tracemalloc es global al proceso, así que con hilos es aproximado.
+
+Hay UNA corrida activa por proceso: una corrida que empieza mientras otra está
+abierta (aunque sea desde otro hilo) se mide como sección de la primera. En la
+app no pasa porque BackgroundJobs corre un trabajo por vez, y Batch_contadores
+corre las tareas en serie.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Optional
+
+ENV_INSTRUMENTAR = "HDM_INSTRUMENTAR"
+MUESTREO_RSS_S = 0.01
+
+_NULO = nullcontext()
+_activo = bool(os.environ.get(ENV_INSTRUMENTAR))
+_memoria = os.environ.get(ENV_INSTRUMENTAR, "").lower() == "mem"
+
+
+# ---------------------- RSS del proceso ----------------------
+
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+    class _PMC(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    def _pmc() -> "_PMC":
+        pmc = _PMC()
+        pmc.cb = ctypes.sizeof(pmc)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb
+        )
+        return pmc
+
+    def rss_actual() -> int:
+        """Working set actual en bytes."""
+        return _pmc().WorkingSetSize
+
+    def rss_pico() -> int:
+        """Pico de working set del proceso en bytes."""
+        return _pmc().PeakWorkingSetSize
+else:
+    import resource
+
+    _PAGINA = os.sysconf("SC_PAGE_SIZE")
+
+    def rss_actual() -> int:
+        """RSS actual en bytes (en macOS, sin /proc, devuelve el pico)."""
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * _PAGINA
+        except OSError:
+            return rss_pico()
+
+    def rss_pico() -> int:
+        """Pico de RSS del proceso en bytes."""
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+# ---------------------- estado ----------------------
+
+def activo() -> bool:
+    return _activo
+
+
+def activar(memoria: bool = False) -> None:
+    """Enciende la instrumentación en este proceso (y en los hijos, vía entorno)."""
+    global _activo, _memoria
+    _activo = True
+    _memoria = _memoria or memoria
+    os.environ[ENV_INSTRUMENTAR] = "mem" if _memoria else "1"
+
+
+@contextmanager
+def activada(memoria: bool = False):
+    """Enciende la instrumentación sólo durante el bloque y después deja el estado previo."""
+    global _activo, _memoria
+    previo = (_activo, _memoria, os.environ.get(ENV_INSTRUMENTAR))
+    activar(memoria)
+    try:
+        yield
+    finally:
+        _activo, _memoria, env = previo
+        if env is None:
+            os.environ.pop(ENV_INSTRUMENTAR, None)
+        else:
+            os.environ[ENV_INSTRUMENTAR] = env
+
+
+class _Seccion:
+    __slots__ = ("nombre", "t0", "rss0", "rss_pico", "mem_pico", "padre")
+
+    def __init__(self, nombre, padre):
+        self.nombre = nombre
+        self.padre = padre
+        self.t0 = time.perf_counter()
+        self.rss0 = rss_actual()
+        self.rss_pico = self.rss0
+        self.mem_pico = 0
+
+
+class Corrida:
+    """Acumula las secciones medidas durante una ejecución de un pipeline."""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.salida: Optional[str] = None  # archivo generado; el informe va a su lado
+        self.inicio = datetime.now()
+        self.t0 = time.perf_counter()
+        self.segundos = 0.0
+        self.rss_inicio = rss_actual()
+        self.secciones = {}  # nombre -> agregado
+        self.orden = []
+        self._abiertas = set()
+        self._lock = threading.Lock()
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear_rss, name="hdm-instr", daemon=True)
+
+    def _muestrear_rss(self):
+        while not self._fin.wait(MUESTREO_RSS_S):
+            rss = rss_actual()
+            with self._lock:
+                for s in self._abiertas:
+                    if rss > s.rss_pico:
+                        s.rss_pico = rss
+
+    def _registrar(self, s: _Seccion, segundos: float, rss_fin: int):
+        with self._lock:
+            self._abiertas.discard(s)
+            a = self.secciones.get(s.nombre)
+            if a is None:
+                a = self.secciones[s.nombre] = {
+                    "llamadas": 0, "segundos": 0.0, "max_segundos": 0.0,
+                    "rss_pico_mib": 0.0, "rss_delta_mib": 0.0, "mem_pico_mib": None,
+                }
+            a["llamadas"] += 1
+            a["segundos"] += segundos
+            a["max_segundos"] = max(a["max_segundos"], segundos)
+            a["rss_pico_mib"] = max(a["rss_pico_mib"], max(s.rss_pico, rss_fin) / 2 ** 20)
+            a["rss_delta_mib"] += (rss_fin - s.rss0) / 2 ** 20
+            if _memoria:
+                a["mem_pico_mib"] = max(a["mem_pico_mib"] or 0.0, s.mem_pico / 2 ** 20)
+
+    # ---------- informe ----------
+    def como_dict(self) -> dict:
+        return {
+            "corrida": self.nombre,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "segundos": round(self.segundos, 4),
+            "salida": self.salida,
+            "pid": os.getpid(),
+            "rss_inicio_mib": round(self.rss_inicio / 2 ** 20, 1),
+            "rss_pico_proceso_mib": round(rss_pico() / 2 ** 20, 1),
+            "secciones": {
+                n: {k: (round(v, 4) if isinstance(v, float) else v) for k, v in self.secciones[n].items()}
+                for n in self.orden
+            },
+        }
+
+    def resumen(self) -> str:
+        """Tabla de texto: una fila por sección, en orden de primera aparición."""
+        lineas = [
+            f"{self.nombre} — {self.inicio:%d/%m/%Y %H:%M:%S} — {self.segundos:.3f} s en total",
+            f"{'sección':<32} {'llamadas':>8} {'seg':>9} {'%':>6} {'máx seg':>9} {'pico RSS':>10} {'Δ RSS':>9}"
+            + (f" {'pico py':>9}" if _memoria else ""),
+        ]
+        for n in self.orden:
+            a = self.secciones[n]
+            pct = 100 * a["segundos"] / self.segundos if self.segundos else 0
+            linea = (f"{n:<32} {a['llamadas']:>8} {a['segundos']:9.3f} {pct:5.1f}% {a['max_segundos']:9.3f}"
+                     f" {a['rss_pico_mib']:7.1f} MiB {a['rss_delta_mib']:+6.1f} MiB")
+            if _memoria:
+                linea += f" {a['mem_pico_mib'] or 0:6.1f} MiB"
+            lineas.append(linea)
+        lineas.append(f"Pico RSS del proceso: {rss_pico() / 2 ** 20:.1f} MiB")
+        return "\n".join(lineas)
+
+    def escribir_informe(self) -> Optional[str]:
+        """Escribe <salida>.tiempos.txt/.json; devuelve la ruta del .txt (None si no hay salida)."""
+        if not self.salida:
+            return None
+        base = self.salida + ".tiempos"
+        try:
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(self.resumen() + "\n")
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(self.como_dict(), f, ensure_ascii=False, indent=2)
+        except OSError:
+            return None
+        return base + ".txt"
+
+
+class _CorridaNula:
+    """Lo que entrega corrida() apagada: acepta .salida y no escribe nada."""
+    salida = None
+
+
+_corrida: Optional[Corrida] = None
+_ultima: Optional[Corrida] = None
+_pila = threading.local()
+
+
+def ultima_corrida() -> Optional[Corrida]:
+    """La última corrida terminada (o la actual), p. ej. para adjuntar su resumen."""
+    return _corrida or _ultima
+
+
+@contextmanager
+def _corrida_activa(nombre: str):
+    global _corrida, _ultima
+    c = Corrida(nombre)
+    # tracemalloc sólo durante la corrida: si queda encendido, frena toda la app
+    inicio_traza = _memoria and not tracemalloc.is_tracing()
+    if inicio_traza:
+        tracemalloc.start()
+    _corrida = c
+    c._hilo.start()
+    try:
+        with _seccion(nombre):
+            yield c
+    finally:
+        c.segundos = time.perf_counter() - c.t0
+        c._fin.set()
+        c._hilo.join()
+        _corrida = None
+        _ultima = c
+        if inicio_traza:
+            tracemalloc.stop()
+        c.escribir_informe()
+
+
+def corrida(nombre: str):
+    """
+    Contexto de una ejecución completa. Si ya hay una corrida abierta (p. ej. un
+    pipeline que llama a otro) se comporta como una sección más de la externa.
+    """
+    if not _activo:
+        return nullcontext(_CorridaNula())
+    if _corrida is not None:
+        return _seccion_con_valor(nombre, _corrida)
+    return _corrida_activa(nombre)
+
+
+def en_corrida(nombre: str):
+    """
+    Decorador: cada llamada corre dentro de corrida(nombre) y lo que devuelve
+    (la ruta del archivo generado) queda como salida del informe.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            with corrida(nombre) as run:
+                salida = fn(*args, **kwargs)
+                run.salida = salida
+                return salida
+        return envoltura
+    return deco
+
+
+@contextmanager
+def _seccion_con_valor(nombre: str, valor):
+    with _seccion(nombre):
+        yield valor
+
+
+@contextmanager
+def _seccion(nombre: str):
+    c = _corrida
+    if c is None:
+        yield
+        return
+    pila = getattr(_pila, "secciones", None)
+    if pila is None:
+        pila = _pila.secciones = []
+    padre = pila[-1] if pila else None
+    if _memoria:
+        _, pico = tracemalloc.get_traced_memory()
+        if padre is not None:
+            padre.mem_pico = max(padre.mem_pico, pico)
+        tracemalloc.reset_peak()
+    s = _Seccion(nombre, padre)
+    with c._lock:
+        c._abiertas.add(s)
+        if nombre not in c.orden:  # orden de primera entrada: padres antes que hijos
+            c.orden.append(nombre)
+    pila.append(s)
+    try:
+        yield
+    finally:
+        pila.pop()
+        segundos = time.perf_counter() - s.t0
+        if _memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            s.mem_pico = max(s.mem_pico, pico)
+            if padre is not None:
+                padre.mem_pico = max(padre.mem_pico, s.mem_pico)
+            tracemalloc.reset_peak()
+        c._registrar(s, segundos, rss_actual())
+
+
+def medir(nombre: str):
+    """Sección medida (context manager). Sin instrumentación activa, no hace nada."""
+    if not _activo or _corrida is None:
+        return _NULO
+    return _seccion(nombre)
+
+
+def instrumentado(nombre: Optional[str] = None):
+    """Decorador: mide cada llamada como la sección `nombre` (por defecto, el de la función)."""
+    def deco(fn):
+        etiqueta = nombre or fn.__name__
+
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            if not _activo or _corrida is None:
+                return fn(*args, **kwargs)
+            with _seccion(etiqueta):
+                return fn(*args, **kwargs)
+        return envoltura
+    return deco
@@ -1,14 +1,28 @@
-import os, sys, json, tempfile
+import time
+_T0_IMPORT = time.perf_counter()  # inicio del arranque (ver Medicion_arranque)
+
+import os, sys, json, tempfile, threading, queue, importlib, functools
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from datetime import datetime
 
 # === Módulos propios ===
-from Db3ToCsv import procesar_db_a_csv
-from CsvEn0 import filtrar_falta_contador_csv
+# Livianos (sin pandas/numpy): se importan al arrancar.
+from Progreso import TokenCancelacion, ProcesoCancelado, ETAPAS
+from Medicion_arranque import MarcasArranque
 import Estimador_manual
-from Clientes_suma import convertir_xls_a_csv_arcos
-from Extraer_ips import generate_ip_ranges
+from Extraer_ips import (generate_ip_ranges, scan_ip_ranges, generate_ip_ranges_from_text,
+                         select_files_gui, select_text_files_gui, ask_save_path_gui,
+                         DEFAULT_OUTPUT_FILENAME)
+
+# Pesados (cargan pandas/numpy): se importan recién al usarlos, desde el hilo de
+# trabajos, o en segundo plano apenas se pinta la ventana (ver _precargar_modulos).
+MODULOS_PESADOS = ("Db3ToCsv", "CsvEn0", "Clientes_suma")
+
+
+def modulo_pesado(nombre):
+    """Importa (o devuelve ya importado) uno de MODULOS_PESADOS."""
+    return importlib.import_module(nombre)
 
 # --- helpers nuevos (debajo de imports) ---
 def resource_path(rel):
@@ -48,6 +62,119 @@ TEXT   = "#333333"
 PAD_IN  = 8    # padding interno estándar
 PAD_OUT = 8    # separación entre controles
 
+# HDM_NO_PRECARGA=1 desactiva la precarga en segundo plano de MODULOS_PESADOS.
+# Tiempos de arranque: ver Medicion_arranque (HDM_STARTUP_TIMING).
+ENV_NO_PRECARGA = "HDM_NO_PRECARGA"
+
+POLL_MS = 100  # cada cuánto el hilo de UI revisa resultados de trabajos en segundo plano
+
+# Peso (en % de la barra) de cada etapa de procesar_db_a_csv; la lectura domina
+PESO_ETAPAS = {"lectura": 60, "conteo": 5, "deduplicacion": 15, "pivot": 10, "escritura": 10}
+
+
+class BackgroundJobs:
+    """
+    Cola de trabajos pesados ejecutados en UN hilo de fondo (en orden de llegada).
+    El hilo de fondo nunca toca Tk: publica eventos en una queue.Queue y el hilo
+    de UI los consume con after(POLL_MS), donde se actualiza el status y se
+    llaman los callbacks (on_ok / on_error / on_progress).
+
+    Un trabajo con token (TokenCancelacion) se puede cancelar con cancel_current();
+    si termina con ProcesoCancelado se informa como cancelado, no como error
+    (y se llama on_cancel, si se pasó).
+    """
+
+    def __init__(self, root: tk.Misc, on_status, on_start=None, on_progress=None, on_finish=None):
+        self.root = root
+        self.on_status = on_status
+        self.on_start = on_start        # on_start(label, cancelable)
+        self.on_progress = on_progress  # on_progress(etapa, hecho, total)
+        self.on_finish = on_finish      # on_finish()
+        self._jobs = queue.Queue()
+        self._events = queue.Queue()
+        self._pendientes = 0
+        self._token_actual = None
+        self._worker = threading.Thread(target=self._loop, name="hdm-jobs", daemon=True)
+        self._worker.start()
+        self.root.after(POLL_MS, self._poll)
+
+    @property
+    def ocupado(self) -> bool:
+        return self._pendientes > 0
+
+    def submit(self, label, fn, on_ok=None, on_error=None, token=None, on_cancel=None):
+        """Encola fn() (sin argumentos). on_ok(resultado) / on_error(exc) / on_cancel(exc) corren en el hilo de UI."""
+        self._pendientes += 1
+        if self._pendientes > 1:
+            self.on_status(f"En cola: {label} ({self._pendientes - 1} antes)")
+        self._jobs.put((label, fn, on_ok, on_error, on_cancel, token))
+
+    def report_progress(self, etapa, hecho, total):
+        """Callback de progreso para pasar a los procesos; seguro desde cualquier hilo."""
+        self._events.put(("progress", None, (etapa, hecho, total), None))
+
+    def cancel_current(self):
+        token = self._token_actual
+        if token is not None:
+            token.cancelar()
+            self.on_status("Cancelando…")
+
+    # --- hilo de fondo ---
+    def _loop(self):
+        while True:
+            label, fn, on_ok, on_error, on_cancel, token = self._jobs.get()
+            self._token_actual = token
+            self._events.put(("start", label, token is not None, None))
+            try:
+                res = fn()
+            except ProcesoCancelado as e:
+                self._events.put(("cancel", label, e, on_cancel))
+            except Exception as e:
+                self._events.put(("error", label, e, on_error))
+            else:
+                self._events.put(("ok", label, res, on_ok))
+            finally:
+                self._token_actual = None
+
+    # --- hilo de UI ---
+    def _poll(self):
+        try:
+            while True:
+                kind, label, payload, cb = self._events.get_nowait()
+                if kind == "progress":
+                    if self.on_progress:
+                        self.on_progress(*payload)
+                    continue
+                if kind == "start":
+                    self.on_status(f"Ejecutando: {label}…")
+                    if self.on_start:
+                        self.on_start(label, payload)
+                    continue
+                self._pendientes -= 1
+                if self.on_finish:
+                    self.on_finish()
+                if kind == "ok":
+                    self.on_status(f"✔ {label} completado")
+                    if cb:
+                        cb(payload)
+                elif kind == "cancel":
+                    self.on_status(f"⏹ {label} cancelado")
+                    if cb:
+                        cb(payload)
+                else:
+                    self.on_status(f"✖ Error en {label}")
+                    if cb:
+                        cb(payload)
+                    else:
+                        messagebox.showerror("Error", f"Ocurrió un error en '{label}':\n\n{payload}", parent=self.root)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(POLL_MS, self._poll)
+
+
+_T1_IMPORT = time.perf_counter()  # fin de la importación de Main (antes de crear Tk)
+
 
 class HelpDeskManagerApp(tk.Tk):        
     def __init__(self):
@@ -62,10 +189,17 @@ class HelpDeskManagerApp(tk.Tk):
         self._build_notebook()
         self._build_statusbar()
         self._build_menu()
-        
+        self.jobs = BackgroundJobs(
+            self, on_status=self.status.set,
+            on_start=self._job_started, on_progress=self._job_progress, on_finish=self._job_finished,
+        )
+        self.protocol("WM_DELETE_WINDOW", self._salir)
+        self.arranque = MarcasArranque("HelpDeskManagerApp", t0=_T0_IMPORT)
+        self.arranque.marcar("modulo", (_T1_IMPORT - _T0_IMPORT) * 1000)
+        self.arranque.al_pintar(self, despues=self._iniciar_precarga)
 
         # Atajos
-        self.bind_all("<Control-q>", lambda e: self.quit())
+        self.bind_all("<Control-q>", lambda e: self._salir())
         self.bind_all("<F1>", lambda e: self._about())
 
         
@@ -77,6 +211,21 @@ class HelpDeskManagerApp(tk.Tk):
             pass
 
 
+    # ---------- Arranque ----------
+    def _iniciar_precarga(self):
+        """Tras la primera pintura: importa MODULOS_PESADOS en segundo plano."""
+        if not os.environ.get(ENV_NO_PRECARGA):
+            threading.Thread(target=self._precargar_modulos, name="hdm-precarga", daemon=True).start()
+
+    def _precargar_modulos(self):
+        t0 = time.perf_counter()
+        for nombre in MODULOS_PESADOS:
+            try:
+                modulo_pesado(nombre)
+            except Exception:
+                return  # el error real se mostrará al usar el botón
+        self.arranque.marcar("precarga", (time.perf_counter() - t0) * 1000)
+
     # ---------- UI builders ----------
     def _setup_style(self):
         style = ttk.Style()
@@ -137,19 +286,32 @@ class HelpDeskManagerApp(tk.Tk):
         bar = ttk.Frame(self)
         bar.grid(row=3, column=0, sticky="ew", pady=(PAD_OUT, 0))
         bar.columnconfigure(0, weight=1)
-        ttk.Separator(bar, orient="horizontal").grid(row=0, column=0, sticky="ew")
+        ttk.Separator(bar, orient="horizontal").grid(row=0, column=0, columnspan=2, sticky="ew")
         ttk.Label(bar, textvariable=self.status, anchor="w").grid(row=1, column=0, sticky="ew", pady=(4, 2))
 
+        # Barra de progreso + Cancelar: visibles solo mientras corre un trabajo
+        self.progress = ttk.Progressbar(bar, orient="horizontal", mode="determinate", maximum=100)
+        self.progress.grid(row=2, column=0, sticky="ew", pady=(0, 2))
+        self.btn_cancel = ttk.Button(bar, text="Cancelar", command=self._cancelar_trabajo)
+        self.btn_cancel.grid(row=2, column=1, padx=(PAD_OUT, 0), pady=(0, 2))
+        self.progress.grid_remove()
+        self.btn_cancel.grid_remove()
+
     def _build_menu(self):
         menubar = tk.Menu(self)
         self.config(menu=menubar)
 
         archivo = tk.Menu(menubar, tearoff=0)
-        archivo.add_command(label="Salir (Ctrl+Q)", command=self.quit)
+        archivo.add_command(label="Salir (Ctrl+Q)", command=self._salir)
         menubar.add_cascade(label="Archivo", menu=archivo)
 
         ayuda = tk.Menu(menubar, tearoff=0)
         ayuda.add_command(label="Acerca de (F1)", command=self._about)
+        ayuda.add_separator()
+        # Diagnóstico: la próxima acción en segundo plano corre bajo cProfile (ver Perfilado)
+        self.perfilar_proxima = tk.BooleanVar(self, value=False)
+        ayuda.add_checkbutton(label="Perfilar próxima acción", variable=self.perfilar_proxima)
+        ayuda.add_command(label="Abrir carpeta de perfiles", command=self._abrir_perfiles)
         
         menubar.add_cascade(label="Ayuda", menu=ayuda)
 
@@ -194,17 +356,97 @@ class HelpDeskManagerApp(tk.Tk):
             .grid(row=0, column=0, sticky="ew", padx=PAD_IN, pady=PAD_IN)
 
         ttk.Button(card_net, text="txt a Direc. IP",
-                style="Big.TButton", command=self._generar_ips)\
+                style="Big.TButton", command=self._generar_ips_txt)\
         .grid(row=1, column=0, sticky="ew", padx=PAD_IN, pady=PAD_IN)
 
+        ttk.Button(card_net, text="carpeta a Direc. IP",
+                style="Big.TButton", command=self._generar_ips_carpeta)\
+            .grid(row=2, column=0, sticky="ew", padx=PAD_IN, pady=PAD_IN)
+
+        # Formato del archivo de IPs (Extraer_ips.OUTPUT_FORMATS); por defecto, el de siempre
+        self.formato_ips = tk.StringVar(self, value="ranges")
+        formato = ttk.Frame(card_net)
+        formato.grid(row=3, column=0, sticky="w", padx=PAD_IN, pady=(0, PAD_IN))
+        ttk.Label(formato, text="Salida:").pack(side="left")
+        for texto, valor in (("un rango por /24", "ranges"), ("rangos unidos", "merged_ranges"), ("CIDR", "cidr")):
+            ttk.Radiobutton(formato, text=texto, value=valor, variable=self.formato_ips)\
+                .pack(side="left", padx=(PAD_IN, 0))
+
 
     # ---------- Utilidad para acciones con status & errores ----------
+    def _run_background(self, label, fn, on_ok=None, token=None):
+        """Encola el trabajo pesado fn() en segundo plano (diálogos ya resueltos en la UI)."""
+        if not self.perfilar_proxima.get():
+            self.jobs.submit(label, fn, on_ok=on_ok, token=token)
+            return
+        # Modo "Perfilar próxima acción": sólo esta ejecución, después se desarma
+        self.perfilar_proxima.set(False)
+        Perfilado = importlib.import_module("Perfilado")
+        carpeta = Perfilado.carpeta_nueva(label)
+
+        def _ok(res):
+            if on_ok:
+                on_ok(res)
+            self._avisar_perfil(carpeta)
+
+        def _error(e):
+            messagebox.showerror("Error", f"Ocurrió un error en '{label}':\n\n{e}", parent=self)
+            self._avisar_perfil(carpeta)
+
+        self.jobs.submit(label, functools.partial(Perfilado.perfilar, carpeta, label, fn),
+                         on_ok=_ok, on_error=_error, token=token,
+                         on_cancel=lambda e: self._avisar_perfil(carpeta, cancelado=True))
+
+    def _avisar_perfil(self, carpeta, cancelado=False):
+        parcial = "La acción se canceló: el perfil cubre sólo lo que llegó a correr.\n\n" if cancelado else ""
+        messagebox.showinfo(
+            "Perfil guardado",
+            f"{parcial}Se guardó el perfil de la acción en:\n{carpeta}\n\n"
+            f"Envíenos el archivo comprimido:\n{carpeta}.zip",
+            parent=self,
+        )
+
+    def _abrir_perfiles(self):
+        Perfilado = importlib.import_module("Perfilado")
+        os.makedirs(Perfilado.PERFILES_DIR, exist_ok=True)
+        if os.name == "nt":
+            os.startfile(Perfilado.PERFILES_DIR)
+        else:
+            messagebox.showinfo("Perfiles", Perfilado.PERFILES_DIR, parent=self)
+
+    def _job_started(self, label, cancelable):
+        self.progress.configure(value=0, mode="determinate" if cancelable else "indeterminate")
+        self.progress.grid()
+        if cancelable:
+            self.btn_cancel.state(["!disabled"])
+            self.btn_cancel.grid()
+        else:
+            self.progress.start(15)
+
+    def _job_progress(self, etapa, hecho, total):
+        if etapa not in PESO_ETAPAS:
+            return
+        previas = sum(PESO_ETAPAS[e] for e in ETAPAS[:ETAPAS.index(etapa)])
+        fraccion = (hecho / total) if total else 1.0
+        self.progress.configure(value=previas + PESO_ETAPAS[etapa] * fraccion)
+        self.status.set(f"Ejecutando: {etapa} ({hecho:,}/{total:,})".replace(",", "."))
+
+    def _job_finished(self):
+        self.progress.stop()
+        self.progress.grid_remove()
+        self.btn_cancel.grid_remove()
+
+    def _cancelar_trabajo(self):
+        self.btn_cancel.state(["disabled"])
+        self.jobs.cancel_current()
+
     def _run_action(self, label, fn):
-        self.status.set(f"Ejecutando: {label}…")
-        self.update_idletasks()
+        """
+        Corre fn() en el hilo de UI: diálogos y, si corresponde, _run_background.
+        No marca ✔: el trabajo encolado informa ✔/✖/⏹ al terminar (BackgroundJobs).
+        """
         try:
             fn()
-            self.status.set(f"✔ {label} completado")
         except Exception as e:
             self.status.set(f"✖ Error en {label}")
             messagebox.showerror("Error", f"Ocurrió un error en '{label}':\n\n{e}", parent=self)
@@ -253,16 +495,22 @@ class HelpDeskManagerApp(tk.Tk):
             if not carpeta_destino:
                 carpeta_destino = None  # usa carpeta del primer archivo válido
 
-            try:
-                ruta_salida = procesar_db_a_csv(
+            token = TokenCancelacion()
+            self._run_background(
+                "Procesar archivos CSV",
+                lambda: modulo_pesado("Db3ToCsv").procesar_db_a_csv(
                     archivos_db=list(archivos),
                     fecha_maxima=fecha_max,
                     nombre_base_salida=nombre_base,
-                    carpeta_salida=carpeta_destino
-                )
-                messagebox.showinfo("Éxito", f"CSV generado en:\n{ruta_salida}", parent=self)
-            except Exception as e:
-                messagebox.showerror("Error", f"Ocurrió un error:\n{e}", parent=self)
+                    carpeta_salida=carpeta_destino,
+                    workers=None,  # lectura paralela de las DB seleccionadas
+                    reducir_en_sql=True,  # SQLite devuelve solo la última lectura por SERIE+CLASE
+                    progreso=self.jobs.report_progress,
+                    cancelar=token,
+                ),
+                on_ok=lambda ruta_salida: messagebox.showinfo("Éxito", f"CSV generado en:\n{ruta_salida}", parent=self),
+                token=token,
+            )
 
         self._run_action("Procesar archivos CSV", _do)
 
@@ -296,42 +544,129 @@ class HelpDeskManagerApp(tk.Tk):
             if not carpeta_salida:
                 carpeta_salida = None
 
-            ruta_salida = filtrar_falta_contador_csv(
-                archivo_csv_entrada=archivo_csv,
-                fecha_nueva=fecha_nueva,
-                nombre_cliente=nombre_cliente,
-                carpeta_salida=carpeta_salida
+            self._run_background(
+                "Cargar CSV: Contadores por Proceso",
+                lambda: modulo_pesado("CsvEn0").filtrar_falta_contador_csv(
+                    archivo_csv_entrada=archivo_csv,
+                    fecha_nueva=fecha_nueva,
+                    nombre_cliente=nombre_cliente,
+                    carpeta_salida=carpeta_salida
+                ),
+                on_ok=lambda ruta_salida: messagebox.showinfo("Éxito", f"CSV generado en:\n{ruta_salida}", parent=self),
             )
-            messagebox.showinfo("Éxito", f"CSV generado en:\n{ruta_salida}", parent=self)
 
         self._run_action("Cargar CSV: Contadores por Proceso", _do)
 
     def _estimacion_suma_fija(self):
-        self._run_action("Estimación con suma fija (SIGES)", convertir_xls_a_csv_arcos)
+        def _do():
+            # Diálogos de Clientes_suma en la UI; la lectura del XLS y el CSV, en segundo plano
+            Clientes_suma = modulo_pesado("Clientes_suma")
+            parametros = Clientes_suma.pedir_parametros_suma_fija(parent=self)
+            if parametros is None:
+                return
+            self._run_background(
+                "Estimación con suma fija (SIGES)",
+                lambda: Clientes_suma.convertir_xls_a_csv_arcos_archivo(*parametros),
+                on_ok=lambda ruta: messagebox.showinfo("Éxito", f"Archivo CSV guardado exitosamente en: {ruta}", parent=self),
+            )
+
+        self._run_action("Estimación con suma fija (SIGES)", _do)
 
     def _abrir_estimador_manual(self):
+        # Ventana propia en el hilo de UI (no es un trabajo en segundo plano)
         self._run_action("Abrir Estimador Manual", Estimador_manual.crear_interfaz)
 
     # ---------- STC ----------
     def _generar_ips(self):
         def _do():
-            out_path, count = generate_ip_ranges(parent=self)  # <— ahora sí acepta parent
-            if not out_path:
-                # usuario canceló; no mostramos error
+            # Diálogos en la UI; la extracción corre en segundo plano
+            paths = select_files_gui(parent=self)
+            if not paths:
+                return  # usuario canceló; no mostramos error
+            save_path = ask_save_path_gui(DEFAULT_OUTPUT_FILENAME, parent=self)
+            if not save_path:
                 return
-            if count:
-                messagebox.showinfo("Direcciones IP",
-                                    f"Se guardaron {count} rango(s) /24 en:\n{out_path}",
-                                    parent=self)
-            else:
-                messagebox.showinfo("Direcciones IP",
-                                    f"No se encontraron IPv4 válidas.\nSe generó archivo vacío en:\n{out_path}",
-                                    parent=self)
+            errores = []  # archivos que fallaron (el resto del lote se procesa igual)
+            formato = self.formato_ips.get()
+            self._run_background(
+                "Generar Direcciones IP (DB3)",
+                lambda: generate_ip_ranges(paths, save_path, output_format=formato,
+                                           on_file_error=lambda p, e: errores.append(os.path.basename(p))),
+                on_ok=lambda res: self._informar_ips(res, errores),
+            )
         self._run_action("Generar Direcciones IP (DB3)", _do)
 
+    def _generar_ips_carpeta(self):
+        def _do():
+            carpeta = filedialog.askdirectory(
+                title="Carpeta con bases SQLite (incluye subcarpetas)", parent=self
+            )
+            if not carpeta:
+                return
+            save_path = ask_save_path_gui(DEFAULT_OUTPUT_FILENAME, parent=self)
+            if not save_path:
+                return
+            errores, repetidos = [], []
+            formato = self.formato_ips.get()
+            self._run_background(
+                "Generar Direcciones IP (carpeta)",
+                lambda: scan_ip_ranges([carpeta], save_path, output_format=formato,
+                                       on_file_error=lambda p, e: errores.append(os.path.basename(p)),
+                                       on_file_skipped=lambda p, igual: repetidos.append(p)),
+                on_ok=lambda res: self._informar_ips(res, errores, len(repetidos)),
+            )
+        self._run_action("Generar Direcciones IP (carpeta)", _do)
+
+    def _generar_ips_txt(self):
+        def _do():
+            paths = select_text_files_gui(parent=self)
+            if not paths:
+                return
+            save_path = ask_save_path_gui(DEFAULT_OUTPUT_FILENAME, parent=self)
+            if not save_path:
+                return
+            errores = []
+            formato = self.formato_ips.get()
+            self._run_background(
+                "Generar Direcciones IP (txt)",
+                lambda: generate_ip_ranges_from_text(paths, save_path, output_format=formato,
+                                                     on_file_error=lambda p, e: errores.append(os.path.basename(p))),
+                on_ok=lambda res: self._informar_ips(res, errores,
+                                                     sin_archivos="No se pudo leer ninguno de los archivos elegidos."),
+            )
+        self._run_action("Generar Direcciones IP (txt)", _do)
+
+    def _informar_ips(self, res, errores, repetidos=0,
+                      sin_archivos="Ninguno de los archivos elegidos es una base SQLite."):
+        out_path, count = res
+        if not out_path:
+            messagebox.showwarning("Direcciones IP", sin_archivos, parent=self)
+            return
+        aviso = ""
+        if repetidos:
+            aviso += f"\n\nSe omitieron {repetidos} copia(s) idéntica(s)."
+        if errores:
+            lista = "\n".join(errores[:10]) + ("\n…" if len(errores) > 10 else "")
+            aviso += f"\n\nNo se pudieron leer {len(errores)} archivo(s):\n{lista}"
+        if count:
+            messagebox.showinfo("Direcciones IP",
+                                f"Se guardaron {count} rango(s) /24 en:\n{out_path}{aviso}",
+                                parent=self)
+        else:
+            messagebox.showinfo("Direcciones IP",
+                                f"No se encontraron IPv4 válidas.\nSe generó archivo vacío en:\n{out_path}{aviso}",
+                                parent=self)
+
 
 
     # ----------
+    def _salir(self):
+        if self.jobs.ocupado and not messagebox.askyesno(
+            "Salir", "Hay trabajos en curso o en cola.\n¿Salir de todos modos?", parent=self
+        ):
+            return
+        self.quit()
+
     def _about(self):
         messagebox.showinfo(
             "Acerca de",
@@ -30,7 +30,7 @@ a_app = Analysis(
     pathex=pathex,
     binaries=[],
     datas=[('ico.ico', '.')],   # agrega otros recursos si usás (templates, etc.)
-    hiddenimports=[],
+    hiddenimports=['Db3ToCsv', 'CsvEn0', 'Clientes_suma', 'Perfilado'],  # importados con importlib en Main
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
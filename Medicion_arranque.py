@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Marcas de tiempo de arranque para la app, el launcher y el updater.
+
+Desactivado salvo que exista la variable HDM_STARTUP_TIMING:
+  - "1"      -> imprime cada marca en stderr.
+  - carpeta  -> guarda <carpeta>/<programa>.json (lo usa benchmarks/bench_arranque.py).
+Con HDM_SALIR_TRAS_PINTAR=1 la app se cierra apenas pinta su primera ventana
+(para medir arranques repetidos, también con el ejecutable congelado). El updater
+no lo respeta: saltearía el instalador; el benchmark lo cierra por su cuenta.
+
+Cada JSON incluye epoch_* (time.time()) para que quien lanzó el proceso calcule
+el tiempo total desde el spawn, además de los *_ms relativos al proceso.
+"""
+
+import json
+import os
+import sys
+import time
+
+ENV_TIMING = "HDM_STARTUP_TIMING"
+ENV_SALIR = "HDM_SALIR_TRAS_PINTAR"
+
+
+def activo() -> bool:
+    return bool(os.environ.get(ENV_TIMING))
+
+
+class MarcasArranque:
+    """Acumula marcas de un programa y las publica según HDM_STARTUP_TIMING."""
+
+    def __init__(self, programa: str, t0: float = None):
+        self.programa = programa
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.datos = {"programa": programa, "pid": os.getpid(), "congelado": bool(getattr(sys, "frozen", False))}
+
+    def marcar(self, nombre: str, valor_ms: float = None) -> None:
+        """Guarda <nombre>_ms (desde t0, o valor_ms si se indica) y epoch_<nombre>."""
+        if valor_ms is None:
+            valor_ms = (time.perf_counter() - self.t0) * 1000
+        self.datos[f"{nombre}_ms"] = round(valor_ms, 1)
+        self.datos[f"epoch_{nombre}"] = time.time()
+        self.publicar()
+
+    def publicar(self) -> None:
+        destino = os.environ.get(ENV_TIMING)
+        if not destino:
+            return
+        if destino == "1":
+            print(f"[arranque] {self.datos}", file=sys.stderr, flush=True)
+            return
+        try:
+            os.makedirs(destino, exist_ok=True)
+            tmp = os.path.join(destino, f"{self.programa}.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.datos, f)
+            os.replace(tmp, os.path.join(destino, f"{self.programa}.json"))
+        except OSError:
+            pass
+
+    def al_pintar(self, root, nombre: str = "primera_pintura", despues=None, salir: bool = True) -> None:
+        """
+        Marca nombre cuando root queda ociosa por primera vez (ventana ya pintada).
+        despues() se llama a continuación; con HDM_SALIR_TRAS_PINTAR=1 (y salir=True)
+        en su lugar se cierra root. salir=False para un despues() que no se puede saltear.
+        """
+        def _pintada():
+            root.update_idletasks()
+            self.marcar(nombre)
+            if salir and os.environ.get(ENV_SALIR):
+                root.after(0, root.destroy)
+            elif despues is not None:
+                despues()
+        root.after_idle(_pintada)
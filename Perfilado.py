@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+"Perfilar próxima acción" (menú Ayuda de Main): corre UNA acción bajo cProfile
+con la instrumentación por etapas encendida y deja todo en una carpeta para
+que el técnico la mande comprimida:
+
+    %LOCALAPPDATA%\\HelpDeskManagerApp\\perfiles\\<fecha>_<acción>\\
+        perfil.pstats.gz   estadísticas de cProfile (marshal de pstats, gzip)
+        perfil.txt         top de funciones por tiempo acumulado y propio
+        etapas.txt/.json   resumen de Instrumentacion (tiempo y memoria por etapa)
+        entorno.json       versión de Python/SO, CPUs, resultado de la acción
+    ...\\perfiles\\<fecha>_<acción>.zip  la misma carpeta en un zip
+
+Para abrir el perfil:  python -m pstats  (luego "read" del archivo descomprimido)
+o pstats.Stats(ruta_descomprimida).
+
+cProfile mide sólo el hilo que ejecuta la acción; el trabajo de los hilos
+lectores (Db3ToCsv con workers) aparece como espera en el hilo principal, pero
+sí queda desglosado en etapas.txt. Con el modo apagado no se importa ni se
+envuelve nada: este módulo se carga recién al armar el modo.
+"""
+
+import cProfile
+import gzip
+import io
+import json
+import marshal
+import os
+import platform
+import pstats
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import Instrumentacion
+
+PERFILES_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "HelpDeskManagerApp", "perfiles"
+)
+TOP_FUNCIONES = 60
+
+
+def carpeta_nueva(label: str) -> str:
+    """Crea y devuelve perfiles\\<AAAAmmdd_HHMMSS>_<acción>."""
+    nombre = re.sub(r"[^\w-]+", "_", label).strip("_") or "accion"
+    carpeta = os.path.join(PERFILES_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{nombre}")
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+def _texto_top(prof: cProfile.Profile) -> str:
+    out = io.StringIO()
+    st = pstats.Stats(prof, stream=out)
+    st.strip_dirs()
+    out.write("=== Por tiempo acumulado ===\n")
+    st.sort_stats("cumulative").print_stats(TOP_FUNCIONES)
+    out.write("\n=== Por tiempo propio ===\n")
+    st.sort_stats("tottime").print_stats(TOP_FUNCIONES)
+    return out.getvalue()
+
+
+def _guardar(carpeta: str, label: str, prof: cProfile.Profile, run, segundos: float, resultado: str) -> str:
+    prof.create_stats()
+    with gzip.open(os.path.join(carpeta, "perfil.pstats.gz"), "wb") as f:
+        f.write(marshal.dumps(prof.stats))
+    with open(os.path.join(carpeta, "perfil.txt"), "w", encoding="utf-8") as f:
+        f.write(_texto_top(prof))
+
+    if run is not None:
+        with open(os.path.join(carpeta, "etapas.txt"), "w", encoding="utf-8") as f:
+            f.write(run.resumen() + "\n")
+        with open(os.path.join(carpeta, "etapas.json"), "w", encoding="utf-8") as f:
+            json.dump(run.como_dict(), f, ensure_ascii=False, indent=2)
+
+    entorno = {
+        "accion": label,
+        "resultado": resultado,
+        "segundos": round(segundos, 3),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "congelado": bool(getattr(sys, "frozen", False)),
+        "rss_pico_mib": round(Instrumentacion.rss_pico() / 2 ** 20, 1),
+    }
+    with open(os.path.join(carpeta, "entorno.json"), "w", encoding="utf-8") as f:
+        json.dump(entorno, f, ensure_ascii=False, indent=2)
+
+    return shutil.make_archive(carpeta, "zip", root_dir=carpeta)
+
+
+def perfilar(carpeta: str, label: str, fn, memoria: bool = False):
+    """
+    Ejecuta fn() bajo cProfile y con la instrumentación encendida sólo durante
+    la llamada; guarda el perfil en carpeta (también si fn falla o se cancela)
+    y devuelve / relanza lo mismo que fn().
+    """
+    prof = cProfile.Profile()
+    resultado = "ok"
+    previa = Instrumentacion.ultima_corrida()
+    t0 = time.perf_counter()
+    with Instrumentacion.activada(memoria):
+        prof.enable()
+        try:
+            return fn()
+        except BaseException as e:
+            resultado = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            prof.disable()
+            run = Instrumentacion.ultima_corrida()
+            try:
+                _guardar(carpeta, label, prof, run if run is not previa else None,
+                         time.perf_counter() - t0, resultado)
+            except OSError:
+                pass
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Progreso y cancelación cooperativa para procesos largos (sin dependencias de Tk
+ni de pandas: se importa tanto desde la UI como desde los módulos de proceso).
+
+- Callback de progreso: progreso(etapa, hecho, total), llamado desde el hilo
+  que hace el trabajo; quien lo recibe en la UI debe reenviarlo al hilo de Tk.
+- TokenCancelacion: la UI llama cancelar(); el proceso consulta verificar()
+  entre pasos y, dentro de SQLite, vía instalar_en_sqlite (set_progress_handler).
+"""
+
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+# Etapas de procesar_db_a_csv, en orden
+ETAPA_LECTURA = "lectura"
+ETAPA_CONTEO = "conteo"
+ETAPA_DEDUP = "deduplicacion"
+ETAPA_PIVOT = "pivot"
+ETAPA_ESCRITURA = "escritura"
+ETAPAS = (ETAPA_LECTURA, ETAPA_CONTEO, ETAPA_DEDUP, ETAPA_PIVOT, ETAPA_ESCRITURA)
+
+# Instrucciones de la VM de SQLite entre consultas al token (~ms en equipos actuales)
+SQLITE_PASOS_HANDLER = 10_000
+
+Progreso = Callable[[str, int, int], None]
+
+
+class ProcesoCancelado(Exception):
+    """El usuario canceló el proceso; no es un error."""
+
+
+class TokenCancelacion:
+    def __init__(self, padre: Optional["TokenCancelacion"] = None):
+        self._evento = threading.Event()
+        self._padre = padre
+
+    def cancelar(self) -> None:
+        self._evento.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set() or (self._padre is not None and self._padre.cancelado)
+
+    def derivado(self) -> "TokenCancelacion":
+        """
+        Token hijo: queda cancelado si se cancela él o este token, pero cancelarlo
+        no cancela a este (p. ej. cortar lecturas hermanas tras un error real).
+        """
+        return TokenCancelacion(self)
+
+    def verificar(self) -> None:
+        """Lanza ProcesoCancelado si se pidió cancelar."""
+        if self.cancelado:
+            raise ProcesoCancelado("Proceso cancelado por el usuario.")
+
+    def instalar_en_sqlite(self, conn: sqlite3.Connection, pasos: int = SQLITE_PASOS_HANDLER) -> None:
+        """
+        Hace que una consulta en curso sobre conn se interrumpa al cancelar:
+        SQLite aborta con OperationalError('interrupted'), que convertir_error
+        traduce a ProcesoCancelado.
+        """
+        conn.set_progress_handler(lambda: 1 if self.cancelado else 0, pasos)
+
+    def convertir_error(self, exc: BaseException) -> BaseException:
+        """
+        Tras cancelar, cualquier error del paso interrumpido (OperationalError
+        'interrupted', o el DatabaseError con que lo envuelve pandas) se informa
+        como ProcesoCancelado; si no se canceló, devuelve exc sin cambios.
+        """
+        if self.cancelado and not isinstance(exc, ProcesoCancelado):
+            return ProcesoCancelado("Proceso cancelado por el usuario.")
+        return exc
+
+
+def avisar(progreso: Optional[Progreso], etapa: str, hecho: int, total: int,
+           cancelar: Optional[TokenCancelacion] = None) -> None:
+    """Informa progreso (si hay callback) y corta si se pidió cancelar."""
+    if cancelar is not None:
+        cancelar.verificar()
+    if progreso is not None:
+        progreso(etapa, hecho, total)
@@ -2,7 +2,12 @@ import argparse
 import hashlib
 import json
 import os
+import queue
+import stat
 import sys
+import tempfile
+import threading
+import time
 from pathlib import Path
 
 # ---- Opcional GUI (solo si abrís con doble clic) ----
@@ -13,47 +18,147 @@ except Exception:  # si no hay tkinter, seguimos solo CLI
     tk = None
 
 
-CHUNK = 1024 * 1024  # 1 MiB
-
-
-def sha256_file(path: Path, show_progress=True) -> str:
-    """Devuelve el SHA-256 de 'path' leyendo en streaming."""
-    total = path.stat().st_size
+CHUNK = 8 * 1024 * 1024  # 8 MiB (múltiplo de página) por lectura
+BUFFERS = 3              # buffers en vuelo: el lector llena uno mientras se hashea otro
+PROGRESS_EVERY_S = 0.1   # la barra se redibuja a lo sumo 10 veces por segundo
+
+# Cache de hashes: ruta absoluta -> (tamaño, mtime_ns, sha256). Sólo se consulta
+# con --cache (verificación rápida, no escribe sha256.txt ni latest.json): tamaño
+# y mtime iguales no garantizan el mismo contenido, y launcher.py verifica las
+# descargas contra el hash publicado.
+CACHE_FILE = Path(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()) / "HelpDeskManagerApp" / "cache" / "sha256.json"
+
+
+class _Progress:
+    """Barra de consola con redibujo limitado por tiempo (no por bloque)."""
+
+    def __init__(self, total: int, enabled: bool):
+        self.total = total
+        self.enabled = enabled and total > 0
+        self._last = 0.0
+
+    def update(self, done: int, force: bool = False):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if not force and now - self._last < PROGRESS_EVERY_S:
+            return
+        self._last = now
+        pct = int(done * 100 / self.total)
+        bar = "#" * (pct // 4)
+        sys.stdout.write(f"\r[{bar:<25}] {pct:3d}%")
+        sys.stdout.flush()
+
+    def close(self):
+        if self.enabled:
+            self.update(self.total, force=True)
+            sys.stdout.write("\n")
+
+
+def _hash_stream(path: Path, total: int, progress: _Progress) -> str:
+    """
+    SHA-256 con lectura solapada: un hilo lee con readinto() en buffers grandes
+    preasignados y el hilo actual los hashea (hashlib suelta el GIL en update),
+    así el disco/red y la CPU trabajan a la vez. El hash en sí es secuencial.
+    """
+    libres: "queue.Queue[bytearray]" = queue.Queue()
+    for _ in range(BUFFERS):
+        libres.put(bytearray(CHUNK))
+    llenos: queue.Queue = queue.Queue()
+
+    def _leer():
+        try:
+            with path.open("rb", buffering=0) as f:
+                while True:
+                    buf = libres.get()
+                    n = f.readinto(buf)
+                    llenos.put((buf, n))
+                    if not n:
+                        return
+        except BaseException as e:  # se relanza en el hilo que hashea
+            llenos.put((e, 0))
+
+    lector = threading.Thread(target=_leer, name="sha256-read", daemon=True)
+    lector.start()
     h = hashlib.sha256()
     done = 0
-
-    with path.open("rb") as f:
-        while True:
-            b = f.read(CHUNK)
-            if not b:
-                break
-            h.update(b)
-            if show_progress and total:
-                done += len(b)
-                pct = int(done * 100 / total)
-                # barra simple en consola
-                bar = "#" * (pct // 4)
-                sys.stdout.write(f"\r[{bar:<25}] {pct:3d}%")
-                sys.stdout.flush()
-
-    if show_progress and total:
-        sys.stdout.write("\n")
-    return h.hexdigest().lower()
+    while True:
+        buf, n = llenos.get()
+        if isinstance(buf, BaseException):
+            raise buf
+        if not n:
+            break
+        with memoryview(buf) as mv:
+            h.update(mv[:n])
+        libres.put(buf)
+        done += n
+        progress.update(done)
+    lector.join()
+    progress.close()
+    return h.hexdigest()
+
+
+def _load_cache() -> dict:
+    try:
+        return json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: dict):
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cache, indent=1), encoding="utf-8")
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        pass
+
+
+def sha256_file(path: Path, show_progress=True, use_cache=False) -> str:
+    """
+    Devuelve el SHA-256 de 'path' leyendo en streaming y lo guarda en la cache.
+    Con use_cache, si la ruta tiene el mismo tamaño y mtime_ns que la última vez,
+    devuelve el hash guardado sin leer el archivo (no usar para publicar).
+    """
+    st = path.stat()
+    key = os.path.normcase(str(path.resolve()))
+    cache = _load_cache() if use_cache else {}
+    hit = cache.get(key)
+    if hit and hit.get("size") == st.st_size and hit.get("mtime_ns") == st.st_mtime_ns:
+        if show_progress:
+            print("[INFO] Hash tomado de la cache (el archivo no cambió).")
+        return hit["sha256"]
+
+    sha = _hash_stream(path, st.st_size, _Progress(st.st_size, show_progress))
+
+    st2 = path.stat()
+    if (st2.st_size, st2.st_mtime_ns) == (st.st_size, st.st_mtime_ns):  # no cambió mientras se leía
+        cache = _load_cache()
+        cache[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+        _save_cache(cache)
+    return sha
 
 
 def find_latest_exe(candidates: list[Path]) -> Path | None:
-    """Busca el .exe más nuevo dentro de las carpetas candidatas."""
-    exes: list[Path] = []
+    """Busca el .exe más nuevo dentro de las carpetas candidatas (un stat por archivo)."""
+    best: tuple[int, Path] | None = None
     for base in candidates:
-        if not base.exists():
+        try:
+            entries = os.scandir(base)
+        except OSError:
             continue
-        for p in base.glob("*.exe"):
-            if p.is_file():
-                exes.append(p)
-    if not exes:
-        return None
-    exes.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return exes[0]
+        with entries:
+            for e in entries:
+                if not e.name.lower().endswith(".exe"):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and (best is None or st.st_mtime_ns > best[0]):
+                    best = (st.st_mtime_ns, Path(e.path))
+    return best[1] if best else None
 
 
 def copy_to_clipboard(text: str):
@@ -141,6 +246,9 @@ def cli_flow():
     parser.add_argument("--version", help="Versión para latest.json, ej: v1.0.8 (opcional)")
     parser.add_argument("--outdir", help="Carpeta donde escribir sha256.txt/latest.json (por defecto: carpeta del .exe)")
     parser.add_argument("--no-progress", action="store_true", help="No mostrar barra de progreso")
+    parser.add_argument("--cache", action="store_true",
+                        help="Verificación rápida: reutiliza el hash guardado si el archivo no cambió"
+                             " (no escribe sha256.txt ni latest.json)")
     args = parser.parse_args()
 
     script_dir = Path(__file__).resolve().parent
@@ -168,10 +276,13 @@ def cli_flow():
             sys.exit(1)
 
     print(f"Archivo: {exe}")
-    sha = sha256_file(exe, show_progress=not args.no_progress)
+    sha = sha256_file(exe, show_progress=not args.no_progress, use_cache=args.cache)
     print(f"SHA-256: {sha}")
 
     copy_to_clipboard(sha)
+    if args.cache:
+        print("[INFO] Con --cache no se escriben sha256.txt ni latest.json; correr sin --cache para publicar.")
+        return
 
     out_dir = Path(args.outdir).resolve() if args.outdir else exe.parent
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Cache columnar (NumPy .npy, memory-mapped) de la tabla counters ya decodificada.
+
+Cada snapshot guarda, en orden de rowid, las filas de clases 40/10/20 SIN filtro
+de fecha:
+  - serial / model : códigos int32 + categorías (JSON)
+  - readdate       : int64 (ns desde epoch; NaT = mínimo int64)
+  - readvalue      : dtype original (int64 o float64 si hay NULL)
+  - counterclass_id: int64
+Así, convertir la misma DB con otra fecha_maxima no vuelve a consultar SQLite
+ni a parsear fechas: se mapea el snapshot y se filtra readdate como entero.
+
+El snapshot se asocia a la huella del archivo origen (tamaño + mtime + hash de
+cabecera/cola, más tamaño y mtime del '-wal': en modo WAL los commits no tocan
+el archivo principal hasta el checkpoint). El cache total se limita a SNAPSHOT_MAX_BYTES con desalojo LRU.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import sqlite3
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from Sqlite_lectura import firma_wal
+
+SNAPSHOT_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "HelpDeskManagerApp", "cache", "snapshots"
+)
+SNAPSHOT_MAX_BYTES = 2 * 1024 ** 3
+SNAPSHOT_VERSION = 1
+
+_MUESTRA_HUELLA = 1024 * 1024  # bytes de cabecera y de cola que entran en el hash
+_NAT = np.iinfo(np.int64).min
+
+# Forma exacta 'YYYY-MM-DD HH:MM:SS' (sin '*': GLOB compara el texto completo)
+_GLOB_FECHA_ISO = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'"
+
+
+def fechas_iso_estrictas(conn: sqlite3.Connection, desde_rowid: int = 0) -> bool:
+    """
+    True si toda readdate no nula de counters (clases 40/10/20, rowid > desde_rowid)
+    es texto 'YYYY-MM-DD HH:MM:SS'. Sólo así la comparación y el MAX de texto de
+    SQLite ordenan igual que las fechas parseadas: '2024-01-02' (sin hora), una 'T'
+    o un sufijo de zona horaria comparan distinto contra 'YYYY-MM-DD 00:00:00'.
+    """
+    (hay_otras,) = conn.execute(
+        "SELECT EXISTS (SELECT 1 FROM counters WHERE rowid > ? AND counterclass_id IN (40,10,20)"
+        f" AND readdate IS NOT NULL AND NOT (length(readdate) = 19 AND readdate GLOB {_GLOB_FECHA_ISO}))",
+        (desde_rowid,),
+    ).fetchone()
+    return not hay_otras
+
+
+def huella_archivo(path: str) -> dict:
+    """Huella barata del contenido: tamaño, mtime y SHA-1 de cabecera + cola, y firma del -wal."""
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read(_MUESTRA_HUELLA))
+        if st.st_size > _MUESTRA_HUELLA:
+            f.seek(max(_MUESTRA_HUELLA, st.st_size - _MUESTRA_HUELLA))
+            h.update(f.read(_MUESTRA_HUELLA))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": h.hexdigest(), "wal": firma_wal(path)}
+
+
+def _carpeta(path: str) -> str:
+    clave = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()[:20]
+    return os.path.join(SNAPSHOT_DIR, clave)
+
+
+def _tamano(carpeta: str) -> int:
+    return sum(e.stat().st_size for e in os.scandir(carpeta) if e.is_file())
+
+
+def _desalojar(max_bytes: int, conservar: Optional[str] = None) -> None:
+    """Borra snapshots menos usados (mtime de meta.json) hasta quedar bajo max_bytes."""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return
+    entradas = []
+    for e in os.scandir(SNAPSHOT_DIR):
+        meta = os.path.join(e.path, "meta.json")
+        if e.is_dir() and os.path.isfile(meta):
+            entradas.append((os.stat(meta).st_mtime_ns, e.path, _tamano(e.path)))
+    total = sum(t for _, _, t in entradas)
+    for _, carpeta, tamano in sorted(entradas):
+        if total <= max_bytes:
+            break
+        if carpeta == conservar:
+            continue
+        shutil.rmtree(carpeta, ignore_errors=True)
+        total -= tamano
+
+
+def construir_snapshot(conn: sqlite3.Connection, path: str, huella: dict) -> bool:
+    """
+    Vuelca counters (clases 40/10/20) de conn a un snapshot para path.
+    Devuelve False (sin snapshot) si alguna readdate no es exactamente
+    'YYYY-MM-DD HH:MM:SS' (ver fechas_iso_estrictas): en ese caso el filtro entero
+    no replicaría la comparación de texto de SQLite.
+    """
+    if not fechas_iso_estrictas(conn):
+        return False
+
+    df = pd.read_sql(
+        "SELECT serialnumber, readdate, readvalue, model, counterclass_id "
+        "FROM counters WHERE counterclass_id IN (40,10,20) ORDER BY rowid",
+        conn,
+    )
+    fechas = pd.to_datetime(df["readdate"], errors="coerce")
+    if (fechas.isna() & df["readdate"].notna()).any():
+        return False
+    if df["readvalue"].dtype.kind not in "if" or df["counterclass_id"].dtype.kind != "i":
+        return False
+
+    serial_codes, serial_cats = pd.factorize(df["serialnumber"], sort=True)
+    model_codes, model_cats = pd.factorize(df["model"], sort=True)
+
+    destino = _carpeta(path)
+    tmp = destino + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "serial.npy"), serial_codes.astype(np.int32))
+    np.save(os.path.join(tmp, "model.npy"), model_codes.astype(np.int32))
+    np.save(
+        os.path.join(tmp, "readdate.npy"),
+        fechas.to_numpy(dtype="datetime64[ns]").view(np.int64),
+    )
+    np.save(os.path.join(tmp, "readvalue.npy"), df["readvalue"].to_numpy())
+    np.save(os.path.join(tmp, "counterclass_id.npy"), df["counterclass_id"].to_numpy(dtype=np.int64))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": SNAPSHOT_VERSION,
+            "origen": os.path.abspath(path),
+            "huella": huella,
+            "serial": serial_cats.tolist(),
+            "model": model_cats.tolist(),
+        }, f)
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(tmp, destino)
+
+    _desalojar(SNAPSHOT_MAX_BYTES, conservar=destino)
+    return True
+
+
+def leer_snapshot(path: str, huella: dict, limite: Optional[str]) -> Optional[pd.DataFrame]:
+    """
+    Devuelve las lecturas del snapshot de path (mismas columnas y orden que la consulta
+    SQL) aplicando readdate < limite ('YYYY-MM-DD HH:MM:SS'). None si no hay snapshot
+    vigente para esa huella.
+    """
+    carpeta = _carpeta(path)
+    meta_path = os.path.join(carpeta, "meta.json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != SNAPSHOT_VERSION or meta.get("huella") != huella:
+        return None
+    os.utime(meta_path)  # marca de uso para el LRU
+
+    def _mmap(nombre):
+        return np.load(os.path.join(carpeta, nombre + ".npy"), mmap_mode="r")
+
+    fechas = _mmap("readdate")
+    if limite:
+        corte = np.datetime64(limite.replace(" ", "T"), "ns").view(np.int64)
+        # NULL (NaT) queda afuera, igual que 'readdate < ?' en SQLite
+        filas = np.flatnonzero((fechas < corte) & (fechas != _NAT))
+    else:
+        filas = slice(None)
+
+    serial_cats = np.array(meta["serial"], dtype=object)
+    model_cats = np.array(meta["model"], dtype=object)
+    serial = _mmap("serial")[filas]
+    model = _mmap("model")[filas]
+    return pd.DataFrame({
+        # código -1 = NULL en factorize
+        "serialnumber": np.where(serial >= 0, serial_cats.take(serial, mode="clip"), None)
+        if len(serial_cats) else np.full(len(serial), None, dtype=object),
+        "readdate": pd.to_datetime(np.asarray(fechas[filas]).view("datetime64[ns]")),
+        "readvalue": np.asarray(_mmap("readvalue")[filas]),
+        "model": np.where(model >= 0, model_cats.take(model, mode="clip"), None)
+        if len(model_cats) else np.full(len(model), None, dtype=object),
+        "counterclass_id": np.asarray(_mmap("counterclass_id")[filas]),
+    })
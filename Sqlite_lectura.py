@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Perfil de conexión SQLite de SOLO LECTURA para los flujos de extracción
+(Db3ToCsv, Extraer_ips, old_AutoCSV).
+
+- URI 'mode=ro': no toma locks de escritura.
+- PRAGMA query_only, mmap_size y cache_size más grandes: las DB grandes se
+  recorren con menos syscalls de lectura.
+
+'immutable=1' (inmutable=True) es opcional: SQLite deja de mirar locks, el
+-wal y los cambios del archivo. Sólo vale para archivos que nadie escribe
+(copias indexadas del cache, rotados '.db3.N', ver es_archivo_estatico); una
+PrinterMonitorClient.db3 "viva" en modo WAL se leería incompleta sin error.
+
+Por lo mismo, toda huella del origen que decida si un cache sigue vigente
+(tamaño, mtime, cabecera) tiene que sumar firma_wal: los commits quedan en el
+'-wal' hasta el checkpoint sin tocar el archivo principal.
+"""
+
+import os
+import re
+import sqlite3
+from typing import Optional
+from urllib.parse import quote
+
+MMAP_SIZE_DEFAULT = 256 * 1024 * 1024   # bytes mapeados en memoria por conexión
+CACHE_KIB_DEFAULT = 64 * 1024           # page cache en KiB (cache_size negativo)
+
+# Rotados de PrinterMonitorClient: 'xxx.db3.1', 'xxx.db3.2', ... (ya no se escriben)
+_ROTADO_RE = re.compile(r"\.db3\.\d+$", re.IGNORECASE)
+
+
+def es_archivo_estatico(path: str) -> bool:
+    """True si path es un rotado '.db3.N', que se puede abrir con inmutable=True."""
+    return bool(_ROTADO_RE.search(path))
+
+
+def firma_wal(path: str) -> Optional[list]:
+    """[tamaño, mtime_ns] del '-wal' de path, o None si no hay o está vacío."""
+    try:
+        st = os.stat(path + "-wal")
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns] if st.st_size else None
+
+
+def uri_solo_lectura(path: str, inmutable: bool = False) -> str:
+    """Arma la URI 'file:' (con escape) para abrir path en modo lectura."""
+    p = os.path.abspath(path).replace("\\", "/")
+    # '/x' (POSIX) o '//srv/share' (UNC) -> autoridad vacía; 'C:/x' -> 'file:///C:/x'
+    prefijo = "file://" if p.startswith("/") else "file:///"
+    uri = prefijo + quote(p, safe="/:") + "?mode=ro"
+    if inmutable:
+        uri += "&immutable=1"
+    return uri
+
+
+def conectar_solo_lectura(
+    path: str,
+    *,
+    inmutable: bool = False,
+    mmap_size: int = MMAP_SIZE_DEFAULT,
+    cache_kib: int = CACHE_KIB_DEFAULT,
+    timeout: float = 5.0,
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """
+    Abre path en solo lectura con el perfil de extracción.
+    Lanza sqlite3.Error si no se puede abrir; el caller maneja excepciones.
+    """
+    conn = sqlite3.connect(
+        uri_solo_lectura(path, inmutable=inmutable),
+        uri=True,
+        timeout=timeout,
+        check_same_thread=check_same_thread,
+    )
+    try:
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {-abs(int(cache_kib))}")
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de arranque: app (HelpDeskManagerApp), launcher (HelpDeskLauncher)
+y updater (HelpDeskUpdater), desde el código fuente o desde los ejecutables
+congelados (PyInstaller onedir).
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones 5] [--congelado dist/HelpDeskManagerApp]
+                                        [--salida arranque.json] [--comparar anterior.json]
+                                        [--etiqueta v1.1.6]
+
+Mide, cada uno N veces (se informa mediana / mín / máx):
+  - import time por módulo (python -X importtime; solo desde fuente)
+  - spawn -> primera pintura Tk de la app y del updater
+  - launcher: spawn -> popup, spawn -> handoff (Popen de la app en launcher.main)
+    y spawn -> primera pintura de la app lanzada
+Los programas reportan sus marcas con Medicion_arranque (HDM_STARTUP_TIMING); la
+app se cierra sola al pintar (HDM_SALIR_TRAS_PINTAR). El launcher y el updater se
+corren desde fuente envueltos (ENVOLTURA_*): el launcher con REMOTE_ROOT apuntando
+a un share falso y el updater con run_installer reemplazado por cerrar la ventana.
+Con --congelado sólo se mide la app (los .exe no se pueden redirigir así).
+En Linux sin DISPLAY se levanta un Xvfb temporal. El resultado se guarda como
+JSON para comparar releases.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTADOS_DIR = os.path.join(RAIZ, "benchmarks", "resultados")
+
+MODULOS_IMPORT = ("Main", "launcher", "update_runner", "Updater", "Db3ToCsv", "CsvEn0", "Clientes_suma")
+EXE = ".exe" if os.name == "nt" else ""
+TIMEOUT_S = 120
+
+# Sólo para el benchmark: los programas de producción no aceptan estos desvíos
+ENVOLTURA_LAUNCHER = "import sys, launcher; launcher.REMOTE_ROOT = sys.argv.pop(1); launcher.main()"
+ENVOLTURA_UPDATER = (
+    "import update_runner as u; "
+    "u.run_installer = lambda path, lbl, pbar, on_done: lbl.after_idle(lbl.winfo_toplevel().destroy); "
+    "u.main()"
+)
+
+
+def _resumen(valores):
+    valores = [v for v in valores if v is not None]
+    if not valores:
+        return None
+    return {
+        "mediana": round(statistics.median(valores), 1),
+        "min": round(min(valores), 1),
+        "max": round(max(valores), 1),
+        "muestras": len(valores),
+    }
+
+
+# ---------------------- import time ----------------------
+
+def _parsear_importtime(stderr: str):
+    """Devuelve [(modulo, propio_us, acumulado_us, nivel)] de la salida de -X importtime."""
+    filas = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|", 2)
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        filas.append((nombre.strip(), int(propio), int(acumulado), nivel))
+    return filas
+
+
+def medir_importtime(modulo: str, repeticiones: int) -> dict:
+    totales, mas_lentos, pesados = [], None, None
+    codigo = (f"import sys; import {modulo}; "
+              "print(int('pandas' in sys.modules), int('numpy' in sys.modules))")
+    for _ in range(repeticiones):
+        r = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", codigo],
+            cwd=RAIZ, capture_output=True, text=True, timeout=TIMEOUT_S,
+        )
+        if r.returncode != 0:
+            return {"error": (r.stderr.strip().splitlines() or ["?"])[-1]}
+        filas = _parsear_importtime(r.stderr)
+        total = next((acu for nombre, _, acu, nivel in filas if nombre == modulo and nivel == 0), None)
+        totales.append(total / 1000 if total is not None else None)
+        mas_lentos = sorted(filas, key=lambda f: f[1], reverse=True)[:10]
+        pandas, numpy = r.stdout.split()
+        pesados = {"pandas": pandas == "1", "numpy": numpy == "1"}
+    return {
+        "total_ms": _resumen(totales),
+        "carga": pesados,  # ¿el import arrastra pandas/numpy? (Main no debería)
+        "propio_mas_lento_ms": [(nombre, round(propio / 1000, 1)) for nombre, propio, _, _ in mas_lentos],
+    }
+
+
+# ---------------------- display virtual ----------------------
+
+@contextmanager
+def display_virtual(desactivar: bool = False):
+    """En Linux sin DISPLAY levanta Xvfb (-displayfd) mientras dure el bloque."""
+    if desactivar or not sys.platform.startswith("linux") or os.environ.get("DISPLAY"):
+        yield os.environ.get("DISPLAY", "")
+        return
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise RuntimeError("No hay DISPLAY ni Xvfb instalado (apt install xvfb).")
+    leer, escribir = os.pipe()
+    proc = subprocess.Popen(
+        [xvfb, "-displayfd", str(escribir), "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+        pass_fds=(escribir,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    os.close(escribir)
+    try:
+        with os.fdopen(leer) as f:
+            numero = f.readline().strip()
+        if not numero:
+            raise RuntimeError("Xvfb no informó número de display.")
+        os.environ["DISPLAY"] = f":{numero}"
+        yield os.environ["DISPLAY"]
+    finally:
+        os.environ.pop("DISPLAY", None)
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+# ---------------------- arranques con Tk ----------------------
+
+def _entorno(carpeta_marcas: str, extra: dict = None) -> dict:
+    env = dict(os.environ)
+    env["HDM_STARTUP_TIMING"] = carpeta_marcas
+    env["HDM_SALIR_TRAS_PINTAR"] = "1"
+    env.update(extra or {})
+    return env
+
+
+def _esperar_json(path: str, timeout: float) -> dict:
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        time.sleep(0.02)
+    raise TimeoutError(f"No apareció {path}")
+
+
+def _desde_spawn(marcas: dict, nombre: str, t_spawn: float):
+    epoch = marcas.get(f"epoch_{nombre}")
+    return None if epoch is None else (epoch - t_spawn) * 1000
+
+
+def medir_pintura(cmd, programa: str, repeticiones: int, extra_env: dict = None) -> dict:
+    """spawn -> primera pintura de un programa que usa MarcasArranque.al_pintar."""
+    spawn, proceso = [], []
+    for _ in range(repeticiones):
+        with tempfile.TemporaryDirectory(prefix="hdm-arranque-") as carpeta:
+            t_spawn = time.time()
+            subprocess.run(cmd, cwd=RAIZ, env=_entorno(carpeta, extra_env), timeout=TIMEOUT_S,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            marcas = _esperar_json(os.path.join(carpeta, f"{programa}.json"), 1)
+            spawn.append(_desde_spawn(marcas, "primera_pintura", t_spawn))
+            proceso.append(marcas.get("primera_pintura_ms"))
+    return {"spawn_a_pintura_ms": _resumen(spawn), "proceso_a_pintura_ms": _resumen(proceso)}
+
+
+def _exe_falso_app(carpeta: str, cmd_app) -> str:
+    """Ejecutable que el launcher lanza como si fuera la app (envuelve cmd_app)."""
+    if os.name == "nt":
+        ruta = os.path.join(carpeta, "HelpDeskManagerApp.cmd")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("@echo off\r\n" + subprocess.list2cmdline(cmd_app) + "\r\n")
+    else:
+        ruta = os.path.join(carpeta, "HelpDeskManagerApp")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\nexec " + " ".join(f"'{c}'" for c in cmd_app) + "\n")
+        os.chmod(ruta, 0o755)
+    return ruta
+
+
+def medir_launcher(cmd_launcher, cmd_app, repeticiones: int) -> dict:
+    """
+    Caso "ya al día": share falso con latest.json de la misma versión que current.json,
+    así launcher.main pasa directo a launch(). Mide popup, handoff y pintura de la app.
+    """
+    popup, handoff, app = [], [], []
+    for _ in range(repeticiones):
+        with tempfile.TemporaryDirectory(prefix="hdm-launcher-") as tmp:
+            marcas_dir = os.path.join(tmp, "marcas")
+            share = os.path.join(tmp, "share")
+            local = os.path.join(tmp, "local")
+            os.makedirs(share)
+            os.makedirs(os.path.join(local, "HelpDeskManagerApp"))
+            exe = _exe_falso_app(tmp, cmd_app)
+            with open(os.path.join(share, "latest.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": "bench", "filename": "bench.zip", "main_exe": os.path.basename(exe)}, f)
+            with open(os.path.join(local, "HelpDeskManagerApp", "current.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": "bench", "path": os.path.dirname(exe), "exe": os.path.basename(exe)}, f)
+
+            env = _entorno(marcas_dir, {"LOCALAPPDATA": local})
+            t_spawn = time.time()
+            subprocess.run(cmd_launcher + [share], cwd=RAIZ, env=env, timeout=TIMEOUT_S,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            m_launcher = _esperar_json(os.path.join(marcas_dir, "HelpDeskLauncher.json"), 1)
+            m_app = _esperar_json(os.path.join(marcas_dir, "HelpDeskManagerApp.json"), TIMEOUT_S)
+            popup.append(_desde_spawn(m_launcher, "popup", t_spawn))
+            handoff.append(_desde_spawn(m_launcher, "handoff", t_spawn))
+            app.append(_desde_spawn(m_app, "primera_pintura", t_spawn))
+    return {
+        "spawn_a_popup_ms": _resumen(popup),
+        "spawn_a_handoff_ms": _resumen(handoff),
+        "spawn_a_pintura_app_ms": _resumen(app),
+    }
+
+
+# ---------------------- comparación ----------------------
+
+def _aplanar(d: dict, prefijo: str = ""):
+    for k, v in d.items():
+        clave = f"{prefijo}{k}"
+        if isinstance(v, dict) and "mediana" in v:
+            yield clave, v["mediana"]
+        elif isinstance(v, dict):
+            yield from _aplanar(v, clave + ".")
+
+
+def comparar(anterior: dict, actual: dict) -> None:
+    previo = dict(_aplanar(anterior.get("medidas", {})))
+    print(f"\nComparación contra {anterior.get('etiqueta') or anterior.get('fecha')}:")
+    for clave, valor in _aplanar(actual["medidas"]):
+        antes = previo.get(clave)
+        if antes:
+            print(f"  {clave:<55} {antes:9.1f} -> {valor:9.1f} ms ({(valor - antes) / antes:+.0%})")
+        else:
+            print(f"  {clave:<55} {'-':>9} -> {valor:9.1f} ms")
+
+
+# ---------------------- main ----------------------
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark de arranque de app, launcher y updater.")
+    ap.add_argument("--repeticiones", type=int, default=5)
+    ap.add_argument("--congelado", help="Carpeta con los .exe de PyInstaller (onedir); por defecto, desde fuente")
+    ap.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/arranque-<fecha>.json)")
+    ap.add_argument("--comparar", help="JSON de una corrida anterior para mostrar diferencias")
+    ap.add_argument("--etiqueta", default="", help="Texto libre para identificar la corrida (p. ej. la versión)")
+    ap.add_argument("--sin-display-virtual", action="store_true", help="No levantar Xvfb aunque falte DISPLAY")
+    args = ap.parse_args(argv)
+    n = max(1, args.repeticiones)
+
+    inexistente = os.path.join(tempfile.gettempdir(), "hdm-bench-no-existe")
+    if args.congelado:
+        cmd_app = [os.path.join(os.path.abspath(args.congelado), "HelpDeskManagerApp" + EXE)]
+    else:
+        cmd_app = [sys.executable, os.path.join(RAIZ, "Main.py")]
+    cmd_updater = [sys.executable, "-c", ENVOLTURA_UPDATER, "--installer", inexistente, "--app", inexistente]
+    cmd_launcher = [sys.executable, "-c", ENVOLTURA_LAUNCHER]
+
+    medidas = {}
+    if not args.congelado:
+        print("Import time por módulo…", flush=True)
+        medidas["import"] = {m: medir_importtime(m, n) for m in MODULOS_IMPORT}
+
+    print("Arranques con Tk…", flush=True)
+    try:
+        with display_virtual(args.sin_display_virtual):
+            medidas["app"] = medir_pintura(cmd_app, "HelpDeskManagerApp", n)
+            if not args.congelado:
+                medidas["updater"] = medir_pintura(cmd_updater, "HelpDeskUpdater", n)
+                medidas["launcher"] = medir_launcher(cmd_launcher, cmd_app, n)
+    except (RuntimeError, TimeoutError, subprocess.TimeoutExpired) as e:
+        print(f"[AVISO] Mediciones con Tk omitidas: {e}", file=sys.stderr)
+        medidas["tk_omitido"] = str(e)
+
+    resultado = {
+        "etiqueta": args.etiqueta,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "modo": "congelado" if args.congelado else "fuente",
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticiones": n,
+        "medidas": medidas,
+    }
+
+    salida = args.salida or os.path.join(
+        RESULTADOS_DIR, f"arranque-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    for clave, valor in _aplanar(medidas):
+        print(f"  {clave:<55} {valor:9.1f} ms")
+    print(f"\nResultados en: {salida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            comparar(json.load(f), resultado)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
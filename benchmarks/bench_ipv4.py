@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Paridad y velocidad del parser IPv4 de Extraer_ips.
+
+1) Paridad: parse_prefix24(s) debe aceptar exactamente lo mismo que parse_ipv4(s)
+   (y dar el mismo /24) sobre casos límite + cadenas aleatorias. Si hay alguna
+   diferencia se listan y el script termina con código 1.
+2) Velocidad: camino anterior (parse_ipv4 -> str -> split -> set de "A.B.C" ->
+   sort con IPv4Address) contra el actual (parse_prefix24 -> set de enteros ->
+   sort de enteros), sobre valores distintos (lo que llega con SELECT DISTINCT)
+   y sobre filas con repetición (distinct=False).
+
+Uso:
+    python benchmarks/bench_ipv4.py [--valores 200000] [--fuzz 200000] [--redes 400] [--semilla 0]
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Extraer_ips import parse_ipv4, parse_prefix24, add_prefixes_24, prefix24_to_str  # noqa: E402
+
+CASOS_LIMITE = [
+    "", " ", "\t\n", "0.0.0.0", "255.255.255.255", "256.1.1.1", "1.1.1.256", "01.1.1.1", "1.1.1.01",
+    "1.1.1.00", "00.0.0.0", "1.1.1", "1.1.1.1.", ".1.1.1.1", "1..1.1", "+1.1.1.1", "-1.1.1.1",
+    "1.1.1.1/24", "1.1.1.1%eth0", "1.1.1.1:80", "1.1.1.1 puerto 80", "  10.0.0.1  ", "10.0.0.1\tx",
+    "\u00a010.0.0.1", "10.0.0.1\u2003y", "١.1.1.1", "１.1.1.1", "1.1.1.1\u0660", "1.1.1.1x",
+    "0x1.1.1.1", "1e2.1.1.1", "::1", "::ffff:1.2.3.4", "fe80::1", "1.2.3.4.5", "1234.1.1.1",
+    "0001.1.1.1", "199.200.249.250", "249.250.251.252", "100.100.100.100", "b'10.0.0.1'",
+    "None", "10.5", "167772161",
+]
+ALFABETO_FUZZ = "0123456789" * 4 + "....." + " \t:/%x-+" + "\u0660\uff11\u00a0"
+
+
+def _fuzz(rng: random.Random, n: int):
+    for _ in range(n):
+        if rng.random() < 0.5:
+            # casi-IPs: 3 a 5 grupos de 0 a 4 caracteres
+            grupos = ["".join(rng.choice(ALFABETO_FUZZ) for _ in range(rng.randint(0, 4)))
+                      for _ in range(rng.randint(3, 5))]
+            yield ".".join(grupos)
+        else:
+            yield "".join(rng.choice(ALFABETO_FUZZ) for _ in range(rng.randint(0, 20)))
+
+
+def _ip_aleatoria(rng: random.Random, redes) -> str:
+    s = f"{rng.choice(redes)}.{rng.randint(0, 255)}"
+    r = rng.random()
+    if r < 0.05:
+        return s + " puerto 9100"
+    if r < 0.08:
+        return "fe80::1"
+    if r < 0.10:
+        return "sin-ip"
+    return s
+
+
+def _esperado(s: str):
+    ip = parse_ipv4(s)
+    return None if ip is None else int(ip) >> 8
+
+
+def paridad(valores) -> list:
+    return [(s, _esperado(s), parse_prefix24(s)) for s in valores if _esperado(s) != parse_prefix24(s)]
+
+
+def camino_anterior(valores) -> list:
+    prefixes = set()
+    for raw in valores:
+        ip4 = parse_ipv4(raw)
+        if ip4 is None:
+            continue
+        a, b, c, _ = str(ip4).split(".")
+        prefixes.add(f"{a}.{b}.{c}")
+    return sorted(prefixes, key=lambda pfx: ipaddress.IPv4Address(pfx + ".0"))
+
+
+def camino_actual(valores) -> list:
+    return [prefix24_to_str(p) for p in sorted(add_prefixes_24(valores, set()))]
+
+
+def _cronometrar(fn, valores, repeticiones: int):
+    mejor, res = float("inf"), None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        res = fn(valores)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, res
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Paridad y velocidad de parse_prefix24 vs parse_ipv4.")
+    ap.add_argument("--valores", type=int, default=200_000, help="Valores por escenario de velocidad")
+    ap.add_argument("--fuzz", type=int, default=200_000, help="Cadenas aleatorias para la paridad")
+    ap.add_argument("--redes", type=int, default=400, help="/24 distintas en los valores")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--semilla", type=int, default=0)
+    args = ap.parse_args(argv)
+    rng = random.Random(args.semilla)
+
+    print("Paridad…", flush=True)
+    redes = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}" for _ in range(args.redes)]
+    muestras = [_ip_aleatoria(rng, redes) for _ in range(10_000)]
+    difs = paridad(CASOS_LIMITE + muestras + list(_fuzz(rng, args.fuzz)))
+    total = len(CASOS_LIMITE) + len(muestras) + args.fuzz
+    if difs:
+        print(f"  {len(difs)} diferencias de {total:,} valores:")
+        for s, esperado, obtenido in difs[:30]:
+            print(f"    {s!r}: parse_ipv4 -> {esperado}, parse_prefix24 -> {obtenido}")
+        return 1
+    print(f"  OK: {total:,} valores, mismas aceptaciones y mismos /24")
+
+    # Distintos: una IP por equipo (lo que devuelve SELECT DISTINCT). Filas: cada IP repetida.
+    distintos = list({_ip_aleatoria(rng, redes) for _ in range(args.valores)})
+    filas = [rng.choice(distintos[:2000]) for _ in range(args.valores)]
+    print(f"{'escenario':<12} {'valores':>9} {'anterior s':>11} {'actual s':>9} {'x':>6}")
+    for nombre, valores in (("distintos", distintos), ("filas", filas)):
+        t_ant, r_ant = _cronometrar(camino_anterior, valores, args.repeticiones)
+        t_act, r_act = _cronometrar(camino_actual, valores, args.repeticiones)
+        if r_ant != r_act:
+            print(f"  {nombre}: la salida difiere entre caminos")
+            return 1
+        print(f"{nombre:<12} {len(valores):>9,} {t_ant:11.3f} {t_act:9.3f} {t_ant / t_act:6.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del pipeline de datos sobre datos sintéticos (ver datos_sinteticos.py).
+
+Uso:
+    python benchmarks/bench_pipeline.py [--datos CARPETA] [--repeticiones 3]
+        [--pipelines autocsv,autocsv_sql,csven0,suma_fija,ips,ips_filas]
+        [--salida pipeline.json] [--comparar anterior.json]
+        [--dbs 2 --series 5000 --lecturas 60 --especiales 0.2 --redes 40 ...]
+
+Sin --datos genera un juego nuevo en una carpeta temporal (con --datos y la
+carpeta ya poblada, reutiliza los archivos). Cada corrida de cada pipeline se
+hace en un proceso aparte, así el pico de RSS no arrastra corridas anteriores.
+Los picos son siempre muestreados dentro del hijo (el total es el máximo de sus
+etapas): en Linux ru_maxrss pasa del padre al hijo a través de fork+exec, así
+que getrusage informaría el RSS del orquestador.
+Por etapa se informa tiempo de pared, filas/s y pico de RSS (muestreado);
+las etapas de procesar_db_a_csv salen de su callback de progreso.
+De las repeticiones se guarda la de menor tiempo total.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PIPELINES = ("autocsv", "autocsv_paralelo", "autocsv_sql", "csven0", "suma_fija", "ips", "ips_filas")
+FECHA_CORTE = "31/10/2026"
+MUESTREO_S = 0.005
+
+
+# ---------------------- memoria ----------------------
+
+from Instrumentacion import rss_actual  # noqa: E402
+
+
+class MedidorEtapas:
+    """
+    Cronometra etapas (la actual termina cuando empieza la siguiente) y muestrea
+    el RSS en un hilo para registrar el pico de cada una.
+    """
+
+    def __init__(self):
+        self.etapas = {}
+        self._actual = None
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.etapa(None)
+        self._fin.set()
+        self._hilo.join()
+
+    def etapa(self, nombre, filas=None):
+        ahora = time.perf_counter()
+        if self._actual is not None:
+            e = self.etapas[self._actual]
+            e["segundos"] = ahora - e.pop("_t0")
+        self._actual = nombre
+        if nombre is not None:
+            self.etapas[nombre] = {"_t0": ahora, "filas": filas, "pico_rss": rss_actual()}
+
+    def filas(self, nombre, filas):
+        if nombre in self.etapas:
+            self.etapas[nombre]["filas"] = filas
+
+    def _muestrear(self):
+        while not self._fin.wait(MUESTREO_S):
+            actual = self._actual
+            if actual is not None:
+                e = self.etapas.get(actual)
+                if e is not None:
+                    e["pico_rss"] = max(e["pico_rss"], rss_actual())
+
+
+# ---------------------- pipelines (en el proceso hijo) ----------------------
+
+def _correr_autocsv(datos: dict, salida: str, medidor: MedidorEtapas, **kwargs) -> None:
+    from Db3ToCsv import procesar_db_a_csv
+    from Progreso import ETAPA_LECTURA, ETAPA_CONTEO, ETAPA_DEDUP, ETAPA_PIVOT, ETAPA_ESCRITURA
+
+    def progreso(etapa, hecho, total):
+        if etapa == ETAPA_LECTURA and etapa != medidor._actual:
+            medidor.etapa(etapa, datos["filas_db"])  # filas de counters recorridas en SQLite
+        elif etapa != medidor._actual:
+            medidor.etapa(etapa, total)
+        elif etapa in (ETAPA_CONTEO, ETAPA_DEDUP, ETAPA_PIVOT, ETAPA_ESCRITURA) and hecho == 0:
+            medidor.filas(etapa, total)
+
+    procesar_db_a_csv(datos["dbs"], FECHA_CORTE, "bench", carpeta_salida=salida,
+                      progreso=progreso, **kwargs)
+
+
+def _correr_csven0(datos: dict, salida: str, medidor: MedidorEtapas) -> None:
+    from CsvEn0 import filtrar_falta_contador_csv
+    medidor.etapa("total", datos["filas_csv"])
+    filtrar_falta_contador_csv(datos["csv"], FECHA_CORTE, "bench", carpeta_salida=salida)
+
+
+def _correr_suma_fija(datos: dict, salida: str, medidor: MedidorEtapas) -> None:
+    from Clientes_suma import convertir_xls_a_csv_arcos_archivo
+    medidor.etapa("total", datos["filas_xls"])
+    convertir_xls_a_csv_arcos_archivo(datos["xls"], FECHA_CORTE, 150, os.path.join(salida, "suma_fija.csv"))
+
+
+def _correr_ips(datos: dict, salida: str, medidor: MedidorEtapas, **kwargs) -> None:
+    from Extraer_ips import generate_ip_ranges
+    medidor.etapa("total", datos["filas_db"])
+    generate_ip_ranges(datos["dbs"], os.path.join(salida, "ips.txt"), gui_only=True, **kwargs)
+
+
+CORRER = {
+    "autocsv": lambda d, s, m: _correr_autocsv(d, s, m, workers=1),
+    "autocsv_paralelo": lambda d, s, m: _correr_autocsv(d, s, m, workers=None),
+    "autocsv_sql": lambda d, s, m: _correr_autocsv(d, s, m, workers=None, reducir_en_sql=True),
+    "csven0": _correr_csven0,
+    "suma_fija": _correr_suma_fija,
+    "ips": _correr_ips,
+    "ips_filas": lambda d, s, m: _correr_ips(d, s, m, distinct=False),
+}
+
+
+def _hijo(pipeline: str, datos_json: str) -> int:
+    datos = json.loads(datos_json)
+    # importar antes de medir: el costo de import lo mide bench_arranque
+    import Db3ToCsv, CsvEn0, Clientes_suma, Extraer_ips  # noqa: F401,E401
+    base_rss = rss_actual()
+    with tempfile.TemporaryDirectory(prefix="hdm-bench-") as salida:
+        t0 = time.perf_counter()
+        with MedidorEtapas() as medidor:
+            CORRER[pipeline](datos, salida, medidor)
+        total = time.perf_counter() - t0
+    etapas = {}
+    for nombre, e in medidor.etapas.items():
+        seg = e["segundos"]
+        etapas[nombre] = {
+            "segundos": round(seg, 4),
+            "filas": e["filas"],
+            "filas_s": round(e["filas"] / seg) if e["filas"] and seg > 0 else None,
+            "pico_rss_mib": round(e["pico_rss"] / 2 ** 20, 1),
+        }
+    print(json.dumps({
+        "segundos": round(total, 4),
+        "rss_base_mib": round(base_rss / 2 ** 20, 1),
+        "pico_rss_mib": round(max([base_rss] + [e["pico_rss"] for e in medidor.etapas.values()]) / 2 ** 20, 1),
+        "etapas": etapas,
+    }))
+    return 0
+
+
+# ---------------------- orquestación ----------------------
+
+def _datos_existentes(carpeta: str):
+    dbs = sorted(glob.glob(os.path.join(carpeta, "*.db3")))
+    csv = os.path.join(carpeta, "contadores_csven0.csv")
+    if not dbs or not os.path.isfile(csv):
+        return None
+    import sqlite3
+    import pandas as pd
+    filas_db = 0
+    for p in dbs:
+        con = sqlite3.connect(p)
+        filas_db += con.execute("SELECT COUNT(*) FROM counters").fetchone()[0]
+        con.close()
+    xls = os.path.join(carpeta, "siges_suma_fija.xlsx")
+    return {
+        "dbs": dbs, "filas_db": filas_db,
+        "csv": csv, "filas_csv": sum(1 for _ in open(csv, encoding="utf-8")) - 1,
+        "xls": xls if os.path.isfile(xls) else None,
+        "filas_xls": len(pd.read_excel(xls)) if os.path.isfile(xls) else None,
+    }
+
+
+def correr_pipeline(pipeline: str, datos: dict, repeticiones: int) -> dict:
+    mejor = None
+    for _ in range(repeticiones):
+        r = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--_hijo", pipeline, json.dumps(datos)],
+            cwd=RAIZ, capture_output=True, text=True,
+        )
+        if r.returncode != 0:
+            return {"error": (r.stderr.strip().splitlines() or ["?"])[-1]}
+        res = json.loads(r.stdout.strip().splitlines()[-1])
+        if mejor is None or res["segundos"] < mejor["segundos"]:
+            mejor = res
+    return mejor
+
+
+def _aplanar(medidas: dict):
+    for pipeline, res in medidas.items():
+        if "segundos" in res:
+            yield f"{pipeline}.total", res["segundos"], res["pico_rss_mib"]
+            for etapa, e in res["etapas"].items():
+                yield f"{pipeline}.{etapa}", e["segundos"], e["pico_rss_mib"]
+
+
+def imprimir(medidas: dict) -> None:
+    print(f"\n  {'pipeline.etapa':<32} {'seg':>9} {'filas/s':>12} {'pico RSS':>10}")
+    for pipeline, res in medidas.items():
+        if "error" in res:
+            print(f"  {pipeline:<32} ERROR: {res['error']}")
+            continue
+        print(f"  {pipeline + '.total':<32} {res['segundos']:9.3f} {'':>12} {res['pico_rss_mib']:7.1f} MiB")
+        for etapa, e in res["etapas"].items():
+            fs = f"{e['filas_s']:,}" if e["filas_s"] else "-"
+            print(f"  {'  ' + etapa:<32} {e['segundos']:9.3f} {fs:>12} {e['pico_rss_mib']:7.1f} MiB")
+
+
+def comparar(anterior: dict, actual: dict) -> None:
+    previo = {k: (s, m) for k, s, m in _aplanar(anterior.get("medidas", {}))}
+    print(f"\nComparación contra {anterior.get('etiqueta') or anterior.get('fecha')}:")
+    for clave, seg, mib in _aplanar(actual["medidas"]):
+        if clave in previo and previo[clave][0]:
+            s0, m0 = previo[clave]
+            print(f"  {clave:<32} {s0:8.3f} -> {seg:8.3f} s ({(seg - s0) / s0:+.0%})   "
+                  f"{m0:7.1f} -> {mib:7.1f} MiB")
+
+
+def main(argv=None) -> int:
+    from datos_sinteticos import agregar_argumentos, generar_todo
+
+    ap = argparse.ArgumentParser(description="Benchmark de Db3ToCsv / CsvEn0 / Clientes_suma / Extraer_ips.")
+    ap.add_argument("--datos", help="Carpeta de datos sintéticos (se genera si está vacía)")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--pipelines", default=",".join(PIPELINES), help="Lista separada por comas")
+    ap.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/pipeline-<fecha>.json)")
+    ap.add_argument("--comparar", help="JSON de una corrida anterior para mostrar diferencias")
+    ap.add_argument("--etiqueta", default="")
+    agregar_argumentos(ap)
+    a = ap.parse_args(argv)
+
+    pipelines = [p.strip() for p in a.pipelines.split(",") if p.strip()]
+    desconocidos = set(pipelines) - set(PIPELINES)
+    if desconocidos:
+        ap.error(f"pipelines desconocidos: {', '.join(sorted(desconocidos))}")
+
+    tmp = None
+    carpeta = a.datos
+    if carpeta is None:
+        tmp = tempfile.TemporaryDirectory(prefix="hdm-datos-")
+        carpeta = tmp.name
+    try:
+        datos = _datos_existentes(carpeta)
+        if datos is None:
+            print(f"Generando datos sintéticos en {carpeta}…", flush=True)
+            t0 = time.perf_counter()
+            datos = generar_todo(carpeta, dbs=a.dbs, series=a.series, lecturas=a.lecturas,
+                                 especiales=a.especiales, redes=a.redes, csv_filas=a.csv_filas,
+                                 xls_filas=a.xls_filas, semilla=a.semilla)
+            print(f"  listo en {time.perf_counter() - t0:.1f} s", flush=True)
+        print(f"{len(datos['dbs'])} DB / {datos['filas_db']:,} filas, CSV {datos['filas_csv']:,} filas, "
+              f"XLSX {datos['filas_xls'] or 0:,} filas", flush=True)
+
+        medidas = {}
+        for p in pipelines:
+            if p == "suma_fija" and not datos.get("xls"):
+                medidas[p] = {"error": "sin XLSX de entrada (falta motor de Excel para pandas)"}
+                continue
+            print(f"Corriendo {p}…", flush=True)
+            medidas[p] = correr_pipeline(p, datos, max(1, a.repeticiones))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    resultado = {
+        "etiqueta": a.etiqueta,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parametros": {k: getattr(a, k) for k in
+                       ("dbs", "series", "lecturas", "especiales", "redes", "csv_filas", "xls_filas", "semilla")},
+        "filas": {"db": datos["filas_db"], "csv": datos["filas_csv"], "xls": datos["filas_xls"]},
+        "repeticiones": a.repeticiones,
+        "medidas": medidas,
+    }
+    salida = a.salida or os.path.join(
+        RAIZ, "benchmarks", "resultados", f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    imprimir(medidas)
+    print(f"\nResultados en: {salida}")
+    if a.comparar:
+        with open(a.comparar, "r", encoding="utf-8") as f:
+            comparar(json.load(f), resultado)
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--_hijo":
+        sys.exit(_hijo(sys.argv[2], sys.argv[3]))
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del formato ANCHO de Db3ToCsv: merge original vs pivot en una pasada.
+
+Uso:
+    python benchmarks/bench_pivot.py [--series 500000] [--repeticiones 3]
+
+Arma un DataFrame deduplicado sintético (una fila por SERIE+CLASE, mezcla de
+TIPO 7/15 y empates de FECHA), verifica que ambos motores den el mismo CSV y
+reporta tiempo (mejor de N) y pico de memoria (tracemalloc) de cada uno.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Db3ToCsv import formato_ancho, formato_ancho_merge, formatear_dias  # noqa: E402
+
+
+def frame_sintetico(n_series: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    series = np.array([f"SER{i:07d}" for i in range(n_series)], dtype=object)
+    fechas = np.arange(20332, 20360, dtype=np.int64)  # días int64 (septiembre 2025), como deduplicar_lecturas
+
+    tiene_10 = rng.random(n_series) < 0.95
+    tiene_20 = rng.random(n_series) < 0.45
+    partes = []
+    for clase, mascara in (("10", tiene_10), ("20", tiene_20)):
+        idx = np.flatnonzero(mascara)
+        partes.append(pd.DataFrame({
+            "SERIE": series[idx],
+            "FECHA": fechas[rng.integers(0, 3, len(idx))],  # pocas fechas => muchos empates
+            "TIPO": np.where(rng.random(len(idx)) < 0.6, 15, 7),
+            "CLASE": clase,
+            "CONTADOR": rng.integers(1, 5_000_000, len(idx)),
+        }))
+    df = pd.concat(partes, ignore_index=True)
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def medir(fn, df: pd.DataFrame, repeticiones: int):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn(df)
+        mejor = min(mejor, time.perf_counter() - t0)
+    tracemalloc.start()
+    out = fn(df)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, mejor, pico
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark merge vs pivot del formato ANCHO.")
+    ap.add_argument("--series", type=int, default=500_000)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    args = ap.parse_args()
+
+    df = frame_sintetico(args.series)
+    print(f"Filas deduplicadas: {len(df):,}")
+
+    resultados = {}
+    for nombre, fn in (("merge", formato_ancho_merge), ("pivot", formato_ancho)):
+        out, seg, pico = medir(fn, df, args.repeticiones)
+        resultados[nombre] = out
+        print(f"{nombre:>6}: {seg:8.3f} s   pico {pico / 2**20:8.1f} MiB   filas {len(out):,}")
+
+    pivot = resultados["pivot"]
+    pivot["FECHA"] = formatear_dias(pivot["FECHA"].to_numpy())
+    iguales = resultados["merge"].to_csv(index=False, sep=";") == pivot.to_csv(index=False, sep=";")
+    print(f"Salida idéntica: {'sí' if iguales else 'NO'}")
+    sys.exit(0 if iguales else 1)
+
+
+if __name__ == "__main__":
+    main()
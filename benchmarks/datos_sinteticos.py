@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de datos sintéticos para los benchmarks del pipeline de contadores.
+
+- generar_db: SQLite estilo PrinterMonitorClient con tabla counters
+  (serialnumber, readdate ISO, readvalue acumulado, model, counterclass_id, ip).
+  Cada serie tiene un perfil: monocromo (10), color (10 + 20) o total (40; un
+  porcentaje con modelo de MODELOS_ESPECIALES, que Db3ToCsv pasa a clase 20).
+  Se agregan filas de otras clases (ruido que el pipeline descarta) e IPs con
+  ruido ("ip puerto 80", IPv6, texto, NULL).
+- generar_csv_csven0: CSV de entrada de CsvEn0 (Tipo, Nro_serie, NombreClase…).
+- generar_xls_suma_fija: XLS/XLSX de entrada de Clientes_suma (requiere un motor
+  de Excel para pandas, p. ej. openpyxl; si no está, se informa y se omite).
+
+Uso:
+    python benchmarks/datos_sinteticos.py CARPETA [--dbs 2] [--series 5000] [--lecturas 60]
+        [--especiales 0.2] [--redes 40] [--csv-filas 200000] [--xls-filas 20000] [--semilla 0]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Db3ToCsv import MODELOS_ESPECIALES  # noqa: E402
+
+MODELOS_COMUNES = ("M404", "M428fdw", "MX711", "B432", "SL-M4020", "E52645", "P3055", "MS621")
+PERFILES = ("mono", "color", "total")
+PESO_PERFILES = (0.55, 0.30, 0.15)
+CLASES_RUIDO = (5, 30, 41)
+FILAS_POR_LOTE = 100_000
+
+EPOCH_INICIO = np.datetime64("2024-01-01T00:00:00", "s")
+
+
+def _ips(rng, n_series: int, redes: int, frac_invalidas: float) -> np.ndarray:
+    """Una IP por serie, repartida en `redes` /24; una fracción con ruido."""
+    red = rng.integers(0, redes, n_series)
+    base = np.array([f"10.{(r // 250) % 250}.{r % 250}" for r in range(redes)], dtype=object)
+    ips = np.array([f"{base[r]}.{h}" for r, h in zip(red, rng.integers(1, 255, n_series))], dtype=object)
+    ruido = rng.random(n_series) < frac_invalidas
+    variantes = np.array(["{} puerto 9100", "fe80::1", "sin-ip", None, "{}:80"], dtype=object)
+    for i in np.flatnonzero(ruido):
+        v = variantes[rng.integers(0, len(variantes))]
+        ips[i] = v.format(ips[i]) if isinstance(v, str) and "{}" in v else v
+    return ips
+
+
+def generar_db(
+    path: str,
+    series: int = 5000,
+    lecturas: int = 60,
+    *,
+    especiales: float = 0.2,
+    redes: int = 40,
+    frac_ip_invalidas: float = 0.05,
+    frac_ruido: float = 0.05,
+    columna_ip: Optional[str] = "ip",
+    semilla: int = 0,
+    semilla_flota: Optional[int] = None,
+    prefijo_serie: str = "SER",
+) -> int:
+    """
+    Crea (pisando) la DB en path. Devuelve la cantidad de filas de counters.
+    - series / lecturas: equipos y tomas por equipo (fechas crecientes, 1-3 días entre tomas)
+    - especiales: fracción de perfiles "total" (clase 40) con modelo de MODELOS_ESPECIALES
+    - redes: cantidad de /24 distintas en la columna IP; columna_ip=None la omite
+    - semilla_flota: fija perfil, modelo e IP de cada serie (por defecto = semilla); usar
+      la misma en varias DB simula la misma flota leída desde varias PCs
+    """
+    rng = np.random.default_rng(semilla)
+    flota = np.random.default_rng(semilla if semilla_flota is None else semilla_flota)
+    if os.path.exists(path):
+        os.remove(path)
+
+    perfiles = flota.choice(len(PERFILES), size=series, p=PESO_PERFILES)
+    especiales_ord = sorted(MODELOS_ESPECIALES)
+    modelos = np.where(
+        (perfiles == 2) & (flota.random(series) < especiales),
+        np.array(especiales_ord, dtype=object)[flota.integers(0, len(especiales_ord), series)],
+        np.array(MODELOS_COMUNES, dtype=object)[flota.integers(0, len(MODELOS_COMUNES), series)],
+    )
+    seriales = np.array([f"{prefijo_serie}{i:07d}" for i in range(series)], dtype=object)
+    ips = _ips(flota, series, redes, frac_ip_invalidas) if columna_ip else None
+
+    # clases por perfil: mono -> (10,), color -> (10, 20), total -> (40,)
+    clases_perfil = ((10,), (10, 20), (40,))
+
+    con = sqlite3.connect(path)
+    try:
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        col_ip = f", {columna_ip} TEXT" if columna_ip else ""
+        con.execute(
+            "CREATE TABLE counters (id INTEGER PRIMARY KEY, serialnumber TEXT, readdate TEXT,"
+            f" readvalue INTEGER, model TEXT, counterclass_id INTEGER{col_ip})"
+        )
+        cols = "serialnumber, readdate, readvalue, model, counterclass_id" + (f", {columna_ip}" if columna_ip else "")
+        sql = f"INSERT INTO counters ({cols}) VALUES ({','.join('?' * (6 if columna_ip else 5))})"
+
+        total = 0
+        lote = []
+        for s in range(series):
+            pasos = rng.integers(86400, 3 * 86400, lecturas).cumsum() + rng.integers(0, 86400)
+            fechas = np.datetime_as_string(EPOCH_INICIO + pasos.astype("timedelta64[s]"), unit="s")
+            for clase in clases_perfil[perfiles[s]]:
+                valores = rng.integers(0, 500, lecturas).cumsum() + rng.integers(1, 10**6)
+                for f, v in zip(fechas, valores.tolist()):
+                    fila = (seriales[s], f.replace("T", " "), v, modelos[s], clase)
+                    lote.append(fila + (ips[s],) if columna_ip else fila)
+            if frac_ruido and rng.random() < frac_ruido:
+                clase = int(CLASES_RUIDO[rng.integers(0, len(CLASES_RUIDO))])
+                for f in fechas[: max(1, lecturas // 4)]:
+                    fila = (seriales[s], f.replace("T", " "), int(rng.integers(1, 10**6)), modelos[s], clase)
+                    lote.append(fila + (ips[s],) if columna_ip else fila)
+            if len(lote) >= FILAS_POR_LOTE:
+                con.executemany(sql, lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            con.executemany(sql, lote)
+            total += len(lote)
+        con.commit()
+    finally:
+        con.close()
+    return total
+
+
+def generar_csv_csven0(path: str, filas: int = 200_000, *, frac_falta: float = 0.3, semilla: int = 0) -> int:
+    """CSV (separado por comas) con las columnas que lee/descarta CsvEn0.filtrar_falta_contador_csv."""
+    rng = np.random.default_rng(semilla)
+    tipos = np.where(rng.random(filas) < frac_falta, "FALTA CONTADOR",
+                     np.array(["OK", "ESTIMADO", "SIN LECTURA"])[rng.integers(0, 3, filas)])
+    df = pd.DataFrame({
+        "Empresa1": "EMPRESA SA",
+        "Sucursal1": np.array(["Central", "Norte", "Sur"])[rng.integers(0, 3, filas)],
+        "Articulo1": np.array(MODELOS_COMUNES)[rng.integers(0, len(MODELOS_COMUNES), filas)],
+        "Sector1": "Administración",
+        "Nro_serie": [f"SER{i:07d}" for i in range(filas)],
+        "FechaTomaContadorAnterior1": "01/09/2026",
+        "ImpreContadorAnterior": rng.integers(1, 10**6, filas),
+        "FechaTomaContadorActual": "01/10/2026",
+        "ContActual": rng.integers(1, 10**6, filas),
+        "Impresiones_Realizadas": rng.integers(0, 5000, filas),
+        "NombreClase": np.where(rng.random(filas) < 0.35, "Color", "Negro"),
+        "Tipo": tipos,
+        "BackupDe": "",
+        "CenCosto": rng.integers(100, 999, filas),
+    })
+    df.to_csv(path, index=False)
+    return filas
+
+
+def generar_xls_suma_fija(path: str, filas: int = 20_000, *, semilla: int = 0) -> Optional[int]:
+    """XLSX con las columnas de Clientes_suma; None si pandas no tiene motor para escribir Excel."""
+    rng = np.random.default_rng(semilla)
+    estados = np.array(["Activa en Cliente", "Desaparecida", "Backup Fijo", "En Taller"])
+    df = pd.DataFrame({
+        "Empresa": "EMPRESA SA",
+        "Centro Costo": rng.integers(100, 999, filas),
+        "Nro Serie": [f"SER{i:07d}" for i in range(filas)],
+        "Modelo": np.array(MODELOS_COMUNES)[rng.integers(0, len(MODELOS_COMUNES), filas)],
+        "Estado": estados[rng.choice(len(estados), size=filas, p=(0.8, 0.08, 0.07, 0.05))],
+        "Cdor Anterior": rng.integers(1, 10**6, filas),
+        # algunos 1 = equipo sin contador real (Clientes_suma no le suma hojas)
+        "Cdor Actual": np.where(rng.random(filas) < 0.03, 1, rng.integers(2, 10**6, filas)),
+        "Direccion IP": "10.0.0.1",
+        "Tipo": "Normal",
+    })
+    try:
+        df.to_excel(path, index=False)
+    except (ImportError, ValueError) as e:
+        print(f"[AVISO] No se generó {os.path.basename(path)}: {e}", file=sys.stderr)
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    return filas
+
+
+def generar_todo(carpeta: str, *, dbs: int = 2, series: int = 5000, lecturas: int = 60,
+                 especiales: float = 0.2, redes: int = 40, csv_filas: int = 200_000,
+                 xls_filas: int = 20_000, semilla: int = 0) -> dict:
+    """Genera el juego completo en carpeta; devuelve rutas y tamaños (para el informe)."""
+    os.makedirs(carpeta, exist_ok=True)
+    info = {"dbs": [], "filas_db": 0}
+    for i in range(dbs):
+        ruta = os.path.join(carpeta, f"PrinterMonitorClient_{i}.db3")
+        # series solapadas entre DBs (misma flota en varias PCs) para ejercitar la deduplicación
+        info["filas_db"] += generar_db(ruta, series, lecturas, especiales=especiales,
+                                       redes=redes, semilla=semilla + i, semilla_flota=semilla)
+        info["dbs"].append(ruta)
+    info["csv"] = os.path.join(carpeta, "contadores_csven0.csv")
+    info["filas_csv"] = generar_csv_csven0(info["csv"], csv_filas, semilla=semilla)
+    xls = os.path.join(carpeta, "siges_suma_fija.xlsx")
+    info["filas_xls"] = generar_xls_suma_fija(xls, xls_filas, semilla=semilla)
+    info["xls"] = xls if info["filas_xls"] else None
+    return info
+
+
+def agregar_argumentos(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--dbs", type=int, default=2, help="Cantidad de archivos .db3")
+    ap.add_argument("--series", type=int, default=5000, help="Equipos por DB")
+    ap.add_argument("--lecturas", type=int, default=60, help="Tomas por equipo y clase")
+    ap.add_argument("--especiales", type=float, default=0.2, help="Fracción de clase 40 con modelo especial")
+    ap.add_argument("--redes", type=int, default=40, help="Cantidad de /24 distintas en la columna ip")
+    ap.add_argument("--csv-filas", type=int, default=200_000, help="Filas del CSV de CsvEn0")
+    ap.add_argument("--xls-filas", type=int, default=20_000, help="Filas del XLSX de suma fija")
+    ap.add_argument("--semilla", type=int, default=0)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Genera datos sintéticos para los benchmarks.")
+    ap.add_argument("carpeta")
+    agregar_argumentos(ap)
+    a = ap.parse_args(argv)
+    info = generar_todo(a.carpeta, dbs=a.dbs, series=a.series, lecturas=a.lecturas,
+                        especiales=a.especiales, redes=a.redes, csv_filas=a.csv_filas,
+                        xls_filas=a.xls_filas, semilla=a.semilla)
+    print(f"{len(info['dbs'])} DB ({info['filas_db']:,} filas), CSV ({info['filas_csv']:,} filas), "
+          f"XLSX ({info['filas_xls'] or 0:,} filas) en {a.carpeta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
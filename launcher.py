@@ -1,7 +1,12 @@
+import time
+_T0 = time.perf_counter()
+
 import os, sys, json, hashlib, zipfile, shutil, tempfile, subprocess, traceback
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from Medicion_arranque import MarcasArranque
+
 # ===== Config rápida =====
 REMOTE_ROOT = r"C:\tmp\releases"  # << CAMBIAR: carpeta compartida
 LATEST_JSON = "latest.json"                           # dentro del share
@@ -175,10 +180,15 @@ def ensure_latest_and_get_exe(pop: Popup) -> str:
 def launch(exe_path: str):
     cwd = os.path.dirname(exe_path)
     subprocess.Popen([exe_path], cwd=cwd, close_fds=True)
+    marcas.marcar("handoff")  # Popen devolvió: la app ya está arrancando
+
+marcas = MarcasArranque("HelpDeskLauncher", t0=_T0)
 
 def main():
     os.makedirs(LOCAL_ROOT, exist_ok=True)
+    marcas.marcar("inicio_main")
     pop = Popup("HelpDesk Manager", "Comprobando actualizaciones…")
+    marcas.marcar("popup")
     try:
         exe = ensure_latest_and_get_exe(pop)
         pop.set("Iniciando aplicación…")
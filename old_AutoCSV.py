@@ -12,6 +12,7 @@ import numpy as np
 
 from Clientes_suma import convertir_xls_a_csv_arcos
 import Estimador_manual
+from Sqlite_lectura import conectar_solo_lectura
 
 
 
@@ -62,7 +63,7 @@ class AutoCSVApp:
 
     def conectar_db(self, filename: str) -> Optional[sqlite3.Connection]:
         try:
-            return sqlite3.connect(filename)
+            return conectar_solo_lectura(filename)
         except sqlite3.Error as e:
             self.error("Error", f"Error al conectar a la base de datos: {e}")
             return None
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Los módulos de la app viven en la raíz del repo (sin paquete)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _crear_db(path, filas):
+    """counters con las columnas que lee Db3ToCsv; filas = (serie, fecha, valor, modelo, clase)."""
+    con = sqlite3.connect(path)
+    try:
+        con.execute(
+            "CREATE TABLE counters (id INTEGER PRIMARY KEY, serialnumber TEXT, readdate TEXT,"
+            " readvalue INTEGER, model TEXT, counterclass_id INTEGER)"
+        )
+        con.executemany(
+            "INSERT INTO counters (serialnumber, readdate, readvalue, model, counterclass_id)"
+            " VALUES (?, ?, ?, ?, ?)",
+            filas,
+        )
+        con.commit()
+    finally:
+        con.close()
+    return str(path)
+
+
+@pytest.fixture
+def crear_db():
+    return _crear_db
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    """Caches de Db3ToCsv / Snapshot_counters dentro de tmp_path, nunca en LOCALAPPDATA."""
+    import Db3ToCsv
+    import Snapshot_counters
+
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(Db3ToCsv, "CACHE_DB_DIR", str(cache / "db3"))
+    monkeypatch.setattr(Db3ToCsv, "ESTADO_DIR", str(cache / "incremental"))
+    monkeypatch.setattr(Snapshot_counters, "SNAPSHOT_DIR", str(cache / "snapshots"))
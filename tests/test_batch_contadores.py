@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from Batch_contadores import cargar_manifiesto
+
+
+def _manifiesto(tmp_path, trabajos):
+    path = tmp_path / "manifiesto.json"
+    path.write_text(json.dumps({"trabajos": trabajos}), encoding="utf-8")
+    return str(path)
+
+
+def test_rutas_relativas_a_la_carpeta_del_manifiesto(tmp_path):
+    (tmp_path / "A").mkdir()
+    (tmp_path / "A" / "x.db3").write_bytes(b"")
+    m = cargar_manifiesto(_manifiesto(tmp_path, [
+        {"tipo": "autocsv", "archivos": ["A/*.db3"], "nombre_base": "A", "carpeta_salida": "salida/A"},
+    ]))
+    t = m["trabajos"][0]
+    assert t["archivos"] == [str(tmp_path / "A" / "x.db3")]
+    assert t["carpeta_salida"] == str(tmp_path / "salida" / "A")
+    assert t["nombre"] == "autocsv#1"
+
+
+@pytest.mark.parametrize("trabajo, mensaje", [
+    ({"tipo": "csven0", "archivo": "b.csv", "cliente": "B"}, r"Trabajo #2 \(csven0\): falta la clave 'fecha'"),
+    ({"tipo": "suma_fija", "fecha": "31/10/2026", "salida": "c.csv"}, r"Trabajo #2 \(suma_fija\): falta la clave 'archivo'"),
+    ({"tipo": "ips", "archivos": ["d.db3"]}, r"Trabajo #2 \(ips\): falta la clave 'salida'"),
+    ({"tipo": "autocsv", "archivos": [], "nombre_base": "A"}, r"Trabajo #2 \(autocsv\): falta la clave 'archivos'"),
+    ({"tipo": "xls"}, r"Trabajo #2: tipo inválido 'xls'"),
+])
+def test_claves_obligatorias(tmp_path, trabajo, mensaje):
+    valido = {"tipo": "ips", "archivos": ["a.db3"], "salida": "a.txt"}
+    with pytest.raises(ValueError, match=mensaje):
+        cargar_manifiesto(_manifiesto(tmp_path, [valido, trabajo]))
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Csv_stream import escribir_csv_por_bloques
+
+
+@pytest.fixture
+def df():
+    n = 1003
+    return pd.DataFrame({
+        "SERIE": [f"SER{i:05d}" for i in range(n)],
+        "FECHA": np.arange(n) % 7 + 19700,
+        "CLASE": pd.Categorical.from_codes(np.arange(n) % 3 - 1, categories=["10", "20"]),
+        "CONTADOR": np.arange(n) * 3,
+    })
+
+
+@pytest.mark.parametrize("lineterminator", ["\r\n", "\n"])
+@pytest.mark.parametrize("filas_por_bloque", [1, 100, 5000])
+def test_igual_a_to_csv(tmp_path, df, lineterminator, filas_por_bloque):
+    esperado, obtenido = tmp_path / "a.csv", tmp_path / "b.csv"
+    df.to_csv(esperado, sep=";", index=False, encoding="utf-8", lineterminator=lineterminator)
+    escribir_csv_por_bloques(df, str(obtenido), sep=";", encoding="utf-8", lineterminator=lineterminator,
+                             filas_por_bloque=filas_por_bloque)
+    assert obtenido.read_bytes() == esperado.read_bytes()
+
+
+def test_transformar_y_progreso_por_bloque(tmp_path, df):
+    avances = []
+    escribir_csv_por_bloques(
+        df, str(tmp_path / "b.csv"), sep=";", encoding="utf-8", lineterminator="\n", filas_por_bloque=500,
+        transformar=lambda b: b.assign(FECHA=b["FECHA"].astype(str) + "!"),
+        al_escribir_bloque=lambda hechas, total: avances.append((hechas, total)),
+    )
+    assert avances == [(500, 1003), (1000, 1003), (1003, 1003)]
+    lineas = (tmp_path / "b.csv").read_text(encoding="utf-8").splitlines()
+    assert len(lineas) == 1004 and lineas[1].split(";")[1] == "19700!"
+
+
+def test_dataframe_vacio_escribe_cabecera(tmp_path, df):
+    escribir_csv_por_bloques(df.iloc[:0], str(tmp_path / "v.csv"), sep=";", encoding="utf-8", lineterminator="\r\n")
+    assert (tmp_path / "v.csv").read_bytes() == b"SERIE;FECHA;CLASE;CONTADOR\r\n"
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Db3ToCsv
+from Progreso import ProcesoCancelado, TokenCancelacion
+
+
+@pytest.fixture
+def dbs(tmp_path, crear_db):
+    rutas = []
+    for i in range(4):
+        rutas.append(crear_db(tmp_path / f"PrinterMonitorClient_{i}.db3", [
+            (f"S{i}", "2024-01-01 10:00:00", 100 + i, "M404", 10),
+            (f"S{i}", "2024-01-03 10:00:00", 200 + i, "M404", 10),
+            ("COMUN", f"2024-01-0{i + 1} 08:00:00", 300 + i, "C4010ND", 40),
+        ]))
+    return rutas
+
+
+def test_leer_dbs_paralelo_mismo_orden_que_secuencial(dbs):
+    secuencial = pd.concat(Db3ToCsv.leer_dbs(dbs, None, workers=1), ignore_index=True)
+    paralelo = pd.concat(Db3ToCsv.leer_dbs(dbs, None, workers=4), ignore_index=True)
+    pd.testing.assert_frame_equal(secuencial, paralelo)
+
+
+def test_leer_dbs_error_real_no_se_informa_como_cancelacion(dbs, tmp_path):
+    mala = tmp_path / "mala.db3"
+    con = sqlite3.connect(mala)
+    con.execute("CREATE TABLE counters (x INTEGER)")
+    con.close()
+    token = TokenCancelacion()
+    with pytest.raises(RuntimeError, match="Estructura inesperada"):
+        Db3ToCsv.leer_dbs(dbs + [str(mala)], None, workers=4, cancelar=token)
+    assert not token.cancelado
+
+
+def test_token_derivado():
+    padre = TokenCancelacion()
+    hijo = padre.derivado()
+    hijo.cancelar()
+    assert hijo.cancelado and not padre.cancelado
+    otro = padre.derivado()
+    padre.cancelar()
+    assert otro.cancelado
+
+
+FILAS_REDUCCION = [
+    ("A", "2024-01-01 10:00:00", 1, "M404", 10),
+    ("A", "2024-01-05 10:00:00", 2, "M404", 10),
+    ("A", "2024-01-05 10:00:00", 3, "M404", 10),  # empate: gana la primera leída
+    ("B", "2024-01-02 10:00:00", 4, "C4010ND", 40),  # especial -> CLASE 20
+    ("B", "2024-01-03 10:00:00", 5, "M404", 40),  # mismo serial, CLASE 10
+    ("C", None, 6, "MX711", 20),
+    ("C", "2024-01-04 10:00:00", 7, "MX711", 20),
+    ("D", "2024-01-04 10:00:00", 8, "MX711", 5),  # clase ignorada
+]
+
+
+@pytest.mark.parametrize("fecha_maxima", [None, "03/01/2024"])
+def test_reduccion_sql_equivale_a_pandas(tmp_path, crear_db, fecha_maxima):
+    path = crear_db(tmp_path / "iso.db3", FILAS_REDUCCION)
+    assert Db3ToCsv.comparar_reduccion_sql([path], fecha_maxima)
+
+
+@pytest.mark.parametrize("otra", ["2024-01-10", "2024-1-9 10:00:00", "2024-01-09T10:00:00"])
+def test_reduccion_sql_con_fechas_no_iso_lee_todo(tmp_path, crear_db, otra):
+    # en texto '2024-01-10' < '2024-01-05 10:00:00' y '2024-1-9…' > '2024-01-…': el MAX
+    # de SQLite elegiría otra fila que pandas; se cae a la lectura completa
+    path = crear_db(tmp_path / "mixta.db3", FILAS_REDUCCION + [("A", otra, 9, "M404", 10)])
+    assert Db3ToCsv.comparar_reduccion_sql([path], None)
+
+
+def test_incremental_equivale_a_lectura_completa(tmp_path, crear_db):
+    path = crear_db(tmp_path / "inc.db3", FILAS_REDUCCION)
+    completo = lambda: Db3ToCsv.deduplicar_lecturas(pd.concat(Db3ToCsv.leer_dbs([path], None)))
+    incremental = lambda: Db3ToCsv.deduplicar_lecturas(pd.concat(Db3ToCsv.leer_dbs([path], None, incremental=True)))
+
+    pd.testing.assert_frame_equal(incremental().reset_index(drop=True), completo().reset_index(drop=True))
+    con = sqlite3.connect(path)
+    con.executemany(
+        "INSERT INTO counters (serialnumber, readdate, readvalue, model, counterclass_id) VALUES (?, ?, ?, ?, ?)",
+        [("A", "2024-01-07 10:00:00", 10, "M404", 10), ("E", "2024-01-08", 11, "M404", 10)],
+    )
+    con.commit()
+    con.close()
+    pd.testing.assert_frame_equal(incremental().reset_index(drop=True), completo().reset_index(drop=True))
+
+
+def test_preparar_db_copia_indexada_y_vigencia(tmp_path, crear_db):
+    path = crear_db(tmp_path / "prep.db3", FILAS_REDUCCION)
+    assert Db3ToCsv.ruta_preparada(path) is None and not Db3ToCsv.fue_preparada(path)
+    copia = Db3ToCsv.preparar_db(path)
+    assert Db3ToCsv.ruta_preparada(path) == copia
+    con = sqlite3.connect(copia)
+    indices = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    con.close()
+    assert Db3ToCsv.INDICE_CUBRIENTE in indices
+    assert not [n for n in os.listdir(Db3ToCsv.CACHE_DB_DIR) if n.endswith(".tmp")]
+
+    con = sqlite3.connect(path)
+    con.execute("INSERT INTO counters (serialnumber, readdate, readvalue, model, counterclass_id)"
+                " VALUES ('Z', '2024-02-01 00:00:00', 1, 'M404', 10)")
+    con.commit()
+    con.close()
+    os.utime(path, ns=(0, os.stat(copia).st_mtime_ns + 10**9))
+    # origen cambiado: no se reconstruye al leer, sólo deja de usarse la copia
+    assert Db3ToCsv.ruta_preparada(path) is None and Db3ToCsv.fue_preparada(path)
+
+
+def test_preparar_db_con_wal_no_queda_vieja(tmp_path, crear_db):
+    path = crear_db(tmp_path / "viva.db3", [("A", "2024-01-01 10:00:00", 1, "M404", 10)])
+    escritor = sqlite3.connect(path)
+    try:
+        escritor.execute("PRAGMA journal_mode = WAL")
+        escritor.execute("PRAGMA wal_autocheckpoint = 0")
+        insertar = ("INSERT INTO counters (serialnumber, readdate, readvalue, model, counterclass_id)"
+                    " VALUES (?, ?, ?, ?, 10)")
+        escritor.execute(insertar, ("A", "2024-01-03 10:00:00", 3, "M404"))
+        escritor.commit()
+
+        salida = str(tmp_path / "salida")
+        ruta = Db3ToCsv.procesar_db_a_csv([path], None, "prep", carpeta_salida=salida, preparar=True)
+        assert b"A;03/01/2024;7;10;3;;0\r\n" in open(ruta, "rb").read()  # la copia incluye el -wal
+
+        escritor.execute(insertar, ("A", "2024-01-05 10:00:00", 5, "M404"))
+        escritor.commit()
+        assert Db3ToCsv.ruta_preparada(path) is None
+        # corrida por defecto (preparar=False): la copia se reconstruye, no se lee vieja
+        ruta = Db3ToCsv.procesar_db_a_csv([path], None, "prep", carpeta_salida=salida)
+        assert b"A;05/01/2024;7;10;5;;0\r\n" in open(ruta, "rb").read()
+    finally:
+        escritor.close()
+
+
+def test_preparar_db_cancelado_no_deja_temporales(tmp_path, crear_db):
+    path = crear_db(tmp_path / "prep.db3", FILAS_REDUCCION)
+    token = TokenCancelacion()
+    token.cancelar()
+    with pytest.raises(ProcesoCancelado):
+        Db3ToCsv.preparar_db(path, token)
+    assert os.listdir(Db3ToCsv.CACHE_DB_DIR) == []
+    assert Db3ToCsv.ruta_preparada(path) is None
+
+
+def test_procesar_db_a_csv(tmp_path, dbs):
+    ruta = Db3ToCsv.procesar_db_a_csv(dbs, None, "prueba", carpeta_salida=str(tmp_path / "salida"), workers=2)
+    assert os.path.basename(ruta) == "prueba_salida_AutoCSV.csv"
+    contenido = open(ruta, "rb").read()
+    assert contenido.startswith(b"SERIE;FECHA;TIPO;CLASE_10;CONTADOR_10;CLASE_20;CONTADOR_20\r\n")
+    assert b"COMUN;04/01/2024;15;20;303;20;303\r\n" in contenido
+
+
+def _ancho_csv(out):
+    return out.to_csv(index=False, sep=";")
+
+
+def _deduplicado_sintetico(n_series, seed):
+    # una fila por SERIE+CLASE, TIPO 7/15, pocas fechas (empates) y alguna fecha nula
+    rng = np.random.default_rng(seed)
+    series = np.array([f"S{i:04d}" for i in range(n_series)], dtype=object)
+    fechas = np.array([20332, 20333, 20334, Db3ToCsv.DIA_NULO], dtype=np.int64)
+    partes = []
+    for clase, prob in (("10", 0.9), ("20", 0.5)):
+        idx = np.flatnonzero(rng.random(n_series) < prob)
+        partes.append(pd.DataFrame({
+            "SERIE": series[idx],
+            "FECHA": fechas[rng.choice(4, len(idx), p=[0.4, 0.3, 0.25, 0.05])],
+            "TIPO": np.where(rng.random(len(idx)) < 0.6, 15, 7),
+            "CLASE": clase,
+            "CONTADOR": rng.integers(1, 5_000_000, len(idx)),
+        }))
+    return pd.concat(partes, ignore_index=True).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_formato_ancho_igual_que_merge(seed):
+    df = _deduplicado_sintetico(300, seed)
+    pivot = Db3ToCsv.formato_ancho(df)
+    pivot["FECHA"] = Db3ToCsv.formatear_dias(pivot["FECHA"].to_numpy())
+    assert _ancho_csv(pivot) == _ancho_csv(Db3ToCsv.formato_ancho_merge(df))
+
+
+def test_formato_ancho_casos_borde():
+    df = pd.DataFrame({
+        "SERIE": ["A", "A", "B", "B", "C", "D", "E", "E"],
+        "FECHA": np.array([20332, 20332, 20332, 20333, 20332, 20332, 20332, 20332], dtype=np.int64),
+        "TIPO": [15, 15, 7, 7, 15, 7, 7, 15],
+        "CLASE": ["10", "20", "10", "20", "20", "20", "10", "20"],
+        "CONTADOR": [1, 2, 3, 4, 5, 6, 7, 8],
+    })
+    pivot = Db3ToCsv.formato_ancho(df)
+    pivot["FECHA"] = Db3ToCsv.formatear_dias(pivot["FECHA"].to_numpy())
+    assert _ancho_csv(pivot) == _ancho_csv(Db3ToCsv.formato_ancho_merge(df))
+    assert len(Db3ToCsv.formato_ancho(df.iloc[:0])) == 0
+
@@ -0,0 +1,163 @@
+import ipaddress
+import random
+import shutil
+import sqlite3
+
+import pytest
+
+import Extraer_ips
+
+
+@pytest.fixture(autouse=True)
+def cache_ips_temporal(tmp_path, monkeypatch):
+    cache = tmp_path / "cache" / "ips"
+    monkeypatch.setattr(Extraer_ips, "IPS_CACHE_DIR", str(cache))
+    monkeypatch.setattr(Extraer_ips, "IPS_CACHE_FILE", str(cache / "prefijos24.json"))
+
+
+def _db_ips(path, ips):
+    con = sqlite3.connect(path)
+    try:
+        con.execute("CREATE TABLE counters (id INTEGER PRIMARY KEY, ip TEXT)")
+        con.executemany("INSERT INTO counters (ip) VALUES (?)", [(ip,) for ip in ips])
+        con.commit()
+    finally:
+        con.close()
+    return str(path)
+
+
+def test_copias_omitidas_igual_con_y_sin_cache(tmp_path):
+    a = _db_ips(tmp_path / "a.db3", ["10.0.0.1", "10.0.1.7"])
+    b = str(tmp_path / "b.db3")
+    shutil.copyfile(a, b)
+    c = _db_ips(tmp_path / "c.db3", ["192.168.5.9"])
+
+    corridas = []
+    for i in range(2):
+        omitidas = []
+        salida = str(tmp_path / f"ips{i}.txt")
+        _, redes = Extraer_ips.scan_ip_ranges(
+            [a, b, c], salida, workers=1, on_file_skipped=lambda p, igual: omitidas.append((p, igual)))
+        with open(salida, encoding="utf-8") as f:
+            corridas.append((redes, omitidas, f.read()))
+
+    assert corridas[0] == corridas[1]
+    assert corridas[0][0] == 3
+    assert corridas[0][1] == [(b, a)]
+
+
+def test_db_viva_en_wal_no_usa_cache_vieja(tmp_path):
+    path = str(tmp_path / "viva.db3")
+    escritor = sqlite3.connect(path)
+    try:
+        escritor.execute("PRAGMA journal_mode = WAL")
+        escritor.execute("PRAGMA wal_autocheckpoint = 0")
+        escritor.execute("CREATE TABLE counters (id INTEGER PRIMARY KEY, ip TEXT)")
+        insertar = "INSERT INTO counters (ip) VALUES (?)"
+        escritor.executemany(insertar, [(f"10.0.{i}.1",) for i in range(50)])
+        escritor.commit()
+        assert Extraer_ips.scan_ip_ranges([path], str(tmp_path / "a.txt"), workers=1)[1] == 50
+
+        # los commits quedan en el -wal: el archivo principal no cambia
+        escritor.executemany(insertar, [(f"10.1.{i}.1",) for i in range(50)])
+        escritor.commit()
+        assert Extraer_ips.scan_ip_ranges([path], str(tmp_path / "b.txt"), workers=1)[1] == 100
+    finally:
+        escritor.close()
+
+
+@pytest.mark.parametrize("dedup", [True, False])
+def test_huellas_iguales_con_contenido_distinto_no_comparten_cache(tmp_path, monkeypatch, dedup):
+    a = _db_ips(tmp_path / "a.db3", ["10.0.0.1"])
+    b = _db_ips(tmp_path / "b.db3", ["192.168.5.9"])
+    monkeypatch.setattr(Extraer_ips, "file_fingerprint", lambda p: "colision")
+
+    unicos, repetidos = Extraer_ips.dedup_files([a, b])
+    assert repetidos == [] and len({clave for _, clave in unicos}) == 2
+    for i in range(2):  # la segunda corrida sale de la cache
+        omitidas = []
+        _, redes = Extraer_ips.scan_ip_ranges([a, b], str(tmp_path / f"ips{i}.txt"), workers=1, dedup=dedup,
+                                              on_file_skipped=lambda p, igual: omitidas.append(p))
+        assert (redes, omitidas) == (2, [])
+
+
+def _texto(tmp_path, contenido, chunk_size=Extraer_ips.TEXT_CHUNK):
+    path = tmp_path / "log.txt"
+    path.write_bytes(contenido)
+    prefijos = Extraer_ips.extract_prefixes_from_text(str(path), set(), chunk_size=chunk_size)
+    return sorted(map(Extraer_ips.prefix24_to_str, prefijos))
+
+
+@pytest.mark.parametrize("linea, esperado", [
+    (b"Connecting...10.0.0.1\n", ["10.0.0"]),
+    (b"desde 10.0.0.1.\n", ["10.0.0"]),
+    (b"ip=10.0.0.1,puerto=9100 10.0.1.1:80\n", ["10.0.0", "10.0.1"]),
+    (b"firmware v1.2.3.4\n", []),
+    (b"build10.0.0.1\n", []),
+    (b"v...10.0.0.1\n", ["10.0.0"]),
+    (b"OID 1.3.6.1.2.1\n", []),
+    (b"10.0.0.256 010.0.0.1\n", []),
+])
+def test_ips_en_texto(tmp_path, linea, esperado):
+    assert _texto(tmp_path, linea) == esperado
+
+
+def test_bloques_chicos_dan_lo_mismo(tmp_path):
+    contenido = (b"Connecting...10.0.0.1 v1.2.3.4 ok 192.168.0.7. build10.9.9.9 "
+                 + b"." * 40 + b"172.16.4.4 1.2.3.4" + b"." * 40 + b"5 x10.0.2.3:1 "
+                 + b"7" * 40 + b".1.1.1 8.8.8.8")
+    completo = _texto(tmp_path, contenido)
+    assert completo == ["10.0.0", "172.16.4", "192.168.0", "8.8.8"]
+    for chunk_size in (1, 2, 3, 5, 7, 16, 33):
+        assert _texto(tmp_path, contenido, chunk_size) == completo, chunk_size
+
+
+@pytest.mark.parametrize("raw", [
+    "10.0.0.1", "255.255.255.255", "0.0.0.0", "192.168.1.10 puerto 80", "  10.1.2.3\t",
+    "", "   ", "10.0.0", "10.0.0.1.5", "256.1.1.1", "01.2.3.4", "1.2.3.04", "10.0.0.1:80",
+    "\u0661.2.3.4", "1.2.3.4x", "fe80::1", "::ffff:10.0.0.1", "10.0.0.-1", "+1.2.3.4",
+])
+def test_parse_prefix24_igual_que_parse_ipv4(raw):
+    ip = Extraer_ips.parse_ipv4(raw)
+    esperado = None if ip is None else int(ip) >> 8
+    assert Extraer_ips.parse_prefix24(raw) == esperado
+
+
+def _red24(p):
+    return ipaddress.IPv4Network((p << 8, 24))
+
+
+def test_merge_prefixes_tramos_contiguos():
+    assert Extraer_ips.merge_prefixes([]) == []
+    assert Extraer_ips.merge_prefixes([1, 2, 3, 5, 7, 8]) == [(1, 3), (5, 5), (7, 8)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_prefixes_to_cidrs_igual_que_collapse_addresses(seed):
+    rng = random.Random(seed)
+    prefijos = set()
+    for _ in range(40):  # bloques contiguos de largo variado, a veces en 0 o en el final
+        inicio = rng.choice([0, (1 << 24) - 300, rng.randrange(1 << 24)])
+        prefijos.update(range(inicio, min(inicio + rng.randrange(1, 300), 1 << 24)))
+    ordenados = sorted(prefijos)
+
+    cidrs = Extraer_ips.prefixes_to_cidrs(Extraer_ips.merge_prefixes(ordenados))
+    esperado = [str(n) for n in ipaddress.collapse_addresses(map(_red24, ordenados))]
+    assert cidrs == esperado
+
+
+def test_prefixes_to_cidrs_todo_el_espacio():
+    assert Extraer_ips.prefixes_to_cidrs([(0, (1 << 24) - 1)]) == ["0.0.0.0/0"]
+
+
+def test_format_prefixes():
+    prefijos = {Extraer_ips.parse_prefix24(ip) for ip in ("10.0.3.9", "10.0.0.1", "10.0.1.1", "10.0.2.1", "192.168.1.1")}
+    assert Extraer_ips.format_prefixes(prefijos) == (
+        "10.0.0.1-10.0.0.254,10.0.1.1-10.0.1.254,10.0.2.1-10.0.2.254,10.0.3.1-10.0.3.254,"
+        "192.168.1.1-192.168.1.254")
+    assert Extraer_ips.format_prefixes(prefijos, "merged_ranges") == "10.0.0.1-10.0.3.254,192.168.1.1-192.168.1.254"
+    assert Extraer_ips.format_prefixes(prefijos, "cidr") == "10.0.0.0/22,192.168.1.0/24"
+    assert Extraer_ips.format_prefixes(set(), "cidr") == ""
+    with pytest.raises(ValueError):
+        Extraer_ips.format_prefixes(prefijos, "csv")
+
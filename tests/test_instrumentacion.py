@@ -0,0 +1,54 @@
+import json
+import tracemalloc
+
+import Instrumentacion
+from Instrumentacion import activada, en_corrida, medir
+
+
+def test_en_corrida_escribe_informe_junto_a_la_salida(tmp_path):
+    salida = tmp_path / "out.csv"
+
+    @en_corrida("Prueba")
+    def proceso():
+        with medir("etapa"):
+            salida.write_text("x")
+        return str(salida)
+
+    with activada():
+        assert proceso() == str(salida)
+    informe = json.loads((tmp_path / "out.csv.tiempos.json").read_text(encoding="utf-8"))
+    assert informe["corrida"] == "Prueba" and informe["salida"] == str(salida)
+    assert list(informe["secciones"]) == ["Prueba", "etapa"]
+
+
+def test_apagada_no_escribe_nada(tmp_path):
+    salida = tmp_path / "out.csv"
+    assert not Instrumentacion.activo()
+    assert en_corrida("Prueba")(lambda: str(salida))() == str(salida)
+    assert not (tmp_path / "out.csv.tiempos.txt").exists()
+
+
+def test_tracemalloc_se_apaga_al_terminar_la_corrida(tmp_path):
+    assert not tracemalloc.is_tracing()
+    with activada(memoria=True):
+        @en_corrida("Memoria")
+        def proceso():
+            assert tracemalloc.is_tracing()
+            with medir("lista"):
+                _ = [0] * 100_000
+            return str(tmp_path / "m.csv")
+
+        proceso()
+    assert not tracemalloc.is_tracing()
+    secciones = Instrumentacion.ultima_corrida().como_dict()["secciones"]
+    assert secciones["lista"]["mem_pico_mib"] > 0
+
+
+def test_no_apaga_un_tracemalloc_ajeno():
+    tracemalloc.start()
+    try:
+        with activada(memoria=True):
+            en_corrida("Memoria")(lambda: None)()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,53 @@
+import hashlib
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def sha_mod(tmp_path, monkeypatch):
+    # SHA-256.py no es importable por nombre (tiene un guion)
+    spec = importlib.util.spec_from_file_location("sha_256", RAIZ / "SHA-256.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "CACHE_FILE", tmp_path / "cache" / "sha256.json")
+    monkeypatch.setattr(mod, "copy_to_clipboard", lambda text: None)
+    return mod
+
+
+def _cambiar_sin_tocar_mtime(path: Path, contenido: bytes):
+    st = path.stat()
+    path.write_bytes(contenido)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_por_defecto_no_usa_cache(tmp_path, sha_mod):
+    exe = tmp_path / "setup.exe"
+    exe.write_bytes(b"a" * 1000)
+    assert sha_mod.sha256_file(exe, show_progress=False) == hashlib.sha256(b"a" * 1000).hexdigest()
+
+    _cambiar_sin_tocar_mtime(exe, b"b" * 1000)
+    assert sha_mod.sha256_file(exe, show_progress=False) == hashlib.sha256(b"b" * 1000).hexdigest()
+    # con la cache pedida explícitamente, mismo tamaño y mtime => hash guardado
+    assert sha_mod.sha256_file(exe, show_progress=False, use_cache=True) == hashlib.sha256(b"b" * 1000).hexdigest()
+
+
+def test_cli_con_cache_no_publica(tmp_path, sha_mod, monkeypatch):
+    exe = tmp_path / "setup.exe"
+    exe.write_bytes(b"a" * 1000)
+    argv = ["SHA-256.py", "--exe", str(exe), "--no-progress", "--version", "v1", "--url", "http://x/setup.exe"]
+
+    monkeypatch.setattr(sys, "argv", argv + ["--cache"])
+    sha_mod.cli_flow()
+    assert not (tmp_path / "sha256.txt").exists()
+    assert not (tmp_path / "latest.json").exists()
+
+    _cambiar_sin_tocar_mtime(exe, b"b" * 1000)
+    monkeypatch.setattr(sys, "argv", argv)
+    sha_mod.cli_flow()
+    assert (tmp_path / "sha256.txt").read_text(encoding="utf-8") == hashlib.sha256(b"b" * 1000).hexdigest()
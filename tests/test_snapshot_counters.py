@@ -0,0 +1,82 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import Db3ToCsv
+from Snapshot_counters import construir_snapshot, fechas_iso_estrictas, huella_archivo, leer_snapshot
+
+FILAS_ISO = [
+    ("A", "2024-01-01 09:00:00", 10, "M404", 10),
+    ("A", "2024-01-02 00:00:00", 11, "M404", 10),
+    ("A", "2024-01-02 23:59:59", 12, "M404", 10),
+    ("B", "2024-01-03 00:00:00", 20, "C4010ND", 40),
+    ("B", None, 21, "C4010ND", 40),
+    ("C", "2023-12-31 23:59:59", 30, "MX711", 20),
+]
+
+
+def _ns(df):
+    # pandas puede parsear en us y el snapshot guarda ns: se compara el instante
+    return df.assign(readdate=df["readdate"].astype("datetime64[ns]"))
+
+
+def _snapshot(path, limite):
+    huella = huella_archivo(path)
+    with closing(sqlite3.connect(path)) as conn:
+        assert construir_snapshot(conn, path, huella)
+    return leer_snapshot(path, huella, limite)
+
+
+@pytest.mark.parametrize("fecha_maxima", [None, "01/01/2024", "02/01/2024", "31/12/2023"])
+def test_filtro_del_snapshot_igual_al_de_sqlite(tmp_path, crear_db, fecha_maxima):
+    path = crear_db(tmp_path / "iso.db3", FILAS_ISO)
+    limite = Db3ToCsv._fecha_param(fecha_maxima) if fecha_maxima else None
+    with closing(sqlite3.connect(path)) as conn:
+        esperado = Db3ToCsv.ejecutar_consulta(conn, fecha_maxima)
+    pd.testing.assert_frame_equal(_ns(_snapshot(path, limite)), _ns(esperado))
+
+
+@pytest.mark.parametrize("fecha", ["2024-01-02", "2024-01-02T10:00:00", "2024-01-02 10:00:00-03:00",
+                                   "2024-01-02 10:00:00.5", "02/01/2024 10:00:00"])
+def test_fechas_no_estrictas_no_generan_snapshot(tmp_path, crear_db, fecha):
+    path = crear_db(tmp_path / "mixta.db3", FILAS_ISO + [("D", fecha, 40, "M404", 10)])
+    with closing(sqlite3.connect(path)) as conn:
+        assert not fechas_iso_estrictas(conn)
+        assert not construir_snapshot(conn, path, huella_archivo(path))
+    assert leer_snapshot(path, huella_archivo(path), None) is None
+
+
+def test_fecha_solo_dia_leida_igual_que_sqlite(tmp_path, crear_db):
+    # '2024-01-02' < '2024-01-02 00:00:00' en texto: SQLite la conserva con fecha_maxima 01/01/2024
+    path = crear_db(tmp_path / "dia.db3", FILAS_ISO + [("D", "2024-01-02", 40, "M404", 10)])
+    con_snapshot = Db3ToCsv.leer_dbs([path], "01/01/2024", snapshot=True)
+    sin_snapshot = Db3ToCsv.leer_dbs([path], "01/01/2024")
+    pd.testing.assert_frame_equal(_ns(con_snapshot[0]), _ns(sin_snapshot[0]))
+    assert "D" in set(sin_snapshot[0]["serialnumber"])
+
+
+def test_fechas_iso_estrictas_desde_rowid(tmp_path, crear_db):
+    path = crear_db(tmp_path / "rid.db3", [("D", "2024-01-02", 40, "M404", 10)] + FILAS_ISO)
+    with closing(sqlite3.connect(path)) as conn:
+        assert not fechas_iso_estrictas(conn)
+        assert fechas_iso_estrictas(conn, desde_rowid=1)
+
+
+def test_snapshot_se_invalida_con_commits_en_el_wal(tmp_path, crear_db):
+    path = crear_db(tmp_path / "viva.db3", [("A", "2024-01-01 10:00:00", 1, "M404", 10)])
+    escritor = sqlite3.connect(path)
+    try:
+        escritor.execute("PRAGMA journal_mode = WAL")
+        escritor.execute("PRAGMA wal_autocheckpoint = 0")
+        assert len(pd.concat(Db3ToCsv.leer_dbs([path], None, snapshot=True))) == 1
+
+        escritor.execute("INSERT INTO counters (serialnumber, readdate, readvalue, model, counterclass_id)"
+                         " VALUES ('A', '2024-01-05 10:00:00', 999, 'M404', 10)")
+        escritor.commit()  # sólo en el -wal: el archivo principal no cambia
+        df = pd.concat(Db3ToCsv.leer_dbs([path], None, snapshot=True))
+        assert df["readvalue"].tolist() == [1, 999]
+    finally:
+        escritor.close()
+
@@ -0,0 +1,49 @@
+import sqlite3
+from contextlib import closing
+
+from Sqlite_lectura import conectar_solo_lectura, es_archivo_estatico, firma_wal, uri_solo_lectura
+
+
+def test_uri_sin_immutable_por_defecto(tmp_path):
+    uri = uri_solo_lectura(str(tmp_path / "a b.db3"))
+    assert uri.endswith("?mode=ro")
+    assert "a%20b.db3" in uri
+    assert uri_solo_lectura(str(tmp_path / "x.db3"), inmutable=True).endswith("&immutable=1")
+
+
+def test_es_archivo_estatico():
+    assert es_archivo_estatico(r"C:\data\PrinterMonitorClient.db3.1")
+    assert es_archivo_estatico("/x/PrinterMonitorClient.DB3.12")
+    assert not es_archivo_estatico("/x/PrinterMonitorClient.db3")
+    assert not es_archivo_estatico("/x/PrinterMonitorClient.db3.bak")
+
+
+def test_db_viva_en_wal_se_lee_completa(tmp_path):
+    path = str(tmp_path / "viva.db3")
+    escritor = sqlite3.connect(path)
+    try:
+        escritor.execute("PRAGMA journal_mode = WAL")
+        escritor.execute("PRAGMA wal_autocheckpoint = 0")
+        escritor.execute("CREATE TABLE counters (x INTEGER)")
+        escritor.executemany("INSERT INTO counters VALUES (?)", [(i,) for i in range(10)])
+        escritor.commit()  # las filas quedan sólo en el -wal (sin checkpoint)
+
+        with closing(conectar_solo_lectura(path)) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0] == 10
+
+        firma = firma_wal(path)
+        assert firma is not None
+        escritor.execute("INSERT INTO counters VALUES (10)")
+        escritor.commit()
+        assert firma_wal(path) != firma
+    finally:
+        escritor.close()
+
+
+def test_firma_wal_sin_wal(tmp_path):
+    path = str(tmp_path / "rollback.db3")
+    with closing(sqlite3.connect(path)) as con:
+        con.execute("CREATE TABLE counters (x INTEGER)")
+        con.commit()
+    assert firma_wal(path) is None
+
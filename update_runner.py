@@ -1,13 +1,17 @@
 # update_runner.py
+import time
+_T0 = time.perf_counter()
+
 import argparse
 import os
 import subprocess
 import sys
 import threading
-import time
 import tkinter as tk
 from tkinter import ttk
 
+from Medicion_arranque import MarcasArranque
+
 # === Paleta (igual que la app) ===
 ORANGE = "#FF7F00"
 BLUE   = "#1E90FF"
@@ -105,7 +109,8 @@ def main():
                 lbl.config(text=f"El instalador devolvió código {rc}. Cerrá esta ventana e intenta nuevamente.")
         root.after(0, finalize)
 
-    run_installer(installer_path, lbl, pbar, on_done)
+    marcas = MarcasArranque("HelpDeskUpdater", t0=_T0)
+    marcas.al_pintar(root, despues=lambda: run_installer(installer_path, lbl, pbar, on_done), salir=False)
     root.mainloop()
 
 if __name__ == "__main__":